@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de BIO-CEL INTERACTIVE
+
+Suite de benchmarks con semillas y datos sintéticos fijos:
+
+  arranque       tiempo hasta el primer menú (construcción de SistemaEstudio)
+                 con el temario desde el código y con el contenido
+                 precompilado, para bancos de preguntas cada vez mayores
+  persistencia   cargar_progreso y guardar_progreso con historiales de 10^3
+                 a 10^6 tests, en el diario y en SQLite
+  correccion     ejecutar_test sin terminal (respuestas guionizadas) y
+                 corrección por lotes de un grupo grande
+  simulaciones   las simulaciones de la interfaz con sus pausas
+                 respondidas automáticamente, y el barrido de la cadena
+                 respiratoria, todo sin caché; además, una simulación
+                 repetida servida desde la caché de resultados
+
+Los resultados se pueden guardar en JSON y compararse con una ejecución
+anterior; cualquier medida que empeore más del umbral se marca como
+regresión y el programa termina con código 1.
+
+Uso:
+    python bench_biocel.py [--repeticiones N] [--grupos G ...] [--max-historial N]
+                           [--salida resultados.json] [--comparar base.json]
+                           [--umbral 0.25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import biocel_interactive as bio
+
+GRUPOS = ('arranque', 'persistencia', 'correccion', 'simulaciones')
+
+
+def temario_sintetico(factor):
+    """Devuelve el temario real replicado `factor` veces con otros números"""
+    base = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None).temas
+    temas = {}
+    for copia in range(factor):
+        for numero, tema in base.items():
+            nuevo = copia * 100 + numero
+            temas[nuevo] = bio.Tema(
+                numero=nuevo,
+                titulo=f"{tema.titulo} ({copia + 1})",
+                contenido=list(tema.contenido),
+                conceptos_clave=list(tema.conceptos_clave),
+                preguntas=[dict(p) for p in tema.preguntas] * 5
+            )
+    return temas
+
+
+def historial_sintetico(n, semilla=0):
+    """n registros de test deterministas repartidos entre los 20 temas"""
+    generador = random.Random(semilla)
+    for i in range(n):
+        correctas = generador.randint(0, 5)
+        yield {
+            'fecha': f"2025-{i // 100000 % 12 + 1:02d}-{i // 3000 % 28 + 1:02d} "
+                     f"{i // 60 % 24:02d}:{i % 60:02d}",
+            'tema': generador.randint(1, 20),
+            'preguntas_totales': 5,
+            'correctas': correctas,
+            'nota': correctas * 20.0
+        }
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Mediana en milisegundos de varias ejecuciones"""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def sin_salida(funcion):
+    """Ejecuta una función que imprime con print sin mostrar nada"""
+    salida = sys.stdout
+    with open(os.devnull, 'w') as nulo:
+        sys.stdout = nulo
+        try:
+            return funcion()
+        finally:
+            sys.stdout = salida
+
+
+# ---------------------------------------------------------------------------
+# Arranque
+# ---------------------------------------------------------------------------
+
+def bench_arranque(repeticiones):
+    """Tiempo hasta el primer menú según el tamaño del temario"""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for factor in (1, 10, 100):
+            temas = temario_sintetico(factor)
+            preguntas = sum(len(t.preguntas) for t in temas.values())
+            ruta = os.path.join(directorio, f"contenido_{factor}.bin")
+            bio.TemarioCompilado.compilar(temas, ruta)
+
+            def arranque_compilado():
+                sistema = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=ruta)
+                sistema.temas.compilado.cerrar()
+
+            def arranque_codigo():
+                # Equivale a construir todo el temario desde literales
+                sistema = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None)
+                sistema.temas = {
+                    n: bio.Tema(numero=t.numero, titulo=t.titulo,
+                                contenido=list(t.contenido),
+                                conceptos_clave=list(t.conceptos_clave),
+                                preguntas=[dict(p) for p in t.preguntas])
+                    for n, t in temas.items()
+                }
+                sistema.cargar_progreso()
+
+            etiqueta = f"{len(temas)} temas, {preguntas} preguntas"
+            resultados[f"arranque/codigo/{etiqueta}"] = medir(arranque_codigo, repeticiones)
+            resultados[f"arranque/compilado/{etiqueta}"] = medir(arranque_compilado, repeticiones)
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Persistencia
+# ---------------------------------------------------------------------------
+
+def bench_persistencia(repeticiones, max_historial):
+    """cargar_progreso y guardar_progreso con historiales crecientes"""
+    resultados = {}
+    tamanos = [10 ** k for k in range(3, 7) if 10 ** k <= max_historial]
+    for n in tamanos:
+        # Los historiales grandes se miden menos veces
+        veces = max(1, min(repeticiones, 10 ** 5 // n))
+        with tempfile.TemporaryDirectory() as directorio:
+            resultados.update(_bench_diario(directorio, n, veces))
+            resultados.update(_bench_sqlite(directorio, n, veces))
+    return resultados
+
+
+def _bench_diario(directorio, n, veces):
+    ruta_snapshot = os.path.join(directorio, 'progreso.pkl')
+    ruta_diario = os.path.join(directorio, 'progreso.diario')
+    with open(ruta_diario, 'wb') as f:
+        for registro in historial_sintetico(n):
+            f.write(bio.DiarioProgreso._serializar({'tipo': 'test', 'registro': registro}))
+
+    def abrir():
+        return bio.SistemaEstudio(bio.DiarioProgreso(ruta_snapshot, ruta_diario),
+                                  ruta_contenido=None)
+
+    sistemas = []
+
+    def cargar():
+        sistemas.append(abrir())
+
+    def cerrar_abiertos():
+        while sistemas:
+            sistemas.pop().almacen.cerrar()
+
+    resultados = {}
+    # Sin snapshot se reaplica el diario completo
+    resultados[f"persistencia/diario/cargar sin snapshot/{n}"] = medir(
+        cargar, 1, preparar=cerrar_abiertos)
+    sistema = sistemas[-1]
+    resultados[f"persistencia/diario/guardar/{n}"] = medir(sistema.guardar_progreso, veces)
+    cerrar_abiertos()
+    resultados[f"persistencia/diario/cargar/{n}"] = medir(cargar, veces,
+                                                         preparar=cerrar_abiertos)
+    cerrar_abiertos()
+    return resultados
+
+
+def _bench_sqlite(directorio, n, veces):
+    ruta = os.path.join(directorio, 'progreso.db')
+    almacen = bio.AlmacenSQLite(ruta, 'bench')
+    registros = list(historial_sintetico(n))
+    almacen.registrar_grupo(['bench'] * n, registros)
+    almacen.cerrar()
+
+    sistemas = []
+
+    def cargar():
+        sistemas.append(bio.SistemaEstudio(bio.AlmacenSQLite(ruta, 'bench'),
+                                           ruta_contenido=None))
+
+    def cerrar_abiertos():
+        while sistemas:
+            sistemas.pop().almacen.cerrar()
+
+    resultados = {}
+    resultados[f"persistencia/sqlite/cargar/{n}"] = medir(cargar, veces,
+                                                         preparar=cerrar_abiertos)
+    sistema = sistemas[-1]
+    resultados[f"persistencia/sqlite/guardar/{n}"] = medir(sistema.guardar_progreso, veces)
+    cerrar_abiertos()
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Corrección
+# ---------------------------------------------------------------------------
+
+def bench_correccion(repeticiones):
+    """ejecutar_test sin terminal y corrección por lotes"""
+    resultados = {}
+    sistema_base = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None)
+    tema = sistema_base.temas[1]
+    indices = list(range(len(tema.preguntas)))
+
+    def test_guionizado():
+        canal = bio.CanalReproduccion(['B', 'A', 'C'] * len(indices), relleno="")
+        interfaz = bio.InterfazEstudio(bio.AlmacenMemoria(), canal=canal,
+                                       temas=sistema_base.temas)
+        asyncio.run(interfaz.ejecutar_test(tema, indices))
+
+    resultados["correccion/ejecutar_test"] = medir(test_guionizado, repeticiones)
+
+    if bio.np is not None:
+        generador = random.Random(0)
+        estudiantes = [f"e{i}" for i in range(10000)]
+        respuestas = [[generador.randint(0, 3) for _ in indices] for _ in estudiantes]
+        resultados["correccion/lote/10000 estudiantes"] = medir(
+            lambda: bio.corregir_lote(tema, estudiantes, respuestas, fecha="2025-01-01 00:00"),
+            repeticiones)
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Simulaciones
+# ---------------------------------------------------------------------------
+
+def bench_simulaciones(repeticiones):
+    """Las simulaciones de la interfaz con las pausas automatizadas"""
+    if bio.np is None:
+        return {}
+    resultados = {}
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None).temas
+    # Se mide el cálculo, no la caché de resultados (ni se ensucia el disco)
+    bio.cache_simulaciones.activa = False
+    guiones = {
+        'simular_transporte_na_k': [],
+        'simular_potencial_accion': [],
+        'simular_cadena_respiratoria': ["", "", "", "n"],
+        'simular_ciclo_celular': [],
+        'simular_filamentos': []
+    }
+    for metodo, guion in guiones.items():
+        def ejecutar():
+            canal = bio.CanalReproduccion(guion, relleno="")
+            interfaz = bio.InterfazEstudio(bio.AlmacenMemoria(), canal=canal, temas=temas)
+            asyncio.run(getattr(interfaz, metodo)())
+        # Pocas repeticiones: son las medidas más largas de la suite
+        resultados[f"simulaciones/{metodo}"] = medir(ejecutar, max(1, repeticiones // 5))
+
+    valores = [float(v) for v in range(2, 21, 2)]
+    resultados["simulaciones/barrido cadena 10x10 sin cache"] = medir(
+        lambda: bio.barrido_cadena_respiratoria(valores, valores, [4.0], procesos=1),
+        max(1, repeticiones // 5), preparar=bio._cache_barrido.clear)
+    resultados["simulaciones/frap 10^5 partículas, 100 pasos"] = medir(
+        lambda: bio.simular_frap(10 ** 5, 2.0, semilla=0, procesos=1),
+        max(1, repeticiones // 5))
+    resultados["simulaciones/meiosis 5000 individuos, 20 generaciones"] = medir(
+        lambda: bio.PoblacionMeiosis(5000, semilla=0).avanzar(20),
+        max(1, repeticiones // 5))
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = bio.CacheSimulaciones(directorio)
+        corrientes = [float(v) for v in range(21)] * 100
+        cache.ejecutar(bio.simular_hodgkin_huxley, corrientes)
+        # Una sesión nueva: memoria vacía, resultado en disco con mmap
+        resultados["simulaciones/cache hodgkin-huxley 2100 neuronas, desde disco"] = medir(
+            lambda: bio.CacheSimulaciones(directorio).ejecutar(bio.simular_hodgkin_huxley, corrientes),
+            repeticiones)
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# Informe
+# ---------------------------------------------------------------------------
+
+def comparar(resultados, base, umbral):
+    """Devuelve [(nombre, actual, anterior, cociente, regresión)]"""
+    filas = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None or anterior <= 0:
+            filas.append((nombre, actual, None, None, False))
+            continue
+        cociente = actual / anterior
+        filas.append((nombre, actual, anterior, cociente, cociente > 1 + umbral))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de BIO-CEL INTERACTIVE")
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=list(GRUPOS))
+    parser.add_argument('--max-historial', type=int, default=10 ** 6,
+                        help="tamaño máximo del historial en persistencia")
+    parser.add_argument('--salida', metavar='JSON', help="guarda los resultados")
+    parser.add_argument('--comparar', metavar='JSON', help="resultados de referencia")
+    parser.add_argument('--umbral', type=float, default=0.25,
+                        help="empeoramiento relativo que se considera regresión")
+    args = parser.parse_args()
+
+    random.seed(0)
+    resultados = {}
+    for grupo in args.grupos:
+        print(f"Midiendo {grupo}...", file=sys.stderr)
+        if grupo == 'arranque':
+            resultados.update(bench_arranque(args.repeticiones))
+        elif grupo == 'persistencia':
+            resultados.update(bench_persistencia(args.repeticiones, args.max_historial))
+        elif grupo == 'correccion':
+            resultados.update(bench_correccion(args.repeticiones))
+        elif grupo == 'simulaciones':
+            resultados.update(sin_salida(lambda: bench_simulaciones(args.repeticiones)))
+
+    base = {}
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)['resultados']
+
+    regresiones = 0
+    print(f"\n{'BENCHMARK':<62}{'MEDIANA':>12}{'REFERENCIA':>12}{'CAMBIO':>9}")
+    for nombre, actual, anterior, cociente, regresion in comparar(resultados, base, args.umbral):
+        if anterior is None:
+            print(f"{nombre:<62}{actual:>9.2f} ms")
+            continue
+        marca = "  REGRESIÓN" if regresion else ""
+        regresiones += regresion
+        print(f"{nombre:<62}{actual:>9.2f} ms{anterior:>9.2f} ms{cociente - 1:>+9.0%}{marca}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'numpy': bio.np.__version__ if bio.np is not None else None,
+                'plataforma': platform.platform(),
+                'repeticiones': args.repeticiones,
+                'resultados': resultados
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
+
+    if regresiones:
+        print(f"\n{regresiones} medidas empeoran más de un {args.umbral:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,14 +11,45 @@ BIO-CEL INTERACTIVE: TERMINAL DEL CONOCIMIENTO CELULAR (Básica)
 """
 
 import sys
+import argparse
 import os
 import json
 import random
+import atexit
+import queue
+import threading
+import time
+import asyncio
+import functools
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict, is_dataclass
 from enum import Enum
 import pickle
+import sqlite3
+import csv
+import math
+import re
+import bisect
+import heapq
+import hashlib
+import unicodedata
+import shutil
+import tempfile
+import signal
+import mmap
+import struct
+import zlib
+import inspect
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Mapping, MutableMapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: solo lo usan los motores por lotes
+    np = None
 
 # ===========================================================================
 # ESTRUCTURAS DE DATOS BASADAS EN EL PDF
@@ -31,7 +62,7 @@ class Tema:
     titulo: str
     contenido: List[str] = field(default_factory=list)
     conceptos_clave: List[str] = field(default_factory=list)
-    preguntas: List[Dict] = field(default_factory=list)
+    preguntas: Sequence = field(default_factory=list)  # BancoPreguntas o lista de dicts
 
 @dataclass
 class PreguntaTest:
@@ -43,17 +74,1124 @@ class PreguntaTest:
     explicacion: str
     nivel_dificultad: str = "medio"  # facil, medio, dificil
 
+class VistaPregunta(Mapping):
+    """Pregunta de un BancoPreguntas, con la misma lectura que un diccionario"""
+
+    __slots__ = ('banco', 'indice')
+
+    def __init__(self, banco, indice):
+        self.banco = banco
+        self.indice = indice
+
+    def __getitem__(self, clave):
+        return self.banco.campo(self.indice, clave)
+
+    def __iter__(self):
+        yield from BancoPreguntas.CAMPOS
+        if self.banco.niveles[self.indice] >= 0:
+            yield 'nivel_dificultad'
+
+    def __len__(self):
+        return len(BancoPreguntas.CAMPOS) + (self.banco.niveles[self.indice] >= 0)
+
+    def __repr__(self):
+        return f"VistaPregunta({dict(self)!r})"
+
+class BancoPreguntas(Sequence):
+    """Preguntas de un tema guardadas por columnas
+
+    En lugar de un diccionario y varias cadenas por pregunta, los
+    enunciados y las explicaciones se concatenan en UTF-8 con un array de
+    límites, las opciones son referencias a cadenas internadas (compartidas
+    entre preguntas y temas) y la respuesta y el nivel de dificultad van en
+    arrays de bytes. Al indexarlo se obtiene una VistaPregunta que se lee
+    igual que los diccionarios originales.
+    """
+
+    CAMPOS = ('enunciado', 'opciones', 'respuesta', 'explicacion')
+    NIVELES = ('facil', 'medio', 'dificil')
+
+    def __init__(self, preguntas=()):
+        self.enunciados = bytearray()
+        self.limites_enunciados = array('I', [0])
+        self.explicaciones = bytearray()
+        self.limites_explicaciones = array('I', [0])
+        self.opciones = []
+        self.limites_opciones = array('I', [0])
+        self.respuestas = array('b')
+        self.niveles = array('b')       # -1: sin nivel declarado
+        for pregunta in preguntas:
+            self.agregar(pregunta)
+
+    @classmethod
+    def desde(cls, preguntas):
+        """Devuelve `preguntas` como banco, convirtiéndolas si hace falta"""
+        return preguntas if isinstance(preguntas, cls) else cls(preguntas)
+
+    def agregar(self, pregunta):
+        """Añade una pregunta con las claves de los diccionarios del temario"""
+        self.enunciados += pregunta['enunciado'].encode('utf-8')
+        self.limites_enunciados.append(len(self.enunciados))
+        self.explicaciones += pregunta['explicacion'].encode('utf-8')
+        self.limites_explicaciones.append(len(self.explicaciones))
+        self.opciones.extend(sys.intern(opcion) for opcion in pregunta['opciones'])
+        self.limites_opciones.append(len(self.opciones))
+        self.respuestas.append(pregunta['respuesta'])
+        nivel = pregunta.get('nivel_dificultad')
+        self.niveles.append(self.NIVELES.index(nivel) if nivel in self.NIVELES else -1)
+
+    def extender(self, otro):
+        """Añade al final todas las preguntas de otro banco"""
+        for propio, ajeno, limites_propios, limites_ajenos in (
+                (self.enunciados, otro.enunciados,
+                 self.limites_enunciados, otro.limites_enunciados),
+                (self.explicaciones, otro.explicaciones,
+                 self.limites_explicaciones, otro.limites_explicaciones),
+                (self.opciones, otro.opciones,
+                 self.limites_opciones, otro.limites_opciones)):
+            base = len(propio)
+            propio += ajeno
+            limites_propios.extend(base + limite for limite in limites_ajenos[1:])
+        self.respuestas += otro.respuestas
+        self.niveles += otro.niveles
+
+    def campo(self, i, clave):
+        """Valor de un campo de la pregunta i"""
+        if clave == 'enunciado':
+            return self.enunciados[self.limites_enunciados[i]:
+                                   self.limites_enunciados[i + 1]].decode('utf-8')
+        if clave == 'opciones':
+            return self.opciones[self.limites_opciones[i]:self.limites_opciones[i + 1]]
+        if clave == 'respuesta':
+            return self.respuestas[i]
+        if clave == 'explicacion':
+            return self.explicaciones[self.limites_explicaciones[i]:
+                                      self.limites_explicaciones[i + 1]].decode('utf-8')
+        if clave == 'nivel_dificultad' and self.niveles[i] >= 0:
+            return self.NIVELES[self.niveles[i]]
+        raise KeyError(clave)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("índice de pregunta fuera de rango")
+        return VistaPregunta(self, i)
+
+    def __len__(self):
+        return len(self.respuestas)
+
+    def columnas(self):
+        """Columnas como tipos básicos (para serializar sin referencias a la clase)"""
+        return (bytes(self.enunciados), self.limites_enunciados.tobytes(),
+                bytes(self.explicaciones), self.limites_explicaciones.tobytes(),
+                list(self.opciones), self.limites_opciones.tobytes(),
+                self.respuestas.tobytes(), self.niveles.tobytes())
+
+    @classmethod
+    def desde_columnas(cls, columnas):
+        """Reconstruye un banco a partir de columnas()"""
+        banco = cls()
+        (enunciados, limites_enunciados, explicaciones, limites_explicaciones,
+         opciones, limites_opciones, respuestas, niveles) = columnas
+        banco.enunciados = bytearray(enunciados)
+        banco.limites_enunciados = array('I', limites_enunciados)
+        banco.explicaciones = bytearray(explicaciones)
+        banco.limites_explicaciones = array('I', limites_explicaciones)
+        banco.opciones = [sys.intern(opcion) for opcion in opciones]
+        banco.limites_opciones = array('I', limites_opciones)
+        banco.respuestas = array('b', respuestas)
+        banco.niveles = array('b', niveles)
+        return banco
+
+def progreso_inicial():
+    """Devuelve el registro de progreso de un tema sin estudiar"""
+    return {
+        'estudiado': False,
+        'horas_estudio': 0,
+        'tests_completados': 0,
+        'mejor_nota': 0
+    }
+
+# ===========================================================================
+# INSTRUMENTACIÓN
+# ===========================================================================
+
+class _TramoNulo:
+    """Tramo que no mide nada (instrumentación desactivada)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+_TRAMO_NULO = _TramoNulo()
+
+class Tramo:
+    """Mide la duración de un bloque `with` y la añade a su histograma"""
+
+    __slots__ = ('instrumentacion', 'nombre', 'sin_espera', 'inicio', 'espera')
+
+    def __init__(self, instrumentacion, nombre, sin_espera=None):
+        self.instrumentacion = instrumentacion
+        self.nombre = nombre
+        self.sin_espera = sin_espera
+
+    def __enter__(self):
+        if self.sin_espera is not None:
+            self.espera = self.sin_espera.espera
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self.inicio
+        if self.sin_espera is not None:
+            # Descuenta el tiempo que el usuario tardó en responder
+            segundos -= self.sin_espera.espera - self.espera
+        self.instrumentacion.registrar(self.nombre, segundos)
+        return False
+
+class Instrumentacion:
+    """Tramos de tiempo agregados en histogramas, exportables bajo demanda
+
+    Desactivada, tramo() devuelve siempre el mismo objeto nulo y el coste
+    es una comprobación y un bloque `with` vacío. Activada, cada tramo se
+    acumula en un histograma de cubetas fijas (como los de Prometheus),
+    así que la memoria no crece con el número de mediciones.
+    """
+
+    # Límites superiores de las cubetas, en segundos
+    LIMITES = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+               0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.activa = False
+        self.histogramas = {}   # nombre → [conteos por cubeta (+inf al final), suma]
+        self.cerrojo = threading.Lock()
+
+    def activar(self, activa=True):
+        self.activa = activa
+
+    def tramo(self, nombre, sin_espera=None):
+        """Contexto que mide un bloque; sin_espera descuenta su atributo `espera`"""
+        if not self.activa:
+            return _TRAMO_NULO
+        return Tramo(self, nombre, sin_espera)
+
+    def registrar(self, nombre, segundos):
+        """Añade una duración al histograma del tramo"""
+        cubeta = bisect.bisect_left(self.LIMITES, segundos)
+        with self.cerrojo:
+            histograma = self.histogramas.get(nombre)
+            if histograma is None:
+                histograma = self.histogramas[nombre] = [[0] * (len(self.LIMITES) + 1), 0.0]
+            histograma[0][cubeta] += 1
+            histograma[1] += segundos
+
+    def a_dict(self):
+        """Resumen de cada tramo: número, suma, media y cubetas acumuladas"""
+        resumen = {}
+        with self.cerrojo:
+            for nombre, (conteos, suma) in sorted(self.histogramas.items()):
+                total = sum(conteos)
+                acumulado = 0
+                cubetas = {}
+                for limite, conteo in zip(self.LIMITES + ('+Inf',), conteos):
+                    acumulado += conteo
+                    cubetas[str(limite)] = acumulado
+                resumen[nombre] = {
+                    'n': total,
+                    'suma_s': suma,
+                    'media_ms': 1000 * suma / total if total else 0.0,
+                    'cubetas': cubetas
+                }
+        return resumen
+
+    def texto_prometheus(self):
+        """Histogramas en el formato de texto de Prometheus"""
+        lineas = [
+            "# HELP biocel_tramo_segundos Duración de los tramos instrumentados",
+            "# TYPE biocel_tramo_segundos histogram"
+        ]
+        for nombre, datos in self.a_dict().items():
+            for limite, acumulado in datos['cubetas'].items():
+                lineas.append(f'biocel_tramo_segundos_bucket{{tramo="{nombre}",le="{limite}"}} {acumulado}')
+            lineas.append(f'biocel_tramo_segundos_sum{{tramo="{nombre}"}} {datos["suma_s"]:.9f}')
+            lineas.append(f'biocel_tramo_segundos_count{{tramo="{nombre}"}} {datos["n"]}')
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, prefijo):
+        """Escribe PREFIJO.json y PREFIJO.prom (sustitución atómica)"""
+        for ruta, contenido in ((prefijo + '.json', json.dumps(self.a_dict(), indent=2,
+                                                               ensure_ascii=False)),
+                                (prefijo + '.prom', self.texto_prometheus())):
+            temporal = ruta + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)
+
+# Instancia global: la activa --instrumentar
+instrumentacion = Instrumentacion()
+
+# ===========================================================================
+# PERSISTENCIA: ALMACENES DE PROGRESO
+# ===========================================================================
+
+class AlmacenProgreso:
+    """Interfaz común de los almacenes de progreso
+
+    SistemaEstudio solo habla con el almacén a través de estos métodos:
+    carga el estado inicial, le envía cada evento de progreso y le pide las
+    consultas sobre el historial de tests, que así no tiene que estar
+    completo en memoria.
+    """
+
+    def cargar(self):
+        """Devuelve (snapshot, eventos posteriores al snapshot)
+
+        El snapshot es un diccionario con 'progreso', 'notas' y 'repaso', o
+        None si el estudiante no tiene progreso guardado.
+        """
+        raise NotImplementedError
+
+    def registrar(self, evento):
+        """Persiste un evento de progreso"""
+        raise NotImplementedError
+
+    def compactar(self, estado):
+        """Guarda el estado completo (progreso y notas)"""
+
+    def iniciar(self):
+        """Prepara el almacén para recibir eventos"""
+
+    def vaciar(self):
+        """Espera a que todos los eventos estén en disco"""
+
+    def cerrar(self):
+        """Libera los recursos del almacén"""
+
+    def leer_historial(self):
+        """Itera todos los registros de tests del estudiante"""
+        raise NotImplementedError
+
+    def ultimos_tests(self, n):
+        """Devuelve los n tests más recientes, del más antiguo al más nuevo"""
+        raise NotImplementedError
+
+    def numero_tests(self):
+        """Número de tests en el historial"""
+        raise NotImplementedError
+
+    def mejores_notas(self):
+        """Devuelve {tema: mejor nota} a partir del historial"""
+        raise NotImplementedError
+
+    def parametros_irt(self):
+        """Devuelve {(tema, clave_pregunta): (discriminación, dificultad)} calibrados"""
+        return {}
+
+class DiarioProgreso(AlmacenProgreso):
+    """Diario de eventos de progreso con escritura por lotes en segundo plano
+
+    Cada cambio (tema estudiado, test terminado, nueva mejor nota) se añade
+    como una línea JSON al final del diario. El snapshot solo guarda el
+    estado pequeño (progreso, notas y agregados) junto con la posición del
+    diario hasta la que ya está incluido, de modo que guardar y arrancar
+    cuestan lo mismo tenga el historial 10 tests o 10 millones. Las
+    consultas sobre el historial completo leen el diario del disco.
+    """
+
+    def __init__(self, ruta_snapshot='progreso_biocel.pkl',
+                 ruta_diario='progreso_biocel.diario',
+                 intervalo=1.0, tamano_lote=64):
+        self.ruta_snapshot = ruta_snapshot
+        self.ruta_diario = ruta_diario
+        self.intervalo = intervalo
+        self.tamano_lote = tamano_lote
+        self.cola = queue.Queue()
+        self.hilo = None
+
+    # -- Lectura ------------------------------------------------------------
+
+    def cargar(self):
+        """Devuelve (snapshot, eventos posteriores al snapshot)"""
+        snapshot = None
+        try:
+            with open(self.ruta_snapshot, 'rb') as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            pass
+
+        self._reparar_diario()
+
+        if snapshot is not None and 'desplazamiento' not in snapshot:
+            # Formato antiguo: todo el historial dentro del pickle
+            self._migrar_formato_antiguo(snapshot)
+
+        # Solo se leen los eventos posteriores al snapshot
+        desplazamiento = snapshot.get('desplazamiento', 0) if snapshot else 0
+        eventos = [evento for _, evento in self._leer_eventos(desplazamiento)]
+        return snapshot, eventos
+
+    def leer_historial(self):
+        self.vaciar()
+        for _, evento in self._leer_eventos():
+            if evento['tipo'] == 'test':
+                yield evento['registro']
+
+    def ultimos_tests(self, n):
+        return list(deque(self.leer_historial(), maxlen=n)) if n > 0 else []
+
+    def numero_tests(self):
+        return sum(1 for _ in self.leer_historial())
+
+    def mejores_notas(self):
+        mejores = {}
+        for registro in self.leer_historial():
+            tema_num = registro['tema']
+            if registro['nota'] > mejores.get(tema_num, 0):
+                mejores[tema_num] = registro['nota']
+        return mejores
+
+    def _leer_eventos(self, desde=0):
+        """Itera (posición en bytes, evento) desde una posición del diario"""
+        try:
+            with open(self.ruta_diario, 'rb') as f:
+                f.seek(desde)
+                posicion = desde
+                for linea in f:
+                    yield posicion, json.loads(linea)
+                    posicion += len(linea)
+        except FileNotFoundError:
+            return
+
+    def _reparar_diario(self):
+        """Descarta una última línea incompleta dejada por un cierre abrupto"""
+        try:
+            with open(self.ruta_diario, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                tamano = f.tell()
+                if tamano == 0:
+                    return
+                f.seek(tamano - 1)
+                if f.read(1) == b'\n':
+                    return
+                # Buscar el último salto de línea completo
+                bloque = 4096
+                posicion = tamano
+                while posicion > 0:
+                    inicio = max(0, posicion - bloque)
+                    f.seek(inicio)
+                    datos = f.read(posicion - inicio)
+                    indice = datos.rfind(b'\n')
+                    if indice >= 0:
+                        f.truncate(inicio + indice + 1)
+                        return
+                    posicion = inicio
+                f.truncate(0)
+        except FileNotFoundError:
+            pass
+
+    def _migrar_formato_antiguo(self, snapshot):
+        """Vuelca el historial de un pickle antiguo al diario"""
+        with open(self.ruta_diario, 'ab') as f:
+            for registro in snapshot.pop('historial', []):
+                f.write(self._serializar({'tipo': 'test', 'registro': registro}))
+            snapshot['desplazamiento'] = f.tell()
+        self._escribir_snapshot(snapshot)
+
+    # -- Escritura en segundo plano ----------------------------------------
+
+    def iniciar(self):
+        """Arranca el hilo escritor"""
+        if self.hilo is not None:
+            return
+        self.hilo = threading.Thread(target=self._bucle_escritura,
+                                     name='diario-progreso', daemon=True)
+        self.hilo.start()
+        atexit.register(self.cerrar)
+
+    def registrar(self, evento):
+        """Encola un evento para su escritura"""
+        self.cola.put(('evento', evento))
+
+    def compactar(self, estado):
+        """Encola un snapshot del estado actual
+
+        El hilo escritor lo guarda cuando todos los eventos anteriores ya
+        están en el diario, así la posición guardada es siempre coherente.
+        """
+        self.cola.put(('snapshot', pickle.dumps(estado)))
+
+    def vaciar(self):
+        """Espera a que todos los eventos encolados estén en disco"""
+        if self.hilo is None:
+            return
+        hecho = threading.Event()
+        self.cola.put(('vaciar', hecho))
+        hecho.wait()
+
+    def cerrar(self):
+        """Vacía la cola y detiene el hilo escritor"""
+        if self.hilo is None:
+            return
+        self.cola.put(('cerrar', None))
+        self.hilo.join()
+        self.hilo = None
+
+    def _bucle_escritura(self):
+        """Agrupa eventos y los escribe en lotes"""
+        pendientes = []
+        limite = None
+        with open(self.ruta_diario, 'ab') as f:
+            while True:
+                # Ningún evento espera en memoria más de `intervalo` segundos
+                espera = None if limite is None else max(0.0, limite - time.monotonic())
+                try:
+                    tipo, dato = self.cola.get(timeout=espera)
+                except queue.Empty:
+                    self._escribir_lote(f, pendientes)
+                    limite = None
+                    continue
+
+                if tipo == 'evento':
+                    pendientes.append(dato)
+                    if limite is None:
+                        limite = time.monotonic() + self.intervalo
+                    if len(pendientes) >= self.tamano_lote:
+                        self._escribir_lote(f, pendientes)
+                        limite = None
+                    continue
+
+                limite = None
+
+                self._escribir_lote(f, pendientes)
+                if tipo == 'snapshot':
+                    estado = pickle.loads(dato)
+                    estado['desplazamiento'] = f.tell()
+                    self._escribir_snapshot(estado)
+                elif tipo == 'vaciar':
+                    dato.set()
+                elif tipo == 'cerrar':
+                    break
+
+    def _escribir_lote(self, f, pendientes):
+        """Añade los eventos pendientes al diario y fuerza su escritura"""
+        if not pendientes:
+            return
+        f.write(b''.join(self._serializar(evento) for evento in pendientes))
+        f.flush()
+        os.fsync(f.fileno())
+        pendientes.clear()
+
+    def _escribir_snapshot(self, estado):
+        """Sustituye el snapshot de forma atómica"""
+        temporal = self.ruta_snapshot + '.tmp'
+        with open(temporal, 'wb') as f:
+            pickle.dump(estado, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_snapshot)
+
+    @staticmethod
+    def _serializar(evento):
+        return (json.dumps(evento, ensure_ascii=False) + '\n').encode('utf-8')
+
+class AlmacenMemoria(AlmacenProgreso):
+    """Almacén sin persistencia, para usos sin estado en disco"""
+
+    def __init__(self):
+        self.historial = []
+
+    def cargar(self):
+        return None, []
+
+    def registrar(self, evento):
+        if evento['tipo'] == 'test':
+            self.historial.append(evento['registro'])
+
+    def leer_historial(self):
+        return iter(self.historial)
+
+    def ultimos_tests(self, n):
+        return self.historial[-n:] if n > 0 else []
+
+    def numero_tests(self):
+        return len(self.historial)
+
+    def mejores_notas(self):
+        mejores = {}
+        for registro in self.historial:
+            tema_num = registro['tema']
+            if registro['nota'] > mejores.get(tema_num, 0):
+                mejores[tema_num] = registro['nota']
+        return mejores
+
+class AlmacenSQLite(AlmacenProgreso):
+    """Almacén SQLite compartido por todos los estudiantes de un grupo
+
+    Cada instancia trabaja con un solo estudiante; las consultas del
+    historial van indexadas por (estudiante, tema, fecha) y nunca cargan los
+    datos del resto del grupo.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS estudiantes (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL UNIQUE,
+            notas TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS progreso (
+            estudiante_id INTEGER NOT NULL REFERENCES estudiantes(id),
+            tema INTEGER NOT NULL,
+            estudiado INTEGER NOT NULL DEFAULT 0,
+            horas_estudio REAL NOT NULL DEFAULT 0,
+            tests_completados INTEGER NOT NULL DEFAULT 0,
+            mejor_nota REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (estudiante_id, tema)
+        );
+        CREATE TABLE IF NOT EXISTS historial_tests (
+            id INTEGER PRIMARY KEY,
+            estudiante_id INTEGER NOT NULL REFERENCES estudiantes(id),
+            tema INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            preguntas_totales INTEGER NOT NULL,
+            correctas INTEGER NOT NULL,
+            nota REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS repaso (
+            estudiante_id INTEGER NOT NULL REFERENCES estudiantes(id),
+            tema INTEGER NOT NULL,
+            clave INTEGER NOT NULL,
+            repeticiones INTEGER NOT NULL,
+            intervalo INTEGER NOT NULL,
+            facilidad REAL NOT NULL,
+            vence REAL NOT NULL,
+            PRIMARY KEY (estudiante_id, tema, clave)
+        );
+        CREATE TABLE IF NOT EXISTS respuestas (
+            id INTEGER PRIMARY KEY,
+            estudiante_id INTEGER NOT NULL REFERENCES estudiantes(id),
+            tema INTEGER NOT NULL,
+            clave INTEGER NOT NULL,
+            correcta INTEGER NOT NULL,
+            fecha TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS items_irt (
+            tema INTEGER NOT NULL,
+            clave INTEGER NOT NULL,
+            discriminacion REAL NOT NULL,
+            dificultad REAL NOT NULL,
+            respuestas INTEGER NOT NULL,
+            PRIMARY KEY (tema, clave)
+        );
+        CREATE INDEX IF NOT EXISTS idx_historial_estudiante_tema_fecha
+            ON historial_tests (estudiante_id, tema, fecha);
+        CREATE INDEX IF NOT EXISTS idx_historial_estudiante_fecha
+            ON historial_tests (estudiante_id, fecha);
+    """
+
+    def __init__(self, ruta='progreso_biocel.db', estudiante='local'):
+        self.ruta = ruta
+        self.estudiante = estudiante
+        # Las sesiones del servidor lo usan desde los hilos del executor, de
+        # una en una (cada sesión espera a que termine su operación)
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(self.ESQUEMA)
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT OR IGNORE INTO estudiantes (nombre) VALUES (?)",
+                (estudiante,))
+        self.estudiante_id = self.conexion.execute(
+            "SELECT id FROM estudiantes WHERE nombre = ?",
+            (estudiante,)).fetchone()[0]
+
+    def cargar(self):
+        filas = self.conexion.execute(
+            "SELECT tema, estudiado, horas_estudio, tests_completados, mejor_nota "
+            "FROM progreso WHERE estudiante_id = ?", (self.estudiante_id,)).fetchall()
+        filas_repaso = self.conexion.execute(
+            "SELECT tema, clave, repeticiones, intervalo, facilidad, vence "
+            "FROM repaso WHERE estudiante_id = ?", (self.estudiante_id,)).fetchall()
+        if not filas and not filas_repaso:
+            return None, []
+
+        progreso = {}
+        for tema, estudiado, horas, tests, mejor in filas:
+            progreso[tema] = {
+                'estudiado': bool(estudiado),
+                'horas_estudio': horas,
+                'tests_completados': tests,
+                'mejor_nota': mejor
+            }
+        repaso = {}
+        for tema, clave, *estado in filas_repaso:
+            repaso.setdefault(tema, {})[clave] = estado
+        notas = self.conexion.execute(
+            "SELECT notas FROM estudiantes WHERE id = ?",
+            (self.estudiante_id,)).fetchone()[0]
+        return {
+            'progreso': progreso,
+            'notas': json.loads(notas),
+            'repaso': repaso,
+            'estadisticas': self._estadisticas()
+        }, []
+
+    def _estadisticas(self):
+        """Agregados del historial calculados en la base de datos
+
+        Una sola consulta da por tema el número de tests, la media, la
+        mejor y la última nota, y la suma de cuadrados de las desviaciones
+        respecto a la media del tema (sin restar dos sumas grandes, que
+        pierde precisión). Los temas se combinan con la fórmula de Chan.
+        """
+        estadisticas = {'tests': 0, 'media': 0.0, 'm2': 0.0, 'por_tema': {},
+                        'recientes': self.ultimos_tests(EstadisticasProgreso.CAPACIDAD_RECIENTES)}
+        filas = self.conexion.execute("""
+            WITH notas AS (
+                SELECT tema, nota,
+                       AVG(nota) OVER (PARTITION BY tema) AS media,
+                       ROW_NUMBER() OVER (PARTITION BY tema ORDER BY fecha DESC, id DESC) AS orden
+                FROM historial_tests WHERE estudiante_id = ?)
+            SELECT tema, COUNT(*), AVG(nota), MAX(nota),
+                   MAX(CASE WHEN orden = 1 THEN nota END),
+                   SUM((nota - media) * (nota - media))
+            FROM notas GROUP BY tema""", (self.estudiante_id,)).fetchall()
+        for tema, n, media, mejor, ultima, m2 in filas:
+            estadisticas['por_tema'][tema] = [n, media, mejor, ultima]
+            total = estadisticas['tests'] + n
+            delta = media - estadisticas['media']
+            estadisticas['m2'] += m2 + delta * delta * estadisticas['tests'] * n / total
+            estadisticas['media'] += delta * n / total
+            estadisticas['tests'] = total
+        return estadisticas
+
+    def registrar(self, evento):
+        tipo = evento['tipo']
+        with self.conexion:
+            if tipo == 'estudiado':
+                self._actualizar_progreso(evento['tema'], "estudiado = 1")
+            elif tipo == 'test':
+                registro = evento['registro']
+                self.conexion.execute(
+                    "INSERT INTO historial_tests (estudiante_id, tema, fecha, "
+                    "preguntas_totales, correctas, nota) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.estudiante_id, registro['tema'], registro['fecha'],
+                     registro['preguntas_totales'], registro['correctas'],
+                     registro['nota']))
+                self._actualizar_progreso(registro['tema'],
+                                          "tests_completados = tests_completados + 1")
+            elif tipo == 'mejor_nota':
+                self._actualizar_progreso(evento['tema'], "mejor_nota = ?",
+                                          (evento['nota'],))
+            elif tipo == 'repaso':
+                self.conexion.execute(
+                    "INSERT OR REPLACE INTO repaso (estudiante_id, tema, clave, "
+                    "repeticiones, intervalo, facilidad, vence) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.estudiante_id, evento['tema'], evento['clave'],
+                     *evento['estado']))
+                self.conexion.execute(
+                    "INSERT INTO respuestas (estudiante_id, tema, clave, correcta, fecha) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.estudiante_id, evento['tema'], evento['clave'],
+                     int(evento['correcta']), evento['fecha']))
+
+    def _actualizar_progreso(self, tema_num, asignacion, parametros=()):
+        """Crea la fila del tema si no existe y aplica la asignación"""
+        self.conexion.execute(
+            "INSERT OR IGNORE INTO progreso (estudiante_id, tema) VALUES (?, ?)",
+            (self.estudiante_id, tema_num))
+        self.conexion.execute(
+            f"UPDATE progreso SET {asignacion} WHERE estudiante_id = ? AND tema = ?",
+            tuple(parametros) + (self.estudiante_id, tema_num))
+
+    def compactar(self, estado):
+        with self.conexion:
+            for tema_num, progreso in estado['progreso'].items():
+                self.conexion.execute(
+                    "INSERT OR REPLACE INTO progreso (estudiante_id, tema, estudiado, "
+                    "horas_estudio, tests_completados, mejor_nota) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.estudiante_id, tema_num, int(progreso['estudiado']),
+                     progreso['horas_estudio'], progreso['tests_completados'],
+                     progreso['mejor_nota']))
+            self.conexion.execute(
+                "UPDATE estudiantes SET notas = ? WHERE id = ?",
+                (json.dumps(estado['notas'], ensure_ascii=False), self.estudiante_id))
+            # El estado de repaso ya se guarda pregunta a pregunta en registrar
+
+    def registrar_grupo(self, estudiantes, registros):
+        """Guarda de una vez los tests de muchos estudiantes (corrección por lotes)"""
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR IGNORE INTO estudiantes (nombre) VALUES (?)",
+                ((nombre,) for nombre in estudiantes))
+            ids = dict(self.conexion.execute("SELECT nombre, id FROM estudiantes"))
+            self.conexion.executemany(
+                "INSERT INTO historial_tests (estudiante_id, tema, fecha, "
+                "preguntas_totales, correctas, nota) VALUES (?, ?, ?, ?, ?, ?)",
+                ((ids[nombre], r['tema'], r['fecha'], r['preguntas_totales'],
+                  r['correctas'], r['nota'])
+                 for nombre, r in zip(estudiantes, registros)))
+            self.conexion.executemany(
+                "INSERT OR IGNORE INTO progreso (estudiante_id, tema) VALUES (?, ?)",
+                ((ids[nombre], r['tema']) for nombre, r in zip(estudiantes, registros)))
+            self.conexion.executemany(
+                "UPDATE progreso SET tests_completados = tests_completados + 1, "
+                "mejor_nota = MAX(mejor_nota, ?) WHERE estudiante_id = ? AND tema = ?",
+                ((r['nota'], ids[nombre], r['tema'])
+                 for nombre, r in zip(estudiantes, registros)))
+
+    def respuestas_grupo(self):
+        """Registro de respuestas de todo el grupo: (estudiante, tema, clave, acierto)"""
+        return self.conexion.execute(
+            "SELECT estudiante_id, tema, clave, correcta FROM respuestas").fetchall()
+
+    def notas_medias_grupo(self):
+        """Devuelve {estudiante: nota media en historial_tests}"""
+        return dict(self.conexion.execute(
+            "SELECT estudiante_id, AVG(nota) FROM historial_tests GROUP BY estudiante_id"))
+
+    def guardar_parametros_irt(self, parametros):
+        """Sustituye la calibración: {(tema, clave): (a, b, respuestas)}"""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM items_irt")
+            self.conexion.executemany(
+                "INSERT INTO items_irt (tema, clave, discriminacion, dificultad, "
+                "respuestas) VALUES (?, ?, ?, ?, ?)",
+                ((tema, clave, a, b, n)
+                 for (tema, clave), (a, b, n) in parametros.items()))
+
+    def parametros_irt(self):
+        return {(tema, clave): (a, b) for tema, clave, a, b in self.conexion.execute(
+            "SELECT tema, clave, discriminacion, dificultad FROM items_irt")}
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def leer_historial(self):
+        cursor = self.conexion.execute(
+            "SELECT fecha, tema, preguntas_totales, correctas, nota "
+            "FROM historial_tests WHERE estudiante_id = ? ORDER BY fecha, id",
+            (self.estudiante_id,))
+        for fila in cursor:
+            yield self._registro(fila)
+
+    def ultimos_tests(self, n):
+        filas = self.conexion.execute(
+            "SELECT fecha, tema, preguntas_totales, correctas, nota "
+            "FROM historial_tests WHERE estudiante_id = ? "
+            "ORDER BY fecha DESC, id DESC LIMIT ?",
+            (self.estudiante_id, n)).fetchall()
+        return [self._registro(fila) for fila in reversed(filas)]
+
+    def numero_tests(self):
+        return self.conexion.execute(
+            "SELECT COUNT(*) FROM historial_tests WHERE estudiante_id = ?",
+            (self.estudiante_id,)).fetchone()[0]
+
+    def mejores_notas(self):
+        return dict(self.conexion.execute(
+            "SELECT tema, MAX(nota) FROM historial_tests "
+            "WHERE estudiante_id = ? GROUP BY tema",
+            (self.estudiante_id,)))
+
+    @staticmethod
+    def _registro(fila):
+        fecha, tema, preguntas_totales, correctas, nota = fila
+        return {
+            'fecha': fecha,
+            'tema': tema,
+            'preguntas_totales': preguntas_totales,
+            'correctas': correctas,
+            'nota': nota
+        }
+
+# ===========================================================================
+# CONTENIDO PRECOMPILADO
+# ===========================================================================
+
+RUTA_CONTENIDO = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'contenido_biocel.bin')
+# Preguntas importadas de bancos externos (mismo formato, ver --importar)
+RUTA_BANCO = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'preguntas_biocel.bin')
+# Caché de las preguntas generadas a partir de los conceptos clave
+RUTA_GENERADAS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'preguntas_generadas_biocel.pkl')
+
+class TemarioCompilado:
+    """Snapshot binario del temario, versionado y con sumas de comprobación
+
+    Estructura del archivo:
+      cabecera  MAGIA, versión de formato, número de temas, CRC32 del
+                índice y huella del código fuente que generó el contenido
+      índice    una entrada de tamaño fijo (número, desplazamiento,
+                longitud, CRC32) por tema, ordenada por número
+      registros un pickle por tema con su título, conceptos y preguntas
+
+    Abrirlo no recorre el índice: las búsquedas de un tema son binarias
+    sobre el mapa de memoria, y cada tema se lee y se comprueba su CRC la
+    primera vez que se usa. Así el arranque no crece con el temario.
+    """
+
+    MAGIA = b"BIOCELC\x00"
+    FORMATO = 3
+    CABECERA = struct.Struct("<8sHII64s")
+    ENTRADA = struct.Struct("<iQII")
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.archivo = open(ruta, 'rb')
+        self.mapa = None
+        try:
+            self.mapa = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            magia, formato, cantidad, crc, origen = self.CABECERA.unpack_from(self.mapa, 0)
+            if magia != self.MAGIA or formato != self.FORMATO:
+                raise ValueError("formato de contenido desconocido")
+            self.inicio_indice = self.CABECERA.size
+            self.base = self.inicio_indice + cantidad * self.ENTRADA.size
+            if zlib.crc32(self.mapa[self.inicio_indice:self.base]) != crc:
+                raise ValueError("índice del contenido dañado")
+        except (struct.error, ValueError):
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un contenido compilado válido")
+        except OSError:
+            self.cerrar()
+            raise
+        self.cantidad = cantidad
+        self.origen = origen.rstrip(b"\x00").decode('ascii')
+
+    @staticmethod
+    def huella_origen():
+        """Identifica la versión del código que define el contenido
+
+        Es la huella del contenido del archivo (huella_codigo), no de su
+        fecha: un checkout o una copia no invalidan el snapshot, y cualquier
+        cambio en el código sí.
+        """
+        return huella_codigo()
+
+    @classmethod
+    def compilar(cls, temas, ruta, origen=None):
+        """Escribe el snapshot de un diccionario de temas
+
+        Los registros se escriben según se serializan y el índice se
+        rellena al final, así que `temas` puede construir cada tema al
+        pedirlo y solo hay uno en memoria a la vez.
+        """
+        origen = origen if origen is not None else cls.huella_origen()
+        numeros = sorted(temas)
+        indice = bytearray()
+        desplazamiento = 0
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            f.seek(cls.CABECERA.size + len(numeros) * cls.ENTRADA.size)
+            for numero in numeros:
+                tema = temas[numero]
+                datos = pickle.dumps((tema.numero, tema.titulo, tema.contenido, tema.conceptos_clave,
+                                      BancoPreguntas.desde(tema.preguntas).columnas()),
+                                     protocol=pickle.HIGHEST_PROTOCOL)
+                indice += cls.ENTRADA.pack(numero, desplazamiento, len(datos), zlib.crc32(datos))
+                f.write(datos)
+                desplazamiento += len(datos)
+            f.seek(0)
+            f.write(cls.CABECERA.pack(cls.MAGIA, cls.FORMATO, len(numeros),
+                                      zlib.crc32(indice), origen.encode('ascii')))
+            f.write(indice)
+        os.replace(temporal, ruta)
+
+    def entrada(self, posicion):
+        """Entrada del índice en la posición dada"""
+        return self.ENTRADA.unpack_from(self.mapa, self.inicio_indice + posicion * self.ENTRADA.size)
+
+    def buscar(self, numero):
+        """Entrada del índice de un tema (búsqueda binaria) o None"""
+        bajo, alto = 0, self.cantidad
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            entrada = self.entrada(medio)
+            if entrada[0] < numero:
+                bajo = medio + 1
+            elif entrada[0] > numero:
+                alto = medio
+            else:
+                return entrada
+        return None
+
+    def numeros(self):
+        """Itera los números de tema en orden"""
+        for posicion in range(self.cantidad):
+            yield self.entrada(posicion)[0]
+
+    def leer_tema(self, numero):
+        """Lee y verifica un tema del mapa de memoria"""
+        entrada = self.buscar(numero)
+        if entrada is None:
+            raise KeyError(numero)
+        _, desplazamiento, tamano, crc = entrada
+        inicio = self.base + desplazamiento
+        datos = self.mapa[inicio:inicio + tamano]
+        if zlib.crc32(datos) != crc:
+            raise ValueError(f"el tema {numero} del contenido compilado está dañado")
+        numero, titulo, contenido, conceptos, preguntas = pickle.loads(datos)
+        return Tema(numero=numero, titulo=titulo, contenido=contenido,
+                    conceptos_clave=conceptos,
+                    preguntas=BancoPreguntas.desde_columnas(preguntas))
+
+    def cerrar(self):
+        if self.mapa is not None:
+            self.mapa.close()
+            self.mapa = None
+        self.archivo.close()
+
+class TemarioPerezoso(MutableMapping):
+    """Diccionario de temas que carga cada tema la primera vez que se usa
+
+    Los temas añadidos o eliminados en memoria se guardan aparte, sin
+    modificar el contenido compilado. Con un banco de preguntas importadas,
+    sus preguntas se añaden a las del tema al cargarlo. Si el registro de un
+    tema está dañado, se usa el tema que construye `respaldo` (el temario
+    definido en el código), que solo se llama la primera vez que hace falta.
+    """
+
+    def __init__(self, compilado, banco=None, respaldo=None):
+        self.compilado = compilado
+        self.banco = banco
+        self.respaldo = respaldo
+        self.temas_respaldo = None
+        self.cargados = {}
+        self.eliminados = set()
+
+    def __getitem__(self, numero):
+        tema = self.cargados.get(numero)
+        if tema is None:
+            if numero in self.eliminados or not isinstance(numero, int):
+                raise KeyError(numero)
+            try:
+                tema = self.compilado.leer_tema(numero)
+            except ValueError:
+                if self.respaldo is None:
+                    raise
+                if self.temas_respaldo is None:
+                    self.temas_respaldo = self.respaldo()
+                tema = self.temas_respaldo[numero]
+            if self.banco is not None and self.banco.buscar(numero) is not None:
+                tema.preguntas.extender(self.banco.leer_tema(numero).preguntas)
+            self.cargados[numero] = tema
+        return tema
+
+    def __setitem__(self, numero, tema):
+        self.cargados[numero] = tema
+        self.eliminados.discard(numero)
+
+    def __delitem__(self, numero):
+        if numero not in self:
+            raise KeyError(numero)
+        self.cargados.pop(numero, None)
+        self.eliminados.add(numero)
+
+    def __contains__(self, numero):
+        if numero in self.cargados:
+            return True
+        return (isinstance(numero, int) and numero not in self.eliminados
+                and self.compilado.buscar(numero) is not None)
+
+    def __iter__(self):
+        numeros = set(self.compilado.numeros()) - self.eliminados
+        numeros.update(self.cargados)
+        return iter(sorted(numeros))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
 class SistemaEstudio:
     """Sistema principal de estudio organizado por temas"""
     
-    def __init__(self):
+    # Eventos entre snapshots antes de compactar el almacén
+    UMBRAL_COMPACTACION = 500
+    
+    def __init__(self, almacen=None, ruta_contenido=RUTA_CONTENIDO, temas=None,
+                 ruta_banco=RUTA_BANCO, ruta_generadas=RUTA_GENERADAS):
         self.temas = {}
-        self.progreso = {}
-        self.historial_tests = []
+        self.progreso = defaultdict(progreso_inicial)
         self.notas = {}
-        self.cargar_temario()
+        self.almacen = almacen or DiarioProgreso()
+        self.eventos_sin_compactar = 0
+        self.indice = None
+        self.temas_modificados = set()
+        self.repaso = PlanificadorRepaso()
+        self.estadisticas = EstadisticasProgreso()
+        self.calibracion = None
+        # Cambian con cada modificación; las vistas paginadas los usan para su caché
+        self.version_temas = 0
+        self.version_progreso = 0
+        if temas is not None:
+            # Contenido compartido con otras sesiones: no se copia
+            self.temas = temas
+        else:
+            if not self.cargar_temario_compilado(ruta_contenido, ruta_generadas):
+                self.cargar_temario()
+                self.agregar_preguntas_generadas(ruta_generadas)
+            self.cargar_banco_importado(ruta_banco)
         self.cargar_progreso()
     
+    def cargar_temario_compilado(self, ruta, ruta_generadas=RUTA_GENERADAS):
+        """Abre el contenido precompilado si existe y está al día
+        
+        Devuelve False si hay que construir el temario desde el código. Los
+        temas cuyo registro resulte dañado al leerlos se construyen también
+        desde el código, con las preguntas generadas de `ruta_generadas`.
+        """
+        if not ruta:
+            return False
+        try:
+            compilado = TemarioCompilado(ruta)
+        except (OSError, ValueError):
+            return False
+        if compilado.origen != TemarioCompilado.huella_origen():
+            compilado.cerrar()
+            return False
+        self.temas = TemarioPerezoso(
+            compilado, respaldo=lambda: SistemaEstudio(
+                AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                ruta_generadas=ruta_generadas).temas)
+        return True
+    
+    def agregar_preguntas_generadas(self, ruta):
+        """Añade a cada tema las preguntas generadas de sus conceptos clave
+        
+        El contenido compilado ya las incluye; aquí se usa la caché para no
+        regenerarlas en cada arranque.
+        """
+        if not ruta:
+            return
+        for numero, banco in CachePreguntasGeneradas(ruta).obtener(self.temas).items():
+            self.temas[numero].preguntas.extender(banco)
+    
+    def cargar_banco_importado(self, ruta):
+        """Añade a los temas las preguntas importadas con --importar, si las hay"""
+        if not ruta:
+            return
+        try:
+            banco = TemarioCompilado(ruta)
+        except (OSError, ValueError):
+            return
+        if isinstance(self.temas, TemarioPerezoso):
+            self.temas.banco = banco
+            return
+        for numero in banco.numeros():
+            if numero in self.temas:
+                self.temas[numero].preguntas.extender(banco.leer_tema(numero).preguntas)
+        banco.cerrar()
+    
     def cargar_temario(self):
         """Carga el temario completo basado en el PDF"""
         
@@ -337,6 +1475,8 @@ class SistemaEstudio:
         
         # Cargar preguntas para cada tema
         self.cargar_preguntas()
+        for tema in self.temas.values():
+            tema.preguntas = BancoPreguntas.desde(tema.preguntas)
     
     def cargar_preguntas(self):
         """Carga preguntas de test para cada tema"""
@@ -508,316 +1648,3436 @@ class SistemaEstudio:
             }
         ]
     
+    def actualizar_tema(self, tema):
+        """Añade o sustituye un tema y marca su contenido como modificado"""
+        tema.preguntas = BancoPreguntas.desde(tema.preguntas)
+        self.temas[tema.numero] = tema
+        self.temas_modificados.add(tema.numero)
+        self.progreso.setdefault(tema.numero, progreso_inicial())
+        self.repaso.descartar_cola(tema.numero)
+        self.version_temas += 1
+    
+    def buscar(self, consulta, limite=10):
+        """Busca en títulos, conceptos y preguntas de todos los temas
+        
+        El índice se construye en la primera búsqueda y después solo se
+        reindexan los temas modificados con actualizar_tema.
+        """
+        if self.indice is None:
+            self.indice = IndiceBusqueda()
+            self.temas_modificados = set(self.temas.keys())
+        for tema_num in self.temas_modificados:
+            if tema_num in self.temas:
+                self.indice.indexar_tema(self.temas[tema_num])
+            else:
+                self.indice.eliminar_tema(tema_num)
+        self.temas_modificados.clear()
+        return self.indice.buscar(consulta, limite)
+    
     def cargar_progreso(self):
-        """Carga el progreso guardado del estudiante"""
-        try:
-            with open('progreso_biocel.pkl', 'rb') as f:
-                data = pickle.load(f)
-                self.progreso = data.get('progreso', {})
-                self.historial_tests = data.get('historial', [])
-                self.notas = data.get('notas', {})
-        except FileNotFoundError:
-            # Inicializar progreso si no existe
-            for tema_num in self.temas.keys():
-                self.progreso[tema_num] = {
-                    'estudiado': False,
-                    'horas_estudio': 0,
-                    'tests_completados': 0,
-                    'mejor_nota': 0
-                }
+        """Reconstruye el progreso a partir del snapshot y los eventos pendientes"""
+        with instrumentacion.tramo('progreso.cargar'):
+            self._cargar_progreso()
+    
+    def _cargar_progreso(self):
+        snapshot, eventos = self.almacen.cargar()
+        
+        # Los temas sin progreso guardado se inicializan al consultarlos
+        self.progreso = defaultdict(progreso_inicial)
+        if snapshot is not None:
+            self.progreso.update(snapshot.get('progreso', {}))
+            self.notas = snapshot.get('notas', {})
+        self.repaso = PlanificadorRepaso(snapshot.get('repaso') if snapshot else None)
+        agregados = snapshot.get('estadisticas') if snapshot else None
+        self.estadisticas = (EstadisticasProgreso.desde_dict(agregados) if agregados
+                             else EstadisticasProgreso())
+        
+        for evento in eventos:
+            self._aplicar_evento(evento)
+        self.eventos_sin_compactar = len(eventos)
+        
+        if snapshot is not None and agregados is None:
+            # Snapshot anterior a los agregados: se calculan una sola vez
+            self.estadisticas = EstadisticasProgreso.desde_historial(self.almacen.leer_historial())
+        self.estadisticas.temas_estudiados = sum(
+            1 for p in self.progreso.values() if p['estudiado'])
+        
+        self.almacen.iniciar()
     
     def guardar_progreso(self):
-        """Guarda el progreso del estudiante"""
-        data = {
-            'progreso': self.progreso,
-            'historial': self.historial_tests,
-            'notas': self.notas
-        }
-        with open('progreso_biocel.pkl', 'wb') as f:
-            pickle.dump(data, f)
-
-# ===========================================================================
-# INTERFAZ DE CONSOLA LIMPIA Y PROFESIONAL
-# ===========================================================================
-
-class InterfazEstudio:
-    """Interfaz de línea de comandos para el sistema de estudio"""
+        """Compacta el almacén y espera a que todo esté en disco"""
+        with instrumentacion.tramo('progreso.guardar'):
+            self.almacen.compactar(self._estado_snapshot())
+            self.eventos_sin_compactar = 0
+            self.almacen.vaciar()
     
-    def __init__(self):
-        self.sistema = SistemaEstudio()
-        self.menu_principal()
+    def ultimos_tests(self, n):
+        """Devuelve los n tests más recientes del estudiante"""
+        if n > EstadisticasProgreso.CAPACIDAD_RECIENTES:
+            return self.almacen.ultimos_tests(n)
+        return self.estadisticas.ultimos(n)
     
-    def limpiar_pantalla(self):
-        """Limpia la pantalla de forma multiplataforma"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+    def numero_tests(self):
+        """Número de tests en el historial del estudiante"""
+        return self.estadisticas.tests
     
-    def mostrar_encabezado(self, titulo):
-        """Muestra un encabezado limpio"""
-        self.limpiar_pantalla()
-        print("=" * 70)
-        print("""
-              ██████╗ ██╗ ██████╗  ██████╗███████╗██╗     
-              ██╔══██╗██║██╔═══██╗██╔════╝██╔════╝██║     
-              ██████╔╝██║██║   ██║██║     █████╗  ██║     
-              ██╔══██╗██║██║   ██║██║     ██╔══╝  ██║     
-              ██████╔╝██║╚██████╔╝╚██████╗███████╗███████╗
-              ╚═════╝ ╚═╝ ╚═════╝  ╚═════╝╚══════╝╚══════╝
-""")
-        print(f"{'SISTEMA DE ESTUDIO DE BIOLOGÍA CELULAR':^70}")
-        print(f"{'Grado en Biología - Curso 2025-2026 - Miguel M.G.':^70}")
-        print("=" * 70)
-        print(f"\n{titulo}\n")
-        print("-" * 70)
+    def mejores_notas(self):
+        """Devuelve la mejor nota obtenida en cada tema"""
+        return {tema: valores[2] for tema, valores in self.estadisticas.por_tema.items()}
     
-    def menu_principal(self):
-        """Menú principal del sistema"""
-        while True:
-            self.mostrar_encabezado("MENÚ PRINCIPAL")
-            
-            print("Opciones disponibles:")
-            print("1. Consultar temario completo")
-            print("2. Estudiar tema específico")
-            print("3. Realizar test por tema")
-            print("4. Ver progreso de estudio")
-            print("5. Resumen de conceptos clave")
-            print("6. Simulación de procesos celulares")
-            print("7. Salir del sistema")
-            print("-" * 70)
-            
-            opcion = input("\nSeleccione una opción (1-7): ").strip()
-            
-            if opcion == "1":
-                self.mostrar_temario()
-            elif opcion == "2":
-                self.estudiar_tema()
-            elif opcion == "3":
-                self.realizar_test()
-            elif opcion == "4":
-                self.ver_progreso()
-            elif opcion == "5":
-                self.resumen_conceptos()
-            elif opcion == "6":
-                self.simulacion_procesos()
-            elif opcion == "7":
-                print("\nGuardando progreso...")
-                self.sistema.guardar_progreso()
-                print("Sistema cerrado correctamente.")
-                break
-            else:
-                input("\nOpción no válida. Presione Enter para continuar...")
+    def marcar_estudiado(self, tema_num):
+        """Marca un tema como estudiado"""
+        self._registrar_evento({'tipo': 'estudiado', 'tema': tema_num})
     
-    def mostrar_temario(self):
-        """Muestra el temario completo organizado"""
-        self.mostrar_encabezado("TEMARIO COMPLETO")
+    def registrar_test(self, registro):
+        """Registra un test terminado y actualiza la mejor nota del tema"""
+        self._registrar_evento({'tipo': 'test', 'registro': registro})
         
-        print("Temas del curso de Biología Celular:")
-        print()
-        
-        for tema_num in sorted(self.sistema.temas.keys()):
-            tema = self.sistema.temas[tema_num]
-            estudiado = "✓" if self.sistema.progreso.get(tema_num, {}).get('estudiado', False) else " "
-            print(f"  [{estudiado}] TEMA {tema_num:2d}: {tema.titulo}")
+        tema_num = registro['tema']
+        if registro['nota'] > self.progreso[tema_num]['mejor_nota']:
+            self._registrar_evento({
+                'tipo': 'mejor_nota',
+                'tema': tema_num,
+                'nota': registro['nota']
+            })
+    
+    def preguntas_repaso(self, tema_num, cantidad=5):
+        """Índices de las preguntas del tema que antes toca repasar"""
+        return self.repaso.siguientes(self.temas[tema_num], cantidad)
+    
+    def responder_pregunta(self, tema_num, pregunta, correcta):
+        """Reprograma el repaso de una pregunta (por su índice) según el acierto"""
+        datos = self.temas[tema_num].preguntas[pregunta]
+        clave = clave_pregunta(datos['enunciado'], datos['opciones'])
+        estado = self.repaso.calcular(tema_num, clave, correcta, time.time())
+        self._registrar_evento({
+            'tipo': 'repaso',
+            'tema': tema_num,
+            'clave': clave,
+            'correcta': correcta,
+            'fecha': datetime.now().strftime("%Y-%m-%d %H:%M"),
+            'estado': estado
+        })
+    
+    def parametros_items(self, tema_num):
+        """Discriminación y dificultad 2PL de cada pregunta del tema
         
-        print("\n" + "-" * 70)
-        print("Leyenda: ✓ = Tema estudiado")
-        print("-" * 70)
+        La calibración se busca por clave_pregunta, así que sigue a cada
+        pregunta aunque cambie su posición en el banco. Las preguntas sin
+        calibrar usan discriminación 1 y la dificultad de su nivel declarado
+        (nivel_dificultad).
+        """
+        if self.calibracion is None:
+            self.calibracion = self.almacen.parametros_irt()
+        discriminacion, dificultad = [], []
+        for pregunta in self.temas[tema_num].preguntas:
+            nivel = pregunta.get('nivel_dificultad', PreguntaTest.nivel_dificultad)
+            clave = clave_pregunta(pregunta['enunciado'], pregunta['opciones'])
+            a, b = self.calibracion.get((tema_num, clave), (1.0, DIFICULTAD_NIVEL.get(nivel, 0.0)))
+            discriminacion.append(a)
+            dificultad.append(b)
+        return discriminacion, dificultad
+    
+    def _registrar_evento(self, evento):
+        """Aplica un evento al estado en memoria y lo envía al almacén"""
+        self._aplicar_evento(evento)
+        self.almacen.registrar(evento)
         
-        input("\nPresione Enter para volver al menú principal...")
+        self.eventos_sin_compactar += 1
+        if self.eventos_sin_compactar >= self.UMBRAL_COMPACTACION:
+            self.almacen.compactar(self._estado_snapshot())
+            self.eventos_sin_compactar = 0
     
-    def estudiar_tema(self):
-        """Permite estudiar un tema específico"""
-        self.mostrar_encabezado("ESTUDIAR TEMA ESPECÍFICO")
+    def _aplicar_evento(self, evento):
+        """Aplica un evento de progreso sobre el estado en memoria"""
+        tipo = evento['tipo']
         
-        print("Seleccione el número del tema que desea estudiar (1-20):")
-        print("0. Volver al menú principal")
-        print("-" * 70)
+        if tipo == 'test':
+            tema_num = evento['registro']['tema']
+        else:
+            tema_num = evento['tema']
+        progreso = self.progreso.setdefault(tema_num, progreso_inicial())
+        self.version_progreso += 1
         
-        try:
-            seleccion = int(input("\nTema: "))
-            
-            if seleccion == 0:
-                return
-            
-            if seleccion not in self.sistema.temas:
-                print(f"\nError: El tema {seleccion} no existe.")
-                input("Presione Enter para continuar...")
-                return
-            
-            tema = self.sistema.temas[seleccion]
-            
-            # Registrar inicio de estudio
-            if seleccion not in self.sistema.progreso:
-                self.sistema.progreso[seleccion] = {
-                    'estudiado': False,
-                    'horas_estudio': 0,
-                    'tests_completados': 0,
-                    'mejor_nota': 0
-                }
-            
-            self.mostrar_contenido_tema(tema)
+        if tipo == 'estudiado':
+            if not progreso['estudiado']:
+                self.estadisticas.temas_estudiados += 1
+            progreso['estudiado'] = True
+        elif tipo == 'test':
+            progreso['tests_completados'] += 1
+            self.estadisticas.registrar_test(evento['registro'])
+        elif tipo == 'mejor_nota':
+            progreso['mejor_nota'] = evento['nota']
+        elif tipo == 'repaso':
+            self.repaso.fijar(tema_num, evento['clave'], evento['estado'])
+    
+    def _estado_snapshot(self):
+        """Estado de tamaño constante que se guarda en el snapshot"""
+        return {
+            'progreso': dict(self.progreso),
+            'notas': self.notas,
+            'repaso': self.repaso.estados,
+            'estadisticas': self.estadisticas.a_dict()
+        }
+
+# ===========================================================================
+# ESTADÍSTICAS DE PROGRESO
+# ===========================================================================
+
+class EstadisticasProgreso:
+    """Agregados del historial de tests mantenidos de forma incremental
+
+    Cada test registrado actualiza en O(1) el número de tests, la media y
+    la varianza de las notas (algoritmo de Welford), y por tema el número
+    de tests, la media, la mejor y la última nota. Los últimos tests se
+    guardan en un búfer circular de tamaño fijo, así que la pantalla de
+    progreso no depende de la longitud del historial.
+    """
+
+    CAPACIDAD_RECIENTES = 20
+
+    def __init__(self):
+        self.tests = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.por_tema = {}      # tema → [tests, media, mejor, última]
+        self.recientes = deque(maxlen=self.CAPACIDAD_RECIENTES)
+        self.temas_estudiados = 0
+
+    def registrar_test(self, registro):
+        """Incorpora un test terminado"""
+        nota = registro['nota']
+        self.tests += 1
+        delta = nota - self.media
+        self.media += delta / self.tests
+        self.m2 += delta * (nota - self.media)
+        
+        tema = self.por_tema.setdefault(registro['tema'], [0, 0.0, 0.0, 0.0])
+        tema[0] += 1
+        tema[1] += (nota - tema[1]) / tema[0]
+        tema[2] = max(tema[2], nota)
+        tema[3] = nota
+        self.recientes.append(registro)
+
+    def varianza(self):
+        """Varianza muestral de todas las notas"""
+        return self.m2 / (self.tests - 1) if self.tests > 1 else 0.0
+
+    def ultimos(self, n):
+        """Los n tests más recientes, del más antiguo al más nuevo"""
+        if n <= 0:
+            return []
+        return list(self.recientes)[-n:]
+
+    def a_dict(self):
+        """Estado serializable para el snapshot"""
+        return {
+            'tests': self.tests,
+            'media': self.media,
+            'm2': self.m2,
+            'por_tema': self.por_tema,
+            'recientes': list(self.recientes)
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye los agregados guardados con a_dict"""
+        estadisticas = cls()
+        estadisticas.tests = datos['tests']
+        estadisticas.media = datos['media']
+        estadisticas.m2 = datos['m2']
+        estadisticas.por_tema = {tema: list(valores)
+                                 for tema, valores in datos['por_tema'].items()}
+        estadisticas.recientes.extend(datos['recientes'])
+        return estadisticas
+
+    @classmethod
+    def desde_historial(cls, registros):
+        """Calcula los agregados recorriendo un historial completo"""
+        estadisticas = cls()
+        for registro in registros:
+            estadisticas.registrar_test(registro)
+        return estadisticas
+
+# ===========================================================================
+# REPASO ESPACIADO
+# ===========================================================================
+
+class PlanificadorRepaso:
+    """Repetición espaciada (SM-2) de las preguntas de cada tema
+
+    Cada pregunta contestada guarda [repeticiones, intervalo en días,
+    facilidad, vencimiento] bajo su clave_pregunta, de modo que el estado
+    sigue a la pregunta aunque se inserten o reordenen otras en el banco.
+    Por tema se mantiene un montículo de (vencimiento, índice) que se
+    construye la primera vez que se pide un test; las preguntas nunca
+    vistas vencen en 0 y salen primero. Al reprogramar una pregunta se
+    añade una entrada nueva y la antigua se descarta al salir (su
+    vencimiento ya no coincide), así que elegir un test cuesta O(k log n)
+    y no recorre el banco de preguntas.
+    """
+
+    FACILIDAD_INICIAL = 2.5
+    FACILIDAD_MINIMA = 1.3
+    # Calidad SM-2 (0-5) que se asigna a un acierto y a un fallo
+    CALIDAD_ACIERTO = 4
+    CALIDAD_FALLO = 1
+    SEGUNDOS_DIA = 86400
+
+    def __init__(self, estados=None):
+        self.estados = estados or {}    # tema → {clave: [rep, intervalo, facilidad, vence]}
+        self.colas = {}                 # tema → montículo [(vence, índice)]
+        # Mientras exista la cola del tema: índice → clave y clave → [índices]
+        # (preguntas repetidas comparten clave, estado y reprogramación)
+        self.claves = {}
+        self.indices = {}
+
+    def vencimiento(self, tema_num, clave):
+        """Momento (epoch) en que toca repasar la pregunta; 0 si es nueva"""
+        estado = self.estados.get(tema_num, {}).get(clave)
+        return estado[3] if estado else 0.0
+
+    def _cola(self, tema):
+        """Montículo del tema, construido en la primera consulta"""
+        cola = self.colas.get(tema.numero)
+        total = len(tema.preguntas)
+        # Demasiadas entradas obsoletas: se reconstruye
+        if cola is None or len(cola) > 2 * total + 16:
+            if tema.numero not in self.claves:
+                claves = [clave_pregunta(p['enunciado'], p['opciones']) for p in tema.preguntas]
+                indices = {}
+                for i, clave in enumerate(claves):
+                    indices.setdefault(clave, []).append(i)
+                self.claves[tema.numero] = claves
+                self.indices[tema.numero] = indices
+            cola = [(self.vencimiento(tema.numero, clave), i)
+                    for i, clave in enumerate(self.claves[tema.numero])]
+            heapq.heapify(cola)
+            self.colas[tema.numero] = cola
+        return cola
+
+    def siguientes(self, tema, cantidad):
+        """Las `cantidad` preguntas con vencimiento más próximo (vencidas primero)"""
+        cola = self._cola(tema)
+        claves = self.claves[tema.numero]
+        elegidas = []
+        vistas = set()
+        while cola and len(elegidas) < cantidad:
+            vence, pregunta = heapq.heappop(cola)
+            if (pregunta in vistas or pregunta >= len(claves)
+                    or vence != self.vencimiento(tema.numero, claves[pregunta])):
+                continue
+            vistas.add(pregunta)
+            elegidas.append((vence, pregunta))
+        # Siguen en la cola hasta que se contesten
+        for entrada in elegidas:
+            heapq.heappush(cola, entrada)
+        return [pregunta for _, pregunta in elegidas]
+
+    def calcular(self, tema_num, clave, correcta, ahora):
+        """Nuevo estado SM-2 de una pregunta tras contestarla"""
+        estado = self.estados.get(tema_num, {}).get(clave)
+        repeticiones, intervalo, facilidad, _ = estado or (0, 0, self.FACILIDAD_INICIAL, 0.0)
+        calidad = self.CALIDAD_ACIERTO if correcta else self.CALIDAD_FALLO
+        
+        if calidad >= 3:
+            if repeticiones == 0:
+                intervalo = 1
+            elif repeticiones == 1:
+                intervalo = 6
+            else:
+                intervalo = round(intervalo * facilidad)
+            repeticiones += 1
+        else:
+            repeticiones = 0
+            intervalo = 1
+        
+        facilidad += 0.1 - (5 - calidad) * (0.08 + (5 - calidad) * 0.02)
+        facilidad = max(self.FACILIDAD_MINIMA, facilidad)
+        return [repeticiones, intervalo, facilidad, ahora + intervalo * self.SEGUNDOS_DIA]
+
+    def fijar(self, tema_num, clave, estado):
+        """Guarda el estado de una pregunta y la reprograma en su cola"""
+        self.estados.setdefault(tema_num, {})[clave] = list(estado)
+        cola = self.colas.get(tema_num)
+        if cola is not None:
+            for indice in self.indices[tema_num].get(clave, ()):
+                heapq.heappush(cola, (estado[3], indice))
+
+    def descartar_cola(self, tema_num):
+        """Olvida el montículo de un tema cuyas preguntas han cambiado"""
+        self.colas.pop(tema_num, None)
+        self.claves.pop(tema_num, None)
+        self.indices.pop(tema_num, None)
+
+# ===========================================================================
+# TEST ADAPTATIVO (TEORÍA DE RESPUESTA AL ÍTEM)
+# ===========================================================================
+
+# Dificultad inicial (escala logit) según el nivel declarado de la pregunta
+DIFICULTAD_NIVEL = {'facil': -1.0, 'medio': 0.0, 'dificil': 1.0}
+
+def _logistica(x):
+    """Función logística vectorizada y sin desbordamientos"""
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+class TestAdaptativo:
+    """Test adaptativo con el modelo logístico de dos parámetros (2PL)
+
+    La probabilidad de acertar la pregunta i con habilidad θ es
+    1 / (1 + exp(-a_i (θ - b_i))). La habilidad se estima por EAP sobre una
+    rejilla con prior normal estándar, y cada pregunta se elige por máxima
+    información de Fisher a² P (1 - P) en la estimación actual. El test
+    termina cuando el error típico baja del objetivo, cuando la nota
+    estimada se mueve menos de TOLERANCIA_NOTA en las últimas
+    VENTANA_ESTABLE respuestas o al llegar al máximo de preguntas. Una sola respuesta que apenas mueve la
+    nota (una pregunta poco informativa) no basta para darla por estable.
+    """
+
+    REJILLA = 81
+    MINIMO_PREGUNTAS = 3
+    # Cambio de la nota estimada (sobre 100) que se considera estable
+    TOLERANCIA_NOTA = 3.0
+    # Respuestas seguidas que deben cambiar la nota menos que la tolerancia
+    VENTANA_ESTABLE = 3
+
+    def __init__(self, discriminacion, dificultad, max_preguntas=10,
+                 error_objetivo=0.5):
+        if np is None:
+            raise RuntimeError("El test adaptativo requiere NumPy (pip install numpy)")
+        self.a = np.asarray(discriminacion, dtype=float)
+        self.b = np.asarray(dificultad, dtype=float)
+        self.max_preguntas = max_preguntas
+        self.error_objetivo = error_objetivo
+        self.thetas = np.linspace(-4.0, 4.0, self.REJILLA)
+        self.log_posterior = -0.5 * self.thetas ** 2
+        self.disponibles = np.ones(len(self.a), dtype=bool)
+        self.respondidas = []
+        self.notas = []
+        self._estimar()
+
+    def _estimar(self):
+        """Media y desviación típica de la posterior de θ"""
+        pesos = np.exp(self.log_posterior - self.log_posterior.max())
+        pesos /= pesos.sum()
+        self.theta = float(pesos @ self.thetas)
+        self.error = float(np.sqrt(pesos @ (self.thetas - self.theta) ** 2))
+        self.notas.append(self.nota_estimada())
+
+    def nota_estimada(self):
+        """Porcentaje de aciertos esperado en todas las preguntas del tema"""
+        return 100.0 * float(_logistica(self.a * (self.theta - self.b)).mean())
+
+    def siguiente(self):
+        """Índice de la pregunta más informativa, o None si el test ha terminado"""
+        if self.terminado():
+            return None
+        p = _logistica(self.a * (self.theta - self.b))
+        informacion = np.where(self.disponibles, self.a ** 2 * p * (1 - p), -1.0)
+        return int(np.argmax(informacion))
+
+    def responder(self, indice, correcta):
+        """Actualiza la posterior con la respuesta a la pregunta `indice`"""
+        p = _logistica(self.a[indice] * (self.thetas - self.b[indice]))
+        self.log_posterior += np.log(np.clip(p if correcta else 1 - p, 1e-12, None))
+        self.disponibles[indice] = False
+        self.respondidas.append((indice, bool(correcta)))
+        self._estimar()
+
+    def terminado(self):
+        """Comprueba los criterios de parada"""
+        hechas = len(self.respondidas)
+        if hechas >= self.max_preguntas or not self.disponibles.any():
+            return True
+        if hechas < self.MINIMO_PREGUNTAS:
+            return False
+        recientes = self.notas[-self.VENTANA_ESTABLE - 1:]
+        estable = (hechas >= self.VENTANA_ESTABLE
+                   and max(recientes) - min(recientes) < self.TOLERANCIA_NOTA)
+        return self.error <= self.error_objetivo or estable
+
+def calibrar_items(estudiantes, items, correctas, notas_previas=None,
+                   dificultad_inicial=None, iteraciones=30):
+    """Calibra discriminación y dificultad 2PL de todas las preguntas a la vez
+
+    Recibe el registro de respuestas como tres vectores paralelos (índice de
+    estudiante, índice de pregunta, acierto) y estima a la vez habilidades
+    y parámetros por máxima verosimilitud conjunta con priors suaves, con
+    pasos de Newton vectorizados (np.bincount) en lugar de bucles por
+    respuesta. notas_previas (media de historial_tests por estudiante, 0-100)
+    sirve de punto de partida para las habilidades.
+
+    Devuelve (discriminación, dificultad, respuestas por pregunta).
+    """
+    if np is None:
+        raise RuntimeError("La calibración requiere NumPy (pip install numpy)")
+    estudiantes = np.asarray(estudiantes, dtype=np.intp)
+    items = np.asarray(items, dtype=np.intp)
+    y = np.asarray(correctas, dtype=float)
+    n_estudiantes = int(estudiantes.max()) + 1 if len(estudiantes) else 0
+    n_items = int(items.max()) + 1 if len(items) else 0
+    if dificultad_inicial is not None:
+        n_items = max(n_items, len(dificultad_inicial))
+    
+    b0 = (np.zeros(n_items) if dificultad_inicial is None
+          else np.asarray(dificultad_inicial, dtype=float))
+    b = b0.copy()
+    log_a = np.zeros(n_items)
+    if notas_previas is not None:
+        proporcion = np.clip(np.asarray(notas_previas, dtype=float) / 100.0, 0.05, 0.95)
+        theta = np.log(proporcion / (1 - proporcion))
+    else:
+        theta = np.zeros(n_estudiantes)
+    
+    for _ in range(iteraciones):
+        # Habilidades (prior N(0, 1))
+        a = np.exp(log_a)[items]
+        p = _logistica(a * (theta[estudiantes] - b[items]))
+        pq = p * (1 - p)
+        gradiente = np.bincount(estudiantes, a * (y - p), n_estudiantes) - theta
+        hessiana = np.bincount(estudiantes, a * a * pq, n_estudiantes) + 1.0
+        theta += np.clip(gradiente / hessiana, -1.0, 1.0)
+        
+        # Dificultades (prior N(b0, 1))
+        p = _logistica(a * (theta[estudiantes] - b[items]))
+        pq = p * (1 - p)
+        gradiente = np.bincount(items, -a * (y - p), n_items) - (b - b0)
+        hessiana = np.bincount(items, a * a * pq, n_items) + 1.0
+        b += np.clip(gradiente / hessiana, -1.0, 1.0)
+        
+        # Discriminaciones en escala logarítmica (prior N(0, 0.5²))
+        p = _logistica(a * (theta[estudiantes] - b[items]))
+        pq = p * (1 - p)
+        z = a * (theta[estudiantes] - b[items])
+        gradiente = np.bincount(items, z * (y - p), n_items) - log_a / 0.25
+        hessiana = np.bincount(items, z * z * pq, n_items) + 1.0 / 0.25
+        log_a += np.clip(gradiente / hessiana, -0.5, 0.5)
+    
+    return np.exp(log_a), b, np.bincount(items, minlength=n_items)
+
+# ===========================================================================
+# BÚSQUEDA EN EL TEMARIO
+# ===========================================================================
+
+def normalizar(texto):
+    """Pasa a minúsculas y elimina tildes y diéresis"""
+    descompuesto = unicodedata.normalize('NFKD', texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+def tokenizar(texto):
+    """Divide un texto normalizado en términos (conserva '+' de Na+, K+...)"""
+    return re.findall(r"[a-z0-9]+\+?", normalizar(texto))
+
+class IndiceBusqueda:
+    """Índice invertido sobre títulos, conceptos clave y preguntas
+
+    Cada término apunta a los temas donde aparece y, dentro de cada tema,
+    a los campos concretos (concepto, enunciado, respuesta...). El vocabulario
+    se mantiene ordenado para resolver prefijos con bisect, y cada tema se
+    reindexa por separado solo si su contenido ha cambiado.
+    """
+
+    # Peso de cada campo al puntuar un tema
+    PESOS = {
+        'titulo': 5.0,
+        'concepto': 3.0,
+        'enunciado': 2.0,
+        'respuesta': 1.0,
+        'explicacion': 1.0
+    }
+
+    def __init__(self):
+        self.postings = {}          # término → {tema: [puntuación, [(campo, referencia)]]}
+        self.vocabulario = []       # términos ordenados, para prefijos
+        self.terminos_tema = {}     # tema → términos indexados de ese tema
+        self.huellas = {}           # tema → hash del contenido indexado
+        self.textos = {}            # tema → {(campo, referencia): texto original}
+
+    @staticmethod
+    def campos_tema(tema):
+        """Itera (campo, referencia, texto) de todo el contenido de un tema
+
+        De las opciones solo se indexa la correcta: las demás son
+        distractores, y en las preguntas generadas salen de otros temas.
+        """
+        yield 'titulo', 0, tema.titulo
+        for i, concepto in enumerate(tema.conceptos_clave):
+            yield 'concepto', i, concepto
+        for i, pregunta in enumerate(tema.preguntas):
+            yield 'enunciado', i, pregunta['enunciado']
+            yield 'respuesta', i, pregunta['opciones'][pregunta['respuesta']]
+            yield 'explicacion', i, pregunta['explicacion']
+
+    @classmethod
+    def huella_tema(cls, tema):
+        """Hash del contenido indexable de un tema"""
+        h = hashlib.sha1()
+        for campo, referencia, texto in cls.campos_tema(tema):
+            h.update(f"{campo}\x00{referencia}\x00{texto}\x01".encode('utf-8'))
+        return h.hexdigest()
+
+    def indexar_tema(self, tema):
+        """Indexa (o reindexa) un tema; no hace nada si no ha cambiado"""
+        huella = self.huella_tema(tema)
+        if self.huellas.get(tema.numero) == huella:
+            return False
+        self.eliminar_tema(tema.numero)
+
+        textos = self.textos[tema.numero] = {}
+        entradas = {}
+        for campo, referencia, texto in self.campos_tema(tema):
+            textos[(campo, referencia)] = texto
+            for termino in set(tokenizar(texto)):
+                entrada = entradas.get(termino)
+                if entrada is None:
+                    entrada = entradas[termino] = [0.0, []]
+                entrada[0] += self.PESOS[campo]
+                entrada[1].append((campo, referencia))
+
+        nuevos = [t for t in entradas if t not in self.postings]
+        for termino, entrada in entradas.items():
+            self.postings.setdefault(termino, {})[tema.numero] = entrada
+        self._añadir_vocabulario(nuevos)
+
+        self.terminos_tema[tema.numero] = set(entradas)
+        self.huellas[tema.numero] = huella
+        return True
+
+    def _añadir_vocabulario(self, nuevos):
+        """Inserta términos nuevos manteniendo el vocabulario ordenado"""
+        if len(nuevos) > 64:
+            self.vocabulario = sorted(set(self.vocabulario).union(nuevos))
+        else:
+            for termino in nuevos:
+                bisect.insort(self.vocabulario, termino)
+
+    def eliminar_tema(self, tema_num):
+        """Quita del índice todas las entradas de un tema"""
+        for termino in self.terminos_tema.pop(tema_num, ()):
+            por_tema = self.postings[termino]
+            del por_tema[tema_num]
+            if not por_tema:
+                del self.postings[termino]
+                del self.vocabulario[bisect.bisect_left(self.vocabulario, termino)]
+        self.huellas.pop(tema_num, None)
+        self.textos.pop(tema_num, None)
+
+    def terminos_con_prefijo(self, prefijo):
+        """Términos del vocabulario que empiezan por el prefijo"""
+        inicio = bisect.bisect_left(self.vocabulario, prefijo)
+        fin = bisect.bisect_left(self.vocabulario, prefijo + "\uffff")
+        return self.vocabulario[inicio:fin]
+
+    def buscar(self, consulta, limite=10, max_coincidencias=5):
+        """Devuelve [(tema, puntuación, coincidencias)] ordenado por relevancia
+
+        Cada palabra de la consulta se trata como prefijo (salvo las que
+        terminan en '+', como Na+) y el tema debe contener todas ellas. Las
+        coincidencias son hasta `max_coincidencias` (campo, referencia, texto)
+        por tema, empezando por los campos de más peso.
+        """
+        palabras = tokenizar(consulta)
+        if not palabras:
+            return []
+
+        puntuaciones = None
+        terminos_usados = []
+        for palabra in palabras:
+            if palabra.endswith('+'):
+                terminos = [palabra] if palabra in self.postings else []
+            else:
+                terminos = self.terminos_con_prefijo(palabra)
+            terminos_usados.extend(terminos)
+
+            por_palabra = {}
+            for termino in terminos:
+                # Un término exacto puntúa más que uno que solo comparte prefijo
+                factor = 1.0 if termino == palabra else 0.5
+                for tema_num, (puntuacion, _) in self.postings[termino].items():
+                    por_palabra[tema_num] = por_palabra.get(tema_num, 0.0) + factor * puntuacion
+            if puntuaciones is None:
+                puntuaciones = por_palabra
+            else:
+                puntuaciones = {t: p + por_palabra[t] for t, p in puntuaciones.items()
+                                if t in por_palabra}
+            if not puntuaciones:
+                return []
+
+        if len(puntuaciones) > limite:
+            ranking = heapq.nsmallest(limite, puntuaciones.items(),
+                                      key=lambda par: (-par[1], par[0]))
+        else:
+            ranking = sorted(puntuaciones.items(), key=lambda par: (-par[1], par[0]))
+
+        # Las coincidencias concretas solo se reúnen para los temas mostrados
+        resultados = []
+        for tema_num, puntuacion in ranking:
+            campos = set()
+            for termino in terminos_usados:
+                entrada = self.postings[termino].get(tema_num)
+                if entrada is not None:
+                    campos.update(entrada[1])
+            textos = self.textos[tema_num]
+            ordenados = heapq.nsmallest(max_coincidencias, campos,
+                                        key=lambda c: (-self.PESOS[c[0]], str(c[1])))
+            resultados.append((tema_num, puntuacion,
+                               [(campo, ref, textos[(campo, ref)]) for campo, ref in ordenados]))
+        return resultados
+
+# ===========================================================================
+# EVALUACIÓN POR LOTES
+# ===========================================================================
+
+@dataclass
+class ResultadoLote:
+    """Resultado de corregir las hojas de respuestas de un grupo"""
+    tema: int
+    estudiantes: List[str]
+    correctas: "np.ndarray"      # aciertos por estudiante
+    notas: "np.ndarray"          # nota sobre 100 por estudiante
+    tasa_error: "np.ndarray"     # fracción de fallos por pregunta
+    registros: List[Dict]        # un registro de historial por estudiante
+
+def letras_opciones(pregunta):
+    """Letras con las que se puede responder una pregunta ('ABCD' con cuatro opciones)"""
+    return "".join(chr(65 + j) for j in range(len(pregunta['opciones'])))
+
+def letras_a_indices(filas):
+    """Convierte filas de letras (A-D) en una matriz de índices 0-based
+
+    Las respuestas vacías o fuera de rango quedan como -1 y cuentan como
+    fallo, igual que en ejecutar_test.
+    """
+    n_preguntas = max((len(fila) for fila in filas), default=0)
+    texto = "".join(fila.ljust(n_preguntas) for fila in filas).upper()
+    codigos = np.frombuffer(texto.encode('ascii', 'replace'), dtype=np.uint8)
+    indices = codigos.astype(np.int16).reshape(len(filas), n_preguntas) - 65
+    indices[(indices < 0) | (indices > 25)] = -1
+    return indices
+
+def leer_hojas_csv(ruta, tema):
+    """Lee un CSV estudiante × pregunta con una letra por celda
+
+    La cabecera es 'estudiante' seguida de los números de pregunta del tema
+    (1-based, en el orden de Tema.preguntas). Lanza ValueError si la
+    cabecera falta o tiene números que no son preguntas del tema.
+    """
+    total = len(tema.preguntas)
+    with open(ruta, newline='', encoding='utf-8') as f:
+        lector = csv.reader(f)
+        cabecera = next(lector, None)
+        if not cabecera or len(cabecera) < 2:
+            raise ValueError(f"{ruta} no tiene cabecera con los números de pregunta")
+        numeros = []
+        for columna, celda in enumerate(cabecera[1:], 2):
+            try:
+                numero = int(celda)
+            except ValueError:
+                numero = 0
+            if not 1 <= numero <= total:
+                raise ValueError(f"La columna {columna} de la cabecera ({celda!r}) no es "
+                                 f"un número de pregunta del tema {tema.numero} (1-{total})")
+            numeros.append(numero - 1)
+        estudiantes = []
+        filas = []
+        for fila in lector:
+            if not fila:
+                continue
+            estudiantes.append(fila[0])
+            filas.append("".join((c.strip() or " ")[0] for c in fila[1:]))
+    return estudiantes, numeros, letras_a_indices(filas)
+
+def corregir_lote(tema, estudiantes, respuestas, numeros=None, fecha=None):
+    """Corrige a la vez todas las hojas de respuestas de un tema
+
+    `respuestas` es una matriz (estudiantes × preguntas) de índices 0-based
+    y `numeros` indica a qué pregunta de `tema.preguntas` corresponde cada
+    columna (por defecto, todas en orden).
+    """
+    if np is None:
+        raise RuntimeError("La corrección por lotes requiere NumPy (pip install numpy)")
+    
+    if numeros is None:
+        numeros = range(len(tema.preguntas))
+    clave = np.array([tema.preguntas[i]['respuesta'] for i in numeros], dtype=np.int16)
+    respuestas = np.asarray(respuestas, dtype=np.int16)
+    if respuestas.shape[1] != len(clave):
+        raise ValueError(f"Las hojas tienen {respuestas.shape[1]} respuestas "
+                         f"y el test {len(clave)} preguntas")
+    
+    aciertos = respuestas == clave
+    correctas = aciertos.sum(axis=1)
+    notas = correctas * (100.0 / len(clave))
+    tasa_error = 1.0 - aciertos.mean(axis=0)
+    
+    fecha = fecha or datetime.now().strftime("%Y-%m-%d %H:%M")
+    registros = [
+        {
+            'fecha': fecha,
+            'tema': tema.numero,
+            'preguntas_totales': len(clave),
+            'correctas': c,
+            'nota': n
+        }
+        for c, n in zip(correctas.tolist(), notas.tolist())
+    ]
+    return ResultadoLote(tema.numero, list(estudiantes), correctas, notas,
+                         tasa_error, registros)
+
+def mostrar_resultado_lote(resultado, tema, numeros, segundos):
+    """Imprime un resumen de la corrección de un grupo"""
+    notas = resultado.notas
+    print("=" * 70)
+    print(f"CORRECCIÓN POR LOTES - TEMA {tema.numero}: {tema.titulo}")
+    print("=" * 70)
+    print(f"Estudiantes corregidos: {len(resultado.estudiantes)}")
+    print(f"Tiempo de corrección: {segundos * 1000:.2f} ms")
+    if len(notas):
+        print(f"Nota media: {notas.mean():.1f}/100  (desviación {notas.std():.1f})")
+        print(f"Aprobados (≥50): {(notas >= 50).sum()}")
+    print("-" * 70)
+    print("Tasa de error por pregunta:")
+    for numero, tasa in zip(numeros, resultado.tasa_error.tolist()):
+        enunciado = tema.preguntas[numero]['enunciado']
+        print(f"  P{numero + 1:<3d} {tasa * 100:5.1f}%  {enunciado[:52]}")
+
+# ===========================================================================
+# IMPORTACIÓN DE BANCOS DE PREGUNTAS
+# ===========================================================================
+
+MIN_OPCIONES = 2
+MAX_OPCIONES = 6     # letras A-F en el test (ver letras_opciones)
+# Líneas por bloque enviado a validar y bloques en vuelo por proceso
+TAMANO_BLOQUE_IMPORTACION = 5000
+BLOQUES_EN_VUELO = 2
+MAX_ERRORES_IMPORTACION = 100
+
+@dataclass
+class ResultadoImportacion:
+    """Resumen de una importación de preguntas"""
+    leidas: int = 0
+    importadas: int = 0
+    duplicadas: int = 0
+    rechazadas: int = 0
+    por_tema: Dict[int, int] = field(default_factory=dict)
+    errores: List[Tuple[str, int, str]] = field(default_factory=list)  # (ruta, línea, motivo)
+    segundos: float = 0.0
+
+# Todo lo que no es letra, cifra, '+' o separador; incluye las tildes ya
+# separadas por NFKD
+_NO_SIGNIFICATIVO = re.compile(r"[^\w+\x1f]+")
+
+def clave_pregunta(enunciado, opciones):
+    """Huella de una pregunta para detectar duplicados
+
+    Ignora mayúsculas, tildes, espacios y puntuación del enunciado y de las
+    opciones, pero no el orden de las opciones. Equivale a normalizar() con
+    una sola expresión regular, porque se calcula para cada línea importada.
+    Es un entero de 64 bits con signo, así que cabe en un INTEGER de SQLite.
+    """
+    texto = unicodedata.normalize('NFKD', "\x1f".join([enunciado, *opciones]).casefold())
+    texto = _NO_SIGNIFICATIVO.sub("", texto)
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(),
+                          'little', signed=True)
+
+def validar_pregunta(registro, temas_validos):
+    """Comprueba un registro importado y lo devuelve como (tema, pregunta)
+
+    Acepta las claves del temario ('enunciado', 'opciones', 'respuesta',
+    'explicacion', 'nivel_dificultad') más 'tema'. La respuesta puede ser
+    un índice 0-based o una letra. Lanza ValueError con el motivo.
+    """
+    if not isinstance(registro, dict):
+        raise ValueError("el registro no es un objeto")
+    tema = registro.get('tema')
+    if isinstance(tema, str):
+        tema = tema.strip()
+        tema = int(tema) if tema.lstrip('+-').isdigit() else None
+    elif isinstance(tema, float) and tema.is_integer():
+        tema = int(tema)
+    if isinstance(tema, bool) or not isinstance(tema, int):
+        raise ValueError(f"tema no válido: {registro.get('tema')!r}")
+    if tema not in temas_validos:
+        raise ValueError(f"el tema {tema} no existe")
+
+    enunciado = registro.get('enunciado')
+    if not isinstance(enunciado, str) or not enunciado.strip():
+        raise ValueError("falta el enunciado")
+    opciones = registro.get('opciones')
+    if not isinstance(opciones, list) or not all(isinstance(o, str) and o.strip() for o in opciones):
+        raise ValueError("las opciones deben ser una lista de textos no vacíos")
+    if not MIN_OPCIONES <= len(opciones) <= MAX_OPCIONES:
+        raise ValueError(f"{len(opciones)} opciones (se admiten de {MIN_OPCIONES} a {MAX_OPCIONES})")
+
+    respuesta = registro.get('respuesta')
+    if isinstance(respuesta, str):
+        letra = respuesta.strip().upper()
+        respuesta = (ord(letra) - 65 if len(letra) == 1 and letra.isalpha()
+                     else int(letra) if letra.isdigit() else None)
+    if isinstance(respuesta, bool) or not isinstance(respuesta, int) \
+            or not 0 <= respuesta < len(opciones):
+        raise ValueError(f"respuesta fuera de rango: {registro.get('respuesta')!r}")
+
+    nivel = registro.get('nivel_dificultad') or None
+    if nivel is not None and nivel not in BancoPreguntas.NIVELES:
+        raise ValueError(f"nivel de dificultad desconocido: {nivel!r}")
+
+    pregunta = {
+        'enunciado': enunciado.strip(),
+        'opciones': [o.strip() for o in opciones],
+        'respuesta': respuesta,
+        'explicacion': (registro.get('explicacion') or "").strip()
+    }
+    if nivel is not None:
+        pregunta['nivel_dificultad'] = nivel
+    return tema, pregunta
+
+def _fila_csv_a_registro(cabecera, fila):
+    """Convierte una fila del CSV en un registro como los de JSON-lines"""
+    registro = dict(zip(cabecera, fila))
+    registro['opciones'] = [registro[c] for c in cabecera
+                            if c.startswith('opcion_') and registro.get(c, "").strip()]
+    return registro
+
+_temas_validacion = frozenset()
+
+def _iniciar_validacion(temas_validos):
+    global _temas_validacion
+    _temas_validacion = temas_validos
+
+def _validar_bloque(argumentos):
+    """Valida un bloque de líneas (en un proceso del pool)
+
+    Devuelve las preguntas válidas como (línea, tema, clave, json) y los
+    errores como (línea, motivo). Las preguntas salen ya serializadas para
+    que el proceso principal solo tenga que escribirlas.
+    """
+    formato, cabecera, bloque = argumentos
+    validas = []
+    errores = []
+    for linea, dato in bloque:
+        try:
+            if formato == 'csv':
+                registro = _fila_csv_a_registro(cabecera, dato)
+            else:
+                try:
+                    registro = json.loads(dato)
+                except ValueError as e:
+                    raise ValueError(f"JSON no válido ({e.msg})")
+            tema, pregunta = validar_pregunta(registro, _temas_validacion)
+        except ValueError as e:
+            errores.append((linea, str(e)))
+            continue
+        validas.append((linea, tema, clave_pregunta(pregunta['enunciado'], pregunta['opciones']),
+                        json.dumps(pregunta, ensure_ascii=False)))
+    return validas, errores
+
+def _leer_bloques(ruta, tamano_bloque):
+    """Recorre un archivo de preguntas en bloques de (línea, dato)
+
+    Los .csv se leen con su cabecera (tema, enunciado, opcion_a, opcion_b...,
+    respuesta, explicacion, nivel_dificultad); el resto se trata como
+    JSON-lines, un objeto por línea.
+    """
+    with open(ruta, newline='', encoding='utf-8') as f:
+        if ruta.lower().endswith('.csv'):
+            lector = csv.reader(f)
+            cabecera = [c.strip().lower() for c in next(lector, [])]
+            formato = 'csv'
+            filas = ((lector.line_num, fila) for fila in lector if any(fila))
+        else:
+            cabecera = None
+            formato = 'jsonl'
+            filas = ((numero, linea) for numero, linea in enumerate(f, 1) if linea.strip())
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= tamano_bloque:
+                yield formato, cabecera, bloque
+                bloque = []
+        if bloque:
+            yield formato, cabecera, bloque
+
+class _BancosImportados(Mapping):
+    """Temas del archivo de banco, construidos uno a uno al compilarlo
+
+    Cada tema junta las preguntas que ya tenía el banco con las nuevas
+    guardadas en su archivo temporal, así que solo hay un tema en memoria.
+    """
+
+    def __init__(self, anterior, temporales):
+        self.anterior = anterior
+        self.temporales = temporales
+        self.numeros = set(temporales)
+        if anterior is not None:
+            self.numeros.update(anterior.numeros())
+
+    def __getitem__(self, numero):
+        if self.anterior is not None and self.anterior.buscar(numero) is not None:
+            banco = self.anterior.leer_tema(numero).preguntas
+        else:
+            banco = BancoPreguntas()
+        ruta = self.temporales.get(numero)
+        if ruta is not None:
+            with open(ruta, encoding='utf-8') as f:
+                for linea in f:
+                    banco.agregar(json.loads(linea))
+        return Tema(numero=numero, titulo="", contenido="", conceptos_clave=[], preguntas=banco)
+
+    def __iter__(self):
+        return iter(sorted(self.numeros))
+
+    def __len__(self):
+        return len(self.numeros)
+
+def importar_preguntas(rutas, temas, ruta_banco=RUTA_BANCO, procesos=None,
+                       tamano_bloque=TAMANO_BLOQUE_IMPORTACION):
+    """Importa archivos JSON-lines o CSV de preguntas al banco de preguntas
+
+    La lectura es en streaming: los bloques se validan en un pool de
+    procesos (en este proceso si `procesos` <= 1) con un número acotado de
+    bloques en vuelo, y las preguntas válidas se vuelcan a un temporal por
+    tema. Se rechazan las duplicadas entre sí y con las que ya hay en
+    `temas` o en el banco. Al final se reescribe `ruta_banco` conservando lo
+    importado antes, y SistemaEstudio lo añade a los temas al cargarlos.
+    Si el banco existente está dañado lanza ValueError sin tocarlo.
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacion()
+    temas_validos = frozenset(temas)
+    try:
+        anterior = TemarioCompilado(ruta_banco)
+    except FileNotFoundError:
+        anterior = None
+    except ValueError:
+        raise ValueError(f"el banco de preguntas {ruta_banco} está dañado; "
+                         f"restáurelo o bórrelo antes de importar")
+    vistas = {}
+    try:
+        for numero in temas_validos:
+            preguntas = list(temas[numero].preguntas)
+            if anterior is not None and anterior.buscar(numero) is not None:
+                preguntas += anterior.leer_tema(numero).preguntas
+            vistas[numero] = {clave_pregunta(p['enunciado'], p['opciones']) for p in preguntas}
+    except ValueError as e:
+        anterior.cerrar()
+        raise ValueError(f"{e}; restaure o borre {ruta_banco} antes de importar")
+    procesos = procesos if procesos is not None else os.cpu_count() or 1
+
+    directorio = tempfile.mkdtemp(prefix='biocel_importacion_')
+    temporales = {}
+    archivos = {}
+
+    def anotar(ruta, validas, errores):
+        resultado.leidas += len(validas) + len(errores)
+        for linea, tema, clave, pregunta in validas:
+            if clave in vistas[tema]:
+                resultado.duplicadas += 1
+                errores.append((linea, "pregunta duplicada"))
+                continue
+            vistas[tema].add(clave)
+            archivo = archivos.get(tema)
+            if archivo is None:
+                temporales[tema] = os.path.join(directorio, f"tema_{tema}.jsonl")
+                archivo = archivos[tema] = open(temporales[tema], 'w', encoding='utf-8')
+            archivo.write(pregunta + "\n")
+            resultado.importadas += 1
+            resultado.por_tema[tema] = resultado.por_tema.get(tema, 0) + 1
+        resultado.rechazadas += len(errores)
+        for linea, motivo in errores:
+            if len(resultado.errores) >= MAX_ERRORES_IMPORTACION:
+                break
+            resultado.errores.append((ruta, linea, motivo))
+
+    try:
+        if procesos <= 1:
+            _iniciar_validacion(temas_validos)
+            for ruta in rutas:
+                for bloque in _leer_bloques(ruta, tamano_bloque):
+                    anotar(ruta, *_validar_bloque(bloque))
+        else:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_validacion,
+                                     initargs=(temas_validos,)) as pool:
+                for ruta in rutas:
+                    pendientes = deque()
+                    for bloque in _leer_bloques(ruta, tamano_bloque):
+                        pendientes.append(pool.submit(_validar_bloque, bloque))
+                        if len(pendientes) >= procesos * BLOQUES_EN_VUELO:
+                            anotar(ruta, *pendientes.popleft().result())
+                    while pendientes:
+                        anotar(ruta, *pendientes.popleft().result())
+
+        for archivo in archivos.values():
+            archivo.close()
+        if temporales:
+            TemarioCompilado.compilar(_BancosImportados(anterior, temporales),
+                                      ruta_banco, origen="importado")
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+        if anterior is not None:
+            anterior.cerrar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+def mostrar_resultado_importacion(resultado, ruta_banco):
+    """Imprime el resumen de una importación"""
+    print("=" * 70)
+    print("IMPORTACIÓN DE PREGUNTAS")
+    print("=" * 70)
+    print(f"Registros leídos:  {resultado.leidas}")
+    print(f"Importados:        {resultado.importadas}")
+    print(f"Rechazados:        {resultado.rechazadas} ({resultado.duplicadas} duplicados)")
+    print(f"Tiempo:            {resultado.segundos:.2f} s")
+    if resultado.por_tema:
+        print(f"Banco actualizado: {ruta_banco}")
+        for tema, cantidad in sorted(resultado.por_tema.items()):
+            print(f"  Tema {tema:2d}: +{cantidad}")
+    if resultado.errores:
+        print("-" * 70)
+        for ruta, linea, motivo in resultado.errores:
+            print(f"  {os.path.basename(ruta)}:{linea}: {motivo}")
+        if resultado.rechazadas > len(resultado.errores):
+            print(f"  ... y {resultado.rechazadas - len(resultado.errores)} más")
+
+# ===========================================================================
+# PREGUNTAS GENERADAS A PARTIR DE LOS CONCEPTOS CLAVE
+# ===========================================================================
+
+# Cambiar la versión invalida la caché aunque los temas no cambien
+VERSION_GENERADOR = 1
+DISTRACTORES = 3
+# Palabras que no se usan como hueco en las preguntas de completar
+PALABRAS_VACIAS = frozenset((
+    "sobre", "entre", "desde", "hasta", "durante", "segun", "mediante", "hacia",
+    "otros", "otras", "tipos", "donde", "cuando", "tiene", "tienen"))
+
+def huella_tema(tema):
+    """Resumen del texto de un tema del que dependen sus preguntas generadas"""
+    texto = json.dumps([VERSION_GENERADOR, tema.titulo, tema.contenido, tema.conceptos_clave],
+                       ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+def huella_distractores(temas):
+    """Resumen de los conceptos de todos los temas, de donde salen los distractores"""
+    texto = json.dumps([[numero, temas[numero].conceptos_clave] for numero in sorted(temas)],
+                       ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+def _termino_y_descripcion(concepto):
+    """Separa 'Término: descripción'; sin dos puntos la descripción es None"""
+    termino, separador, descripcion = concepto.partition(":")
+    if not separador or not descripcion.strip():
+        return concepto.strip(), None
+    return termino.strip(), descripcion.strip()
+
+def _palabras_clave(texto):
+    """Palabras de un concepto que pueden dejarse en blanco (al menos 5 letras)"""
+    return [p for p in re.findall(r"\w[\w+-]*", texto)
+            if len(p) >= 5 and not p.isdigit() and normalizar(p) not in PALABRAS_VACIAS]
+
+def _distractores(generador, candidatos, correcta, excluidas, cantidad=DISTRACTORES):
+    """Elige respuestas incorrectas de otros temas, parecidas en longitud a la correcta"""
+    vistos = {normalizar(correcta)} | excluidas
+    parecidos = sorted(candidatos, key=lambda c: (abs(len(c) - len(correcta)), c))
+    elegidas = []
+    for candidato in generador.sample(parecidos[:cantidad * 6], min(len(parecidos), cantidad * 6)):
+        clave = normalizar(candidato)
+        if clave not in vistos:
+            vistos.add(clave)
+            elegidas.append(candidato)
+            if len(elegidas) == cantidad:
+                return elegidas
+    return None
+
+def _como_respuesta(palabra, correcta):
+    """Ajusta la mayúscula inicial de un distractor a la de la respuesta correcta"""
+    if palabra[1:2].isupper():    # siglas como ATPasa o NLS
+        return palabra
+    inicial = palabra[0].upper() if correcta[0].isupper() else palabra[0].lower()
+    return inicial + palabra[1:]
+
+def _pregunta(generador, enunciado, correcta, distractores, explicacion, nivel):
+    """Coloca la respuesta correcta en una posición al azar entre los distractores"""
+    opciones = list(distractores)
+    respuesta = generador.randint(0, len(opciones))
+    opciones.insert(respuesta, correcta)
+    return {'enunciado': enunciado, 'opciones': opciones, 'respuesta': respuesta,
+            'explicacion': explicacion, 'nivel_dificultad': nivel}
+
+def generar_preguntas(temas, numeros=None):
+    """Genera preguntas tipo test a partir de los conceptos clave de los temas
+
+    Por cada concepto 'Término: descripción' se pregunta qué término
+    corresponde a la descripción, y por cada concepto se hace una pregunta de
+    completar el hueco de su palabra más larga. Los distractores son
+    términos y palabras de los conceptos de otros temas. Devuelve
+    {tema: BancoPreguntas} para los temas de `numeros` (por defecto, todos);
+    el resultado de cada tema es determinista a partir de su texto.
+    """
+    terminos = defaultdict(list)
+    palabras = defaultdict(list)
+    for numero in temas:
+        for concepto in temas[numero].conceptos_clave:
+            termino, _ = _termino_y_descripcion(concepto)
+            if len(termino.split()) <= 4:
+                terminos[numero].append(termino)
+            palabras[numero].extend(_palabras_clave(concepto))
+
+    resultado = {}
+    for numero in (numeros if numeros is not None else list(temas)):
+        tema = temas[numero]
+        generador = random.Random(huella_tema(tema))
+        otros_terminos = [t for n, lista in terminos.items() if n != numero for t in lista]
+        otras_palabras = [p for n, lista in palabras.items() if n != numero for p in lista]
+        banco = BancoPreguntas()
+        for concepto in tema.conceptos_clave:
+            excluidas = {normalizar(p) for p in re.findall(r"\w[\w+-]*", concepto)}
+            explicacion = f"Concepto clave del tema {numero} ({tema.titulo}): {concepto}"
+
+            termino, descripcion = _termino_y_descripcion(concepto)
+            candidatas = _palabras_clave(concepto)
+            if descripcion is not None and len(termino.split()) <= 4:
+                distractores = _distractores(generador, otros_terminos, termino, excluidas)
+                if distractores:
+                    banco.agregar(_pregunta(
+                        generador,
+                        f"¿Qué concepto de «{tema.titulo}» corresponde a: {descripcion}?",
+                        termino, distractores, explicacion, 'facil'))
+                    # El hueco va en la descripción para no repetir la pregunta
+                    candidatas = _palabras_clave(descripcion)
+
+            if candidatas:
+                palabra = max(candidatas, key=len)
+                distractores = _distractores(generador, otras_palabras, palabra, excluidas)
+                if distractores:
+                    distractores = [_como_respuesta(d, palabra) for d in distractores]
+                    hueco = re.sub(rf"(?<!\w){re.escape(palabra)}(?![\w+-])", "_____", concepto, count=1)
+                    banco.agregar(_pregunta(
+                        generador,
+                        f"Complete el concepto de «{tema.titulo}»: {hueco}",
+                        palabra, distractores, explicacion, 'medio'))
+        resultado[numero] = banco
+    return resultado
+
+class CachePreguntasGeneradas:
+    """Preguntas generadas guardadas en disco junto a la huella de su tema
+
+    Solo se regeneran los temas cuyo texto ha cambiado desde la última vez,
+    todos a la vez para construir una sola vez los distractores. Como los
+    distractores salen de los conceptos de los demás temas, cambiar los
+    conceptos de uno regenera todos. Si el archivo no se puede escribir,
+    las preguntas se generan igualmente.
+    """
+
+    FORMATO = 1
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.entradas = None    # {tema: (huella, columnas del banco)}
+
+    def cargar(self):
+        try:
+            with open(self.ruta, 'rb') as f:
+                datos = pickle.load(f)
+            if datos.get('formato') == self.FORMATO:
+                return datos['temas']
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError):
+            pass
+        return {}
+
+    def guardar(self):
+        temporal = self.ruta + '.tmp'
+        try:
+            with open(temporal, 'wb') as f:
+                pickle.dump({'formato': self.FORMATO, 'temas': self.entradas}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self.ruta)
+        except OSError:
+            pass
+
+    def obtener(self, temas):
+        """Devuelve {tema: BancoPreguntas}, regenerando solo los temas cambiados"""
+        if self.entradas is None:
+            self.entradas = self.cargar()
+        distractores = huella_distractores(temas)
+        huellas = {numero: f"{huella_tema(temas[numero])}:{distractores}" for numero in temas}
+        cambiados = [n for n, huella in huellas.items()
+                     if self.entradas.get(n, (None,))[0] != huella]
+        sobrantes = set(self.entradas) - set(huellas)
+        for numero, banco in generar_preguntas(temas, cambiados).items():
+            self.entradas[numero] = (huellas[numero], banco.columnas())
+        for numero in sobrantes:
+            del self.entradas[numero]
+        if cambiados or sobrantes:
+            self.guardar()
+        return {n: BancoPreguntas.desde_columnas(self.entradas[n][1]) for n in huellas}
+
+# ===========================================================================
+# MOTORES DE SIMULACIÓN
+# ===========================================================================
+
+def resumen_estadistico(valores):
+    """Media, desviación, mínimo y máximo de un array"""
+    return {
+        'media': float(valores.mean()),
+        'desviacion': float(valores.std()),
+        'minimo': float(valores.min()),
+        'maximo': float(valores.max())
+    }
+
+class EnsambleBombaNaK:
+    """Conjunto de células con bomba Na+/K+ ATPasa simuladas a la vez
+
+    Cada variable es un array con un valor por célula, y los parámetros
+    (estequiometría y suelos de concentración) pueden ser escalares o
+    arrays por célula. Un ciclo de la bomba hace lo mismo que la simulación
+    original: si queda ATP, saca 3 Na+, mete 2 K+, gasta 1 ATP y aplica los
+    suelos de Na+ intracelular y K+ extracelular. Como los suelos son
+    monótonos, avanzar n ciclos tiene forma cerrada y cuesta lo mismo para
+    10 ciclos que para un millón.
+    """
+
+    VARIABLES = ('na_int', 'k_int', 'na_ext', 'k_ext', 'atp')
+
+    def __init__(self, n_celulas, na_int=10, k_int=140, na_ext=145, k_ext=4,
+                 atp=100, na_por_ciclo=3, k_por_ciclo=2, na_int_min=5, k_ext_min=2):
+        if np is None:
+            raise RuntimeError("La simulación de ensemble requiere NumPy (pip install numpy)")
+        forma = (n_celulas,)
+        self.n_celulas = n_celulas
+        self.na_int = np.broadcast_to(np.asarray(na_int, dtype=float), forma).copy()
+        self.k_int = np.broadcast_to(np.asarray(k_int, dtype=float), forma).copy()
+        self.na_ext = np.broadcast_to(np.asarray(na_ext, dtype=float), forma).copy()
+        self.k_ext = np.broadcast_to(np.asarray(k_ext, dtype=float), forma).copy()
+        self.atp = np.broadcast_to(np.asarray(atp, dtype=np.int64), forma).copy()
+        self.na_por_ciclo = np.asarray(na_por_ciclo, dtype=float)
+        self.k_por_ciclo = np.asarray(k_por_ciclo, dtype=float)
+        self.na_int_min = np.asarray(na_int_min, dtype=float)
+        self.k_ext_min = np.asarray(k_ext_min, dtype=float)
+        self.ciclo = 0
+
+    @classmethod
+    def con_variabilidad(cls, n_celulas, variacion=0.1, semilla=None, **parametros):
+        """Crea un ensemble con condiciones iniciales distintas en cada célula
+
+        Las concentraciones se sortean con una normal de coeficiente de
+        variación `variacion` alrededor de los valores por defecto, y el ATP
+        disponible con una Poisson.
+        """
+        if np is None:
+            raise RuntimeError("La simulación de ensemble requiere NumPy (pip install numpy)")
+        rng = np.random.default_rng(semilla)
+        base = {'na_int': 10, 'k_int': 140, 'na_ext': 145, 'k_ext': 4}
+        for nombre, valor in base.items():
+            valor = parametros.pop(nombre, valor)
+            sorteo = rng.normal(valor, abs(valor) * variacion, n_celulas)
+            parametros[nombre] = np.maximum(sorteo, 0.0)
+        parametros['atp'] = rng.poisson(parametros.pop('atp', 100), n_celulas)
+        return cls(n_celulas, **parametros)
+
+    def avanzar(self, ciclos):
+        """Avanza todas las células `ciclos` ciclos de la bomba"""
+        efectivos = np.minimum(self.atp, ciclos)  # el ATP limita los ciclos
+        activos = efectivos > 0
+
+        self.na_int = np.where(
+            activos,
+            np.maximum(self.na_int - self.na_por_ciclo * efectivos, self.na_int_min),
+            self.na_int)
+        self.k_int = self.k_int + self.k_por_ciclo * efectivos
+        self.na_ext = self.na_ext + self.na_por_ciclo * efectivos
+        self.k_ext = np.where(
+            activos,
+            np.maximum(self.k_ext - self.k_por_ciclo * efectivos, self.k_ext_min),
+            self.k_ext)
+        self.atp = self.atp - efectivos
+        self.ciclo += ciclos
+
+    def gradientes(self):
+        """Devuelve (gradiente Na+ ext/int, gradiente K+ int/ext) por célula"""
+        return self.na_ext / self.na_int, self.k_int / self.k_ext
+
+    def resumen(self):
+        """Estadísticas de cada variable sobre todas las células"""
+        return {nombre: resumen_estadistico(getattr(self, nombre))
+                for nombre in self.VARIABLES}
+
+    def simular(self, ciclos, fotogramas=5):
+        """Avanza `ciclos` ciclos y devuelve resúmenes en ciclos muestreados"""
+        marcas = sorted(set(int(round(ciclos * i / fotogramas))
+                            for i in range(1, fotogramas + 1)))
+        muestras = []
+        anterior = 0
+        for marca in marcas:
+            with instrumentacion.tramo('simulacion.na_k.fotograma'):
+                self.avanzar(marca - anterior)
+                anterior = marca
+                muestras.append((self.ciclo, self.resumen()))
+        return muestras
+
+    def potencial_reposo(self, **parametros):
+        """Potencial de reposo de cada célula (mV) según Goldman-Hodgkin-Katz"""
+        return potencial_ghk(self.k_int, self.k_ext, self.na_int, self.na_ext, **parametros)
+
+# Constantes físicas para los potenciales de equilibrio
+FARADAY = 96485.332       # C/mol
+CONSTANTE_GASES = 8.314462  # J/(mol·K)
+TEMPERATURA_CORPORAL = 310.15  # K (37 °C)
+
+def potencial_nernst(c_ext, c_int, valencia=1, temperatura=TEMPERATURA_CORPORAL):
+    """Potencial de equilibrio (mV) de un ion con las concentraciones dadas"""
+    rt_f = 1000.0 * CONSTANTE_GASES * temperatura / FARADAY
+    return rt_f / valencia * np.log(np.asarray(c_ext, dtype=float) / np.asarray(c_int, dtype=float))
+
+def potencial_ghk(k_int, k_ext, na_int, na_ext, cl_int=10.0, cl_ext=110.0,
+                  p_k=1.0, p_na=0.04, p_cl=0.45, temperatura=TEMPERATURA_CORPORAL):
+    """Potencial de membrana (mV) de la ecuación de Goldman-Hodgkin-Katz
+
+    Las permeabilidades son relativas a la del K+ (valores típicos de una
+    neurona en reposo). Admite escalares o arrays con un valor por célula.
+    """
+    if np is None:
+        raise RuntimeError("El potencial de membrana requiere NumPy (pip install numpy)")
+    rt_f = 1000.0 * CONSTANTE_GASES * temperatura / FARADAY
+    # El Cl- tiene carga negativa: sus concentraciones van cambiadas de lado
+    exterior = p_k * np.asarray(k_ext, dtype=float) + p_na * np.asarray(na_ext, dtype=float) + p_cl * cl_int
+    interior = p_k * np.asarray(k_int, dtype=float) + p_na * np.asarray(na_int, dtype=float) + p_cl * cl_ext
+    return rt_f * np.log(exterior / interior)
+
+@dataclass
+class ParametrosHodgkinHuxley:
+    """Conductancias y paso del modelo de Hodgkin-Huxley (axón de calamar)"""
+    g_na: float = 120.0      # mS/cm²
+    g_k: float = 36.0        # mS/cm²
+    g_fuga: float = 0.3      # mS/cm²
+    c_m: float = 1.0         # µF/cm²
+    phi: float = 1.0         # factor de temperatura de la cinética (1 = 6,3 °C)
+    dt: float = 0.025        # paso fijo (ms)
+    umbral_espiga: float = 0.0  # mV: una espiga es un cruce ascendente de este valor
+
+def _cociente_exponencial(x, escala):
+    """x / (1 - exp(-x / escala)), continuo en x = 0 (donde vale `escala`)"""
+    u = x / escala
+    u = np.where(np.abs(u) < 1e-7, 1e-7, u)
+    return escala * u / -np.expm1(-u)
+
+def _tasas_hodgkin_huxley(v):
+    """Constantes de apertura y cierre (1/ms) de las compuertas m, h y n"""
+    alfa_m = 0.1 * _cociente_exponencial(v + 40.0, 10.0)
+    beta_m = 4.0 * np.exp(-(v + 65.0) / 18.0)
+    alfa_h = 0.07 * np.exp(-(v + 65.0) / 20.0)
+    beta_h = 1.0 / (1.0 + np.exp(-(v + 35.0) / 10.0))
+    alfa_n = 0.01 * _cociente_exponencial(v + 55.0, 10.0)
+    beta_n = 0.125 * np.exp(-(v + 65.0) / 80.0)
+    return alfa_m, beta_m, alfa_h, beta_h, alfa_n, beta_n
+
+def simular_hodgkin_huxley(corrientes, duracion=50.0, na_int=10, k_int=140, na_ext=145,
+                           k_ext=4, parametros=None, inicio_pulso=5.0, duracion_pulso=40.0,
+                           muestras=250):
+    """Integra potenciales de acción de muchas neuronas a la vez
+
+    Cada neurona recibe un pulso de corriente de amplitud `corrientes[i]`
+    (µA/cm²) y tiene sus propias concentraciones, de las que salen los
+    potenciales de Nernst del Na+ y del K+. El reposo es el potencial GHK:
+    el potencial de la fuga se ajusta para que la corriente neta sea nula
+    en él con las compuertas en equilibrio. Las compuertas avanzan con
+    Euler exponencial (exacto para cada compuerta con el voltaje fijo) y
+    el voltaje con Euler explícito, todo con paso fijo y sobre arrays de
+    neuronas, así que un barrido de amplitudes cuesta lo mismo que una
+    sola neurona en número de pasos.
+    """
+    if np is None:
+        raise RuntimeError("La simulación de Hodgkin-Huxley requiere NumPy (pip install numpy)")
+    parametros = parametros or ParametrosHodgkinHuxley()
+    corrientes = np.asarray(corrientes, dtype=float)
+    forma = corrientes.shape
+    
+    def por_neurona(valor):
+        return np.broadcast_to(np.asarray(valor, dtype=float), forma)
+    
+    na_int, k_int, na_ext, k_ext = map(por_neurona, (na_int, k_int, na_ext, k_ext))
+    e_na = potencial_nernst(na_ext, na_int)
+    e_k = potencial_nernst(k_ext, k_int)
+    reposo = potencial_ghk(k_int, k_ext, na_int, na_ext)
+    
+    v = reposo.copy()
+    alfa_m, beta_m, alfa_h, beta_h, alfa_n, beta_n = _tasas_hodgkin_huxley(v)
+    m = alfa_m / (alfa_m + beta_m)
+    h = alfa_h / (alfa_h + beta_h)
+    n = alfa_n / (alfa_n + beta_n)
+    g_na, g_k, g_fuga = parametros.g_na, parametros.g_k, parametros.g_fuga
+    e_fuga = v + (g_na * m ** 3 * h * (v - e_na) + g_k * n ** 4 * (v - e_k)) / g_fuga
+    
+    dt = parametros.dt
+    pasos = int(round(duracion / dt))
+    cada = max(1, pasos // muestras)
+    tiempos = []
+    trazas = []
+    espigas = np.zeros(forma, dtype=np.int64)
+    latencia = np.full(forma, np.nan)
+    pico = v.copy()
+    encima = v > parametros.umbral_espiga
+    
+    for paso in range(pasos):
+        with instrumentacion.tramo('simulacion.hodgkin_huxley.paso'):
+            t = paso * dt
+            estimulo = corrientes if inicio_pulso <= t < inicio_pulso + duracion_pulso else 0.0
+            alfa_m, beta_m, alfa_h, beta_h, alfa_n, beta_n = _tasas_hodgkin_huxley(v)
+            for compuerta, alfa, beta in ((m, alfa_m, beta_m), (h, alfa_h, beta_h), (n, alfa_n, beta_n)):
+                suma = (alfa + beta) * parametros.phi
+                equilibrio = alfa / (alfa + beta)
+                compuerta -= (compuerta - equilibrio) * -np.expm1(-dt * suma)
+            i_ion = (g_na * m ** 3 * h * (v - e_na) + g_k * n ** 4 * (v - e_k)
+                     + g_fuga * (v - e_fuga))
+            v += dt / parametros.c_m * (estimulo - i_ion)
+            
+            ahora_encima = v > parametros.umbral_espiga
+            nuevas = ahora_encima & ~encima
+            espigas += nuevas
+            latencia = np.where(nuevas & np.isnan(latencia), t + dt - inicio_pulso, latencia)
+            encima = ahora_encima
+            np.maximum(pico, v, out=pico)
+            if paso % cada == 0:
+                tiempos.append(t)
+                trazas.append(v.astype(np.float32))
+    
+    return {
+        'tiempos': np.array(tiempos),
+        'voltaje': np.array(trazas),
+        'reposo': reposo,
+        'e_na': e_na,
+        'e_k': e_k,
+        'espigas': espigas,
+        'frecuencia': espigas / (duracion_pulso / 1000.0),
+        'latencia': latencia,
+        'pico': pico
+    }
+
+def grafica_voltaje(tiempos, voltaje, alto=12, ancho=60, minimo=-100.0, maximo=60.0):
+    """Devuelve las líneas de una gráfica en texto del voltaje frente al tiempo
+
+    Cada columna cubre un tramo de muestras y se rellena entre su mínimo y
+    su máximo, para que ninguna espiga se pierda al reducir la resolución.
+    """
+    escala = (alto - 1) / (maximo - minimo)
+    tramos = np.array_split(np.asarray(voltaje, dtype=float), min(ancho, len(voltaje)))
+    arriba = [int(np.clip(round((maximo - t.max()) * escala), 0, alto - 1)) for t in tramos]
+    abajo = [int(np.clip(round((maximo - t.min()) * escala), 0, alto - 1)) for t in tramos]
+    lineas = []
+    for fila in range(alto):
+        celdas = "".join("█" if a <= fila <= b else " " for a, b in zip(arriba, abajo))
+        lineas.append(f"{maximo - fila / escala:6.0f} mV │{celdas}")
+    lineas.append(f"{'':>10}└" + "─" * len(tramos))
+    lineas.append(f"{'':>10} 0{tiempos[-1]:>{len(tramos) - 1}.0f} ms")
+    return lineas
+
+@dataclass
+class ParametrosCadenaRespiratoria:
+    """Constantes cinéticas del modelo de la cadena respiratoria"""
+    k_complejo_I: float = 1.0      # NADH + Q → QH2
+    k_complejo_II: float = 0.6     # FADH2 + Q → QH2
+    km_nadh: float = 1.0           # constantes de Michaelis de los complejos I y II
+    km_fadh2: float = 1.0
+    k_complejo_III: float = 2.0    # QH2 + cit c ox → Q + cit c red
+    k_complejo_IV: float = 3.0     # cit c red + 1/2 O2 → cit c ox + H2O
+    q_total: float = 2.0           # reserva de ubiquinona
+    c_total: float = 1.0           # reserva de citocromo c
+    k_sintasa: float = 1.0         # velocidad máxima de la ATP sintasa
+    k_gradiente: float = 5.0       # gradiente de semisaturación de la sintasa
+    fuga: float = 0.01             # fuga de protones a través de la membrana
+    h_control: float = 40.0        # gradiente que frena la cadena a la mitad
+
+def _derivadas_cadena(y, k, h_I, h_III, h_IV, h_atp):
+    """Lado derecho del sistema de EDOs (cada fila es una variable)"""
+    nadh, fadh2, qh2, c_red, gradiente = y[0], y[1], y[2], y[3], y[4]
+    control = 1.0 / (1.0 + gradiente / k.h_control)  # control respiratorio
+    q_ox = k.q_total - qh2
+    c_ox = k.c_total - c_red
+    
+    v_I = k.k_complejo_I * nadh / (k.km_nadh + nadh) * q_ox * control
+    v_II = k.k_complejo_II * fadh2 / (k.km_fadh2 + fadh2) * q_ox
+    v_III = k.k_complejo_III * qh2 * c_ox * control
+    v_IV = k.k_complejo_IV * c_red * control
+    v_atp = k.k_sintasa * gradiente / (k.k_gradiente + gradiente)
+    bombeo = h_I * v_I + h_III * v_III + h_IV * v_IV
+    
+    return np.stack([
+        -v_I,
+        -v_II,
+        v_I + v_II - v_III,
+        v_III - v_IV,
+        bombeo - h_atp * v_atp - k.fuga * gradiente,
+        v_atp,
+        bombeo,
+        v_IV
+    ])
+
+VARIABLES_CADENA = ('nadh', 'fadh2', 'qh2', 'c_red', 'gradiente',
+                    'atp', 'protones', 'oxigeno')
+
+def integrar_cadena_respiratoria(nadh, fadh2, h_I=4.0, h_III=4.0, h_IV=2.0,
+                                 h_atp=4.0, parametros=None, t_final=200.0,
+                                 dt=0.1, muestras=0):
+    """Integra el modelo cinético para muchos juegos de parámetros a la vez
+
+    Todos los argumentos de concentración y estequiometría pueden ser arrays
+    (se difunden entre sí). Usa Runge-Kutta 4 de paso fijo y se detiene en
+    cuanto se agotan sustratos y gradiente. Devuelve el estado final de cada
+    variable y, si `muestras` > 0, la trayectoria media en ese número de
+    instantes. Lanza ValueError si t_final y dt no dan al menos un paso.
+    """
+    if np is None:
+        raise RuntimeError("El modelo cinético requiere NumPy (pip install numpy)")
+    pasos = int(round(t_final / dt)) if dt > 0 else 0
+    if pasos < 1:
+        raise ValueError(f"t_final={t_final} y dt={dt} no dan ningún paso de integración")
+    k = parametros or ParametrosCadenaRespiratoria()
+    nadh, fadh2, h_I, h_III, h_IV, h_atp = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (nadh, fadh2, h_I, h_III, h_IV, h_atp)])
+    forma = nadh.shape
+    h_I, h_III, h_IV, h_atp = (v.ravel() for v in (h_I, h_III, h_IV, h_atp))
+    
+    y = np.zeros((len(VARIABLES_CADENA), nadh.size))
+    y[0] = nadh.ravel()
+    y[1] = fadh2.ravel()
+    
+    cada = max(1, pasos // muestras) if muestras else 0
+    trayectoria = []
+    for paso in range(pasos):
+        if cada and paso % cada == 0:
+            trayectoria.append((paso * dt, y.mean(axis=1)))
+        with instrumentacion.tramo('simulacion.cadena.paso'):
+            k1 = _derivadas_cadena(y, k, h_I, h_III, h_IV, h_atp)
+            k2 = _derivadas_cadena(y + dt / 2 * k1, k, h_I, h_III, h_IV, h_atp)
+            k3 = _derivadas_cadena(y + dt / 2 * k2, k, h_I, h_III, h_IV, h_atp)
+            k4 = _derivadas_cadena(y + dt * k3, k, h_I, h_III, h_IV, h_atp)
+            y = y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        if paso % 50 == 0 and y[:5].max() < 1e-6:
+            break
+    if cada:
+        trayectoria.append(((paso + 1) * dt, y.mean(axis=1)))
+    
+    resultado = {nombre: y[i].reshape(forma) for i, nombre in enumerate(VARIABLES_CADENA)}
+    # Máximo quimiosmótico: todos los protones bombeados acaban en ATP
+    maximo = (nadh * (h_I + h_III + h_IV).reshape(forma)
+              + fadh2 * (h_III + h_IV).reshape(forma)) / h_atp.reshape(forma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['eficiencia'] = np.where(maximo > 0, resultado['atp'] / maximo, 0.0)
+        resultado['p_o'] = np.where(resultado['oxigeno'] > 0,
+                                    resultado['atp'] / resultado['oxigeno'], 0.0)
+    resultado['trayectoria'] = trayectoria
+    return resultado
+
+# Resultados ya calculados por el barrido: (nadh, fadh2, h_I, h_III, h_IV, h_atp)
+# → (atp, eficiencia, p_o), del usado hace más tiempo al más reciente
+_cache_barrido = OrderedDict()
+CAPACIDAD_CACHE_BARRIDO = 100000
+
+def _tramo_barrido(puntos):
+    """Resuelve un bloque de puntos del barrido en un proceso del pool"""
+    columnas = np.array(puntos, dtype=float).T
+    resultado = integrar_cadena_respiratoria(*columnas)
+    return list(zip(resultado['atp'].tolist(), resultado['eficiencia'].tolist(),
+                    resultado['p_o'].tolist()))
+
+def barrido_cadena_respiratoria(nadh, fadh2, h_atp, h_I=4.0, h_III=4.0, h_IV=2.0,
+                                procesos=None, tamano_tramo=2000):
+    """Evalúa una rejilla nadh × fadh2 × h_atp en paralelo, con caché
+
+    Solo se integran los puntos que no estén ya en la caché; el resto de la
+    rejilla se reparte en tramos vectorizados entre los procesos del pool.
+    La caché guarda como mucho CAPACIDAD_CACHE_BARRIDO puntos y descarta
+    primero los usados hace más tiempo.
+    Devuelve arrays de forma (len(nadh), len(fadh2), len(h_atp)).
+    """
+    if np is None:
+        raise RuntimeError("El barrido requiere NumPy (pip install numpy)")
+    puntos = [(float(n), float(f), float(h_I), float(h_III), float(h_IV), float(h))
+              for n in nadh for f in fadh2 for h in h_atp]
+    conocidos = {}
+    pendientes = []
+    for p in dict.fromkeys(puntos):
+        if p in _cache_barrido:
+            _cache_barrido.move_to_end(p)
+            conocidos[p] = _cache_barrido[p]
+        else:
+            pendientes.append(p)
+    
+    tramos = [pendientes[i:i + tamano_tramo]
+              for i in range(0, len(pendientes), tamano_tramo)]
+    procesos = min(procesos or os.cpu_count() or 1, len(tramos))
+    if procesos <= 1:
+        resueltos = [_tramo_barrido(tramo) for tramo in tramos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resueltos = list(pool.map(_tramo_barrido, tramos))
+    for tramo, valores in zip(tramos, resueltos):
+        conocidos.update(zip(tramo, valores))
+        _cache_barrido.update(zip(tramo, valores))
+    while len(_cache_barrido) > CAPACIDAD_CACHE_BARRIDO:
+        _cache_barrido.popitem(last=False)
+    
+    forma = (len(nadh), len(fadh2), len(h_atp))
+    valores = np.array([conocidos[p] for p in puntos]).reshape(forma + (3,))
+    return {
+        'atp': valores[..., 0],
+        'eficiencia': valores[..., 1],
+        'p_o': valores[..., 2],
+        'calculados': len(pendientes)
+    }
+
+def mapa_calor(valores, filas, columnas, etiqueta_filas, etiqueta_columnas):
+    """Devuelve las líneas de un mapa de calor en texto (valores entre 0 y 1)"""
+    sombras = "░▒▓█"
+    minimo, maximo = float(valores.min()), float(valores.max())
+    rango = (maximo - minimo) or 1.0
+    lineas = [f"{etiqueta_filas:>8} \\ {etiqueta_columnas}"]
+    for etiqueta, fila in zip(filas, valores):
+        celdas = "".join(sombras[min(3, int((v - minimo) / rango * 4))] * 2 for v in fila)
+        lineas.append(f"{etiqueta:>8.1f}   {celdas}")
+    lineas.append(f"{'':>8}   " + "".join(f"{c:<4.0f}" for c in columnas[::2]))
+    lineas.append(f"Escala: '{sombras[0]}' {minimo * 100:.1f}%  →  '{sombras[-1]}' {maximo * 100:.1f}%")
+    return lineas
+
+FASES_CICLO = ("G1", "S", "G2", "M")
+PUNTOS_CONTROL = ("G1/S", "G2/M", "Metafase/Anafase")
+
+@dataclass
+class ParametrosCicloCelular:
+    """Parámetros del modelo estocástico de población del ciclo celular"""
+    duraciones: Tuple[float, ...] = (11.0, 8.0, 4.0, 1.0)  # horas en G1, S, G2, M
+    etapas: int = 4          # subetapas por fase (duraciones tipo Erlang)
+    # Por punto de control (G1/S, G2/M, metafase/anafase): probabilidad de
+    # que una célula quede detenida y repita la fase, o entre en apoptosis
+    p_detencion: Tuple[float, ...] = (0.05, 0.03, 0.02)
+    p_apoptosis: Tuple[float, ...] = (0.01, 0.005, 0.01)
+    p_aneuploidia: float = 0.002  # errores de segregación que pasan el control
+    dt: float = 0.1               # paso de tau-leaping (horas)
+
+def simular_poblacion_ciclo(poblacion, horas, parametros=None, semilla=None):
+    """Simula una colonia con tau-leaping sobre los recuentos por fase
+
+    Cada fase se divide en `etapas` subetapas con salida exponencial, de modo
+    que su duración sigue una Erlang. En cada paso el número de células que
+    avanza de subetapa es binomial; las que terminan G1, G2 o M pasan por su
+    punto de control, donde un sorteo multinomial decide si se detienen,
+    mueren o continúan. El coste no depende del tamaño de la colonia.
+    """
+    if np is None:
+        raise RuntimeError("La simulación de poblaciones requiere NumPy (pip install numpy)")
+    parametros = parametros or ParametrosCicloCelular()
+    rng = np.random.default_rng(semilla)
+    
+    duraciones = np.asarray(parametros.duraciones, dtype=float)
+    etapas = parametros.etapas
+    p_salida = 1.0 - np.exp(-(etapas / duraciones) * parametros.dt)
+    
+    # Cultivo asíncrono: reparto inicial proporcional a la duración de cada fase
+    fracciones = np.repeat(duraciones / duraciones.sum() / etapas, etapas)
+    celulas = rng.multinomial(poblacion, fracciones).reshape(len(duraciones), etapas)
+    
+    p_det = np.asarray(parametros.p_detencion, dtype=float)
+    p_apo = np.asarray(parametros.p_apoptosis, dtype=float)
+    p_control = np.stack([p_det, p_apo, 1.0 - p_det - p_apo], axis=1)
+    fase_control = np.array([0, 2, 3])  # fases que terminan en un punto de control
+    
+    pasos = int(round(horas / parametros.dt))
+    totales = np.empty(pasos + 1, dtype=np.int64)
+    totales[0] = poblacion
+    muertes = np.zeros(3, dtype=np.int64)
+    detenciones = np.zeros(3, dtype=np.int64)
+    divisiones = 0
+    aneuploides = 0
+    
+    for paso in range(1, pasos + 1):
+        with instrumentacion.tramo('simulacion.ciclo.paso'):
+            salen = rng.binomial(celulas, p_salida[:, None])
+            celulas -= salen
+            celulas[:, 1:] += salen[:, :-1]
+            terminan = salen[:, -1]
+        
+            # Puntos de control G1/S, G2/M y metafase/anafase
+            destino = rng.multinomial(terminan[fase_control], p_control)
+            detenciones += destino[:, 0]
+            muertes += destino[:, 1]
+            celulas[fase_control, 0] += destino[:, 0]
+        
+            celulas[1, 0] += destino[0, 2]      # G1 → S
+            celulas[2, 0] += terminan[1]        # S → G2 (sin punto de control)
+            celulas[3, 0] += destino[1, 2]      # G2 → M
+            divididas = destino[2, 2]           # M → 2 células hijas en G1
+            celulas[0, 0] += 2 * divididas
+            divisiones += int(divididas)
+            aneuploides += int(rng.binomial(divididas, parametros.p_aneuploidia))
+        
+            totales[paso] = celulas.sum()
+    
+    tiempos = np.arange(pasos + 1) * parametros.dt
+    por_fase = celulas.sum(axis=1)
+    return {
+        'tiempos': tiempos,
+        'totales': totales,
+        'fases': por_fase / max(por_fase.sum(), 1),
+        'muertes': muertes,
+        'detenciones': detenciones,
+        'divisiones': divisiones,
+        'aneuploides': aneuploides,
+        'tiempo_duplicacion': tiempo_duplicacion(tiempos, totales)
+    }
+
+def tiempo_duplicacion(tiempos, totales):
+    """Tiempo de duplicación a partir de la pendiente de ln(N) en la segunda mitad"""
+    mitad = len(tiempos) // 2
+    t = tiempos[mitad:]
+    vivos = totales[mitad:] > 0
+    if vivos.sum() < 2:
+        return math.inf
+    pendiente = np.polyfit(t[vivos], np.log(totales[mitad:][vivos]), 1)[0]
+    return math.log(2) / pendiente if pendiente > 0 else math.inf
+
+def _replica_ciclo_celular(argumentos):
+    """Punto de entrada de cada proceso del pool (debe ser de nivel de módulo)"""
+    return simular_poblacion_ciclo(*argumentos)
+
+def simular_replicas_ciclo(poblacion, horas, replicas=4, parametros=None,
+                           semilla=None, procesos=None):
+    """Ejecuta réplicas independientes repartidas en un pool de procesos
+
+    Las semillas de cada réplica se derivan de `semilla` con SeedSequence,
+    así que el resultado no depende del número de procesos.
+    """
+    if np is None:
+        raise RuntimeError("La simulación de poblaciones requiere NumPy (pip install numpy)")
+    semillas = np.random.SeedSequence(semilla).spawn(replicas)
+    tareas = [(poblacion, horas, parametros, s) for s in semillas]
+    procesos = min(procesos or os.cpu_count() or 1, replicas)
+    if procesos <= 1:
+        return [_replica_ciclo_celular(tarea) for tarea in tareas]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(_replica_ciclo_celular, tareas))
+
+@dataclass
+class ParametrosFRAP:
+    """Parámetros del modelo de difusión lateral en la membrana (FRAP)"""
+    lado: float = 10.0                 # lado del parche de membrana (µm), con bordes periódicos
+    dt: float = 0.02                   # paso de tiempo (s)
+    d_lipido: float = 1.0              # coeficientes de difusión lateral (µm²/s)
+    d_proteina: float = 0.1
+    fraccion_proteinas: float = 0.2    # del total de partículas
+    fraccion_inmovil: float = 0.3      # proteínas ancladas al citoesqueleto
+    balsas: int = 12                   # microdominios lipídicos (lipid rafts)
+    radio_balsa: float = 0.6           # µm
+    factor_balsa: float = 0.25         # la difusión en una balsa es más lenta
+    radio_blanqueo: float = 1.0        # región fotoblanqueada, en el centro (µm)
+    resolucion: int = 256              # celdas por lado del mapa de balsas
+
+def mapa_balsas(parametros, semilla=None):
+    """Mapa booleano (resolución × resolución) de las balsas lipídicas
+
+    Los centros se sortean al azar y las balsas cruzan los bordes
+    periódicos como el resto del parche.
+    """
+    rng = np.random.default_rng(semilla)
+    celda = parametros.lado / parametros.resolucion
+    coordenadas = (np.arange(parametros.resolucion) + 0.5) * celda
+    centros = rng.uniform(0, parametros.lado, (parametros.balsas, 2))
+    mapa = np.zeros((parametros.resolucion, parametros.resolucion), dtype=bool)
+    for cx, cy in centros:
+        dx = np.abs(coordenadas - cx)
+        dy = np.abs(coordenadas - cy)
+        dx = np.minimum(dx, parametros.lado - dx)
+        dy = np.minimum(dy, parametros.lado - dy)
+        mapa |= dx[:, None] ** 2 + dy[None, :] ** 2 <= parametros.radio_balsa ** 2
+    return mapa
+
+def _tesela_frap(argumentos):
+    """Paseos aleatorios de las partículas que empiezan en una tesela
+
+    Las partículas no interactúan, así que cada tesela se simula por
+    separado aunque sus partículas salgan de ella. Un paso que empieza o
+    termina en una balsa se acepta con probabilidad `factor_balsa`; como
+    la regla es simétrica, la densidad de equilibrio sigue siendo uniforme
+    y la curva normalizada tiende a la fracción móvil. Devuelve, por
+    muestra, las partículas fluorescentes de cada especie dentro de la
+    región blanqueada, más las que había antes de blanquear y las
+    blanqueadas.
+    """
+    lipidos, proteinas, (x0, x1), parametros, balsas, semilla, pasos, cada = argumentos
+    rng = np.random.default_rng(semilla)
+    n = lipidos + proteinas
+    lado = np.float32(parametros.lado)
+    inverso_lado = np.float32(1.0 / parametros.lado)
+    x = rng.uniform(x0, x1, n).astype(np.float32)
+    y = rng.uniform(0, parametros.lado, n).astype(np.float32)
+    es_proteina = np.arange(n) >= lipidos
+
+    # Desplazamiento típico por paso fuera de las balsas: sqrt(2·D·dt)
+    difusion = np.where(es_proteina, parametros.d_proteina, parametros.d_lipido)
+    inmoviles = es_proteina & (rng.random(n) < parametros.fraccion_inmovil)
+    difusion[inmoviles] = 0.0
+    sigma = np.sqrt(2.0 * difusion * parametros.dt).astype(np.float32)
+    escala = np.float32(parametros.resolucion / parametros.lado)
+    ultima = parametros.resolucion - 1
+    celdas = balsas.ravel()
+    centro = np.float32(parametros.lado / 2)
+    radio2 = np.float32(parametros.radio_blanqueo ** 2)
+
+    def en_region():
+        return (x - centro) ** 2 + (y - centro) ** 2 <= radio2
+
+    def en_balsas(px, py):
+        fila = (px * escala).astype(np.int32)
+        np.minimum(fila, ultima, out=fila)
+        columna = (py * escala).astype(np.int32)
+        np.minimum(columna, ultima, out=columna)
+        fila *= parametros.resolucion
+        fila += columna
+        return celdas[fila]
+
+    def desplazar(v):
+        # Bordes periódicos; floor es mucho más rápido que np.remainder en float32
+        v += sigma * rng.standard_normal(n, dtype=np.float32)
+        v -= lado * np.floor(v * inverso_lado)
+        return v
+
+    dentro = en_region()
+    previas = (int((dentro & ~es_proteina).sum()), int((dentro & es_proteina).sum()))
+    fluorescentes = ~dentro    # fotoblanqueo instantáneo en t = 0
+    blanqueadas = (int((dentro & ~es_proteina).sum()), int((dentro & es_proteina).sum()))
+
+    origen = en_balsas(x, y)
+    muestras = []
+    for paso in range(pasos + 1):
+        if paso % cada == 0:
+            visibles = en_region() & fluorescentes
+            muestras.append(((visibles & ~es_proteina).sum(), (visibles & es_proteina).sum()))
+        if paso == pasos:
+            break
+        with instrumentacion.tramo('simulacion.frap.paso'):
+            nueva_x = desplazar(x.copy())
+            nueva_y = desplazar(y.copy())
+            destino = en_balsas(nueva_x, nueva_y)
+            aceptados = ~(origen | destino)
+            aceptados |= rng.random(n, dtype=np.float32) < parametros.factor_balsa
+            np.copyto(x, nueva_x, where=aceptados)
+            np.copyto(y, nueva_y, where=aceptados)
+            np.copyto(origen, destino, where=aceptados)
+
+    return np.array(muestras, dtype=np.int64), previas, blanqueadas, int(origen.sum())
+
+def _ajuste_recuperacion(tiempos, curva, radio):
+    """Fracción móvil, semitiempo y D estimado (aproximación de Axelrod)"""
+    inicial = curva[0]
+    final = curva[-max(1, len(curva) // 10):].mean()
+    movil = (final - inicial) / (1.0 - inicial) if inicial < 1.0 else 0.0
+    if final - inicial <= 0:
+        return float(movil), math.inf, 0.0
+    mitad = inicial + 0.5 * (final - inicial)
+    t_medio = float(tiempos[np.argmax(curva >= mitad)])
+    difusion = 0.224 * radio ** 2 / t_medio if t_medio > 0 else math.inf
+    return float(movil), t_medio, difusion
+
+def simular_frap(particulas, segundos, parametros=None, semilla=None, teselas=4,
+                 procesos=None, muestras=200):
+    """Simula un experimento FRAP con lípidos y proteínas en una membrana 2D
+
+    Las partículas hacen paseos aleatorios vectorizados (un paso de todas a
+    la vez) y se frenan en las balsas lipídicas. En t = 0 se blanquea un
+    círculo en el centro y se mide la recuperación de su fluorescencia,
+    normalizada a la intensidad previa y a la pérdida total por el
+    blanqueo (así una especie totalmente móvil recupera 1). El parche se
+    divide en `teselas` franjas cuyas partículas se simulan por separado,
+    repartidas en un pool de procesos; las semillas salen de `semilla`
+    con SeedSequence, de modo que el resultado no depende de `procesos`.
+    """
+    if np is None:
+        raise RuntimeError("La simulación de difusión en membrana requiere NumPy (pip install numpy)")
+    parametros = parametros or ParametrosFRAP()
+    semillas = np.random.SeedSequence(semilla).spawn(teselas + 1)
+    balsas = mapa_balsas(parametros, semillas[0])
+
+    pasos = max(1, int(round(segundos / parametros.dt)))
+    cada = max(1, pasos // muestras)
+    proteinas = int(round(particulas * parametros.fraccion_proteinas))
+    ancho = parametros.lado / teselas
+    tareas = []
+    for i in range(teselas):
+        # Reparto proporcional al área de cada franja (todas iguales)
+        lipidos_i = (particulas - proteinas) * (i + 1) // teselas - (particulas - proteinas) * i // teselas
+        proteinas_i = proteinas * (i + 1) // teselas - proteinas * i // teselas
+        tareas.append((lipidos_i, proteinas_i, (i * ancho, (i + 1) * ancho), parametros,
+                       balsas, semillas[i + 1], pasos, cada))
+
+    procesos = min(procesos or os.cpu_count() or 1, teselas)
+    if procesos <= 1:
+        partes = [_tesela_frap(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            partes = list(pool.map(_tesela_frap, tareas))
+
+    cuentas = sum(p[0] for p in partes)
+    previas = np.sum([p[1] for p in partes], axis=0)
+    blanqueadas = np.sum([p[2] for p in partes], axis=0)
+    totales = np.array([particulas - proteinas, proteinas])
+    tiempos = np.arange(len(cuentas)) * cada * parametros.dt
+
+    # Doble normalización: (I_región / I_total) / (I_región previa / I_total previa)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        especies = (cuentas / np.maximum(totales - blanqueadas, 1)) / (previas / np.maximum(totales, 1))
+        conjunta = (cuentas.sum(axis=1) / max(particulas - blanqueadas.sum(), 1)) \
+            / (previas.sum() / particulas)
+    especies = np.nan_to_num(especies)
+    resultado = {
+        'tiempos': tiempos,
+        'recuperacion': conjunta,
+        'recuperacion_lipidos': especies[:, 0],
+        'recuperacion_proteinas': especies[:, 1],
+        'en_balsas': sum(p[3] for p in partes) / max(particulas, 1),
+        'fraccion_balsas': float(balsas.mean()),
+        'pasos': pasos
+    }
+    for nombre, curva in (('lipidos', especies[:, 0]), ('proteinas', especies[:, 1])):
+        movil, t_medio, difusion = _ajuste_recuperacion(tiempos, curva, parametros.radio_blanqueo)
+        resultado[f'fraccion_movil_{nombre}'] = movil
+        resultado[f't_medio_{nombre}'] = t_medio
+        resultado[f'difusion_{nombre}'] = difusion
+    return resultado
+
+@dataclass
+class ParametrosMicrotubulos:
+    """Modelo de inestabilidad dinámica de dos estados (Dogterom-Leibler)"""
+    k_on: float = 0.0033          # crecimiento por µM de tubulina libre (µm/s)
+    k_off: float = 0.002          # pérdida en el extremo + al crecer (µm/s)
+    v_acortamiento: float = 0.25  # despolimerización rápida tras una catástrofe (µm/s)
+    f_catastrofe: float = 0.01    # catástrofes por segundo con la tubulina de referencia
+    f_rescate: float = 0.03       # rescates por segundo
+    tubulina_referencia: float = 10.0   # µM
+    dimeros_por_um: float = 1625.0
+    volumen: float = 10.0         # fL de citoplasma por microtúbulo (reserva de tubulina)
+    kd_taxol: float = 0.5         # µM
+    kd_nocodazol: float = 1.0     # µM
+    dt: float = 0.5               # s
+
+@dataclass
+class ParametrosActina:
+    """Polimerización de actina con constantes distintas en cada extremo"""
+    k_on_mas: float = 11.6        # extremo + (barbado), subunidades /(µM·s)
+    k_off_mas: float = 1.4        # subunidades/s
+    k_on_menos: float = 1.3       # extremo - (puntiagudo)
+    k_off_menos: float = 0.8
+    subunidades_por_um: float = 370.0
+    volumen: float = 1.0          # fL por filamento (reserva de actina G)
+    kd_citocalasina: float = 0.02  # µM, se une al extremo + y lo tapa
+    k_liberacion_citocalasina: float = 0.1  # s⁻¹; la unión es k_liberación / kd por µM
+    kd_latrunculina: float = 0.2   # µM, secuestra actina G 1:1
+    dt: float = 0.1               # s
+
+# Moléculas por fL y µM: 1e-6 mol/L · 1e-15 L · N_A
+MOLECULAS_FL_UM = 602.214
+
+class PoblacionMicrotubulos:
+    """Miles de microtúbulos con inestabilidad dinámica simulados a la vez
+
+    Cada microtúbulo crece o se acorta; las transiciones (catástrofe y
+    rescate) se sortean para todos a la vez en cada paso. La tubulina
+    libre es la total menos la polimerizada, así que la población llega a
+    un estado estacionario. Un microtúbulo que se acorta hasta su semilla
+    vuelve a crecer. El taxol reduce las catástrofes y el acortamiento;
+    el nocodazol secuestra tubulina y aumenta las catástrofes.
+    """
+
+    def __init__(self, filamentos, tubulina=10.0, taxol=0.0, nocodazol=0.0,
+                 parametros=None, semilla=None):
+        if np is None:
+            raise RuntimeError("La simulación de filamentos requiere NumPy (pip install numpy)")
+        self.parametros = parametros or ParametrosMicrotubulos()
+        self.rng = np.random.default_rng(semilla)
+        self.filamentos = filamentos
+        self.tubulina = tubulina
+        self.taxol = taxol
+        self.nocodazol = nocodazol
+        self.longitud = np.zeros(filamentos)
+        self.creciendo = np.ones(filamentos, dtype=bool)
+        self.catastrofes = 0
+        self.rescates = 0
+        self.tiempo = 0.0
+
+    def tubulina_libre(self):
+        """Tubulina sin polimerizar (µM), descontando la secuestrada por nocodazol"""
+        p = self.parametros
+        polimerizada = float(self.longitud.mean()) * p.dimeros_por_um / (p.volumen * MOLECULAS_FL_UM)
+        libre = max(self.tubulina - polimerizada, 0.0)
+        return libre / (1.0 + self.nocodazol / p.kd_nocodazol)
+
+    def avanzar(self, segundos):
+        """Avanza la población `segundos` de tiempo simulado"""
+        p = self.parametros
+        efecto_taxol = self.taxol / (self.taxol + p.kd_taxol)
+        efecto_nocodazol = self.nocodazol / (self.nocodazol + p.kd_nocodazol)
+        v_acortamiento = p.v_acortamiento * (1.0 - 0.8 * efecto_taxol)
+        for _ in range(max(1, int(round(segundos / p.dt)))):
+            with instrumentacion.tramo('simulacion.filamentos.paso'):
+                libre = self.tubulina_libre()
+                v_crecimiento = max(p.k_on * libre - p.k_off, 0.0)
+                # Las catástrofes son más frecuentes con poca tubulina libre
+                f_catastrofe = (p.f_catastrofe * 2 * p.tubulina_referencia
+                                / (p.tubulina_referencia + libre)
+                                * (1.0 - 0.9 * efecto_taxol) * (1.0 + 2.0 * efecto_nocodazol))
+                p_catastrofe = 1.0 - math.exp(-f_catastrofe * p.dt)
+                p_rescate = 1.0 - math.exp(-p.f_rescate * p.dt)
+
+                cambio = self.rng.random(self.filamentos)
+                catastrofes = self.creciendo & (cambio < p_catastrofe)
+                rescates = ~self.creciendo & (cambio < p_rescate)
+                self.creciendo ^= catastrofes | rescates
+                self.catastrofes += int(catastrofes.sum())
+                self.rescates += int(rescates.sum())
+
+                self.longitud += np.where(self.creciendo, v_crecimiento, -v_acortamiento) * p.dt
+                en_semilla = self.longitud <= 0.0
+                self.longitud[en_semilla] = 0.0
+                self.creciendo |= en_semilla
+                self.tiempo += p.dt
+
+    def longitudes(self):
+        return self.longitud
+
+    def resumen(self):
+        """Estado de la población para mostrar junto al histograma"""
+        minutos = max(self.tiempo / 60.0, 1e-9)
+        return {
+            'longitud_media': float(self.longitud.mean()),
+            'creciendo': float(self.creciendo.mean()),
+            'libre': self.tubulina_libre(),
+            'catastrofes_min': self.catastrofes / self.filamentos / minutos,
+            'rescates_min': self.rescates / self.filamentos / minutos
+        }
+
+class PoblacionActina:
+    """Miles de filamentos de actina polimerizando por sus dos extremos
+
+    En cada paso, las subunidades que entran y salen por cada extremo de
+    cada filamento son sorteos de Poisson. El extremo + tiene menor
+    concentración crítica que el -, así que en el estado estacionario los
+    filamentos avanzan en cinta (treadmilling). La citocalasina tapa el
+    extremo +, que mientras está tapado ni gana ni pierde subunidades; cada
+    tapón se une y se suelta con su propia cinética, así que un filamento
+    sigue tapado durante varios segundos. La latrunculina secuestra actina G.
+    """
+
+    def __init__(self, filamentos, actina=2.0, citocalasina=0.0, latrunculina=0.0,
+                 parametros=None, semilla=None):
+        if np is None:
+            raise RuntimeError("La simulación de filamentos requiere NumPy (pip install numpy)")
+        self.parametros = parametros or ParametrosActina()
+        self.rng = np.random.default_rng(semilla)
+        self.filamentos = filamentos
+        self.actina = actina
+        self.citocalasina = citocalasina
+        self.latrunculina = latrunculina
+        self.subunidades = np.zeros(filamentos, dtype=np.int64)
+        self.tapados = np.zeros(filamentos, dtype=bool)
+        self.tiempo = 0.0
+
+    def actina_libre(self):
+        """Actina G libre (µM), descontando la secuestrada por latrunculina"""
+        p = self.parametros
+        polimerizada = float(self.subunidades.mean()) / (p.volumen * MOLECULAS_FL_UM)
+        libre = max(self.actina - polimerizada, 0.0)
+        return libre / (1.0 + self.latrunculina / p.kd_latrunculina)
+
+    def avanzar(self, segundos):
+        """Avanza la población `segundos` de tiempo simulado"""
+        p = self.parametros
+        # Probabilidades exactas de cambiar de estado en un paso (proceso de dos estados)
+        k_union = p.k_liberacion_citocalasina / p.kd_citocalasina * self.citocalasina
+        k_total = k_union + p.k_liberacion_citocalasina
+        relajacion = 1.0 - math.exp(-k_total * p.dt)
+        p_union = k_union / k_total * relajacion
+        p_liberacion = p.k_liberacion_citocalasina / k_total * relajacion
+        for _ in range(max(1, int(round(segundos / p.dt)))):
+            with instrumentacion.tramo('simulacion.filamentos.paso'):
+                libre = self.actina_libre()
+                cambio = self.rng.random(self.filamentos)
+                self.tapados ^= np.where(self.tapados, cambio < p_liberacion, cambio < p_union)
+                # Suma de Poisson independientes: un sorteo para lo que entra y otro para lo que sale
+                entrada = np.where(self.tapados, p.k_on_menos, p.k_on_mas + p.k_on_menos) * libre * p.dt
+                salida = np.where(self.tapados, p.k_off_menos, p.k_off_mas + p.k_off_menos) * p.dt
+                self.subunidades += self.rng.poisson(entrada)
+                self.subunidades -= self.rng.poisson(salida)
+                np.maximum(self.subunidades, 0, out=self.subunidades)
+                self.tiempo += p.dt
+
+    def longitudes(self):
+        return self.subunidades / self.parametros.subunidades_por_um
+
+    def resumen(self):
+        """Estado de la población para mostrar junto al histograma"""
+        return {
+            'longitud_media': float(self.longitudes().mean()),
+            'libre': self.actina_libre(),
+            'tapados': float(self.tapados.mean())
+        }
+
+def histograma_longitudes(longitudes, maximo, barras=12):
+    """Recuentos por intervalo de longitud entre 0 y `maximo` (el último incluye los mayores)"""
+    cuentas, bordes = np.histogram(np.minimum(longitudes, maximo), bins=barras, range=(0.0, maximo))
+    return cuentas, bordes
+
+BITS_PALABRA = 64
+
+def _contar_bits(palabras):
+    """Bits a 1 de cada fila de un array de uint64 (última dimensión)"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(palabras).sum(axis=-1, dtype=np.int64)
+    octetos = np.ascontiguousarray(palabras).view(np.uint8)
+    return np.unpackbits(octetos, axis=-1).sum(axis=-1, dtype=np.int64)
+
+class PoblacionMeiosis:
+    """Población diploide que se reproduce por meiosis, con un bit por locus
+
+    Cada individuo tiene `cromosomas` pares de homólogos de `loci` loci
+    bialélicos, guardados como palabras de 64 bits: genomas tiene forma
+    (individuos, 2, cromosomas, palabras). En cada generación se forman
+    todos los gametos a la vez con operaciones de bits: cada bivalente
+    forma al menos un quiasma, cada quiasma pasa a la cromátida del gameto
+    con probabilidad 1/2 y la máscara de recombinación es el XOR de los
+    prefijos de bits a partir de cada punto de sobrecruzamiento. Una no
+    disyunción deja al gameto con 0 o 2 copias del cromosoma; los cigotos
+    aneuploides se cuentan y no se reproducen. La población mantiene su
+    tamaño (modelo de Wright-Fisher).
+    """
+
+    def __init__(self, individuos, cromosomas=4, loci=1024, quiasmas=1.5,
+                 p_no_disyuncion=0.002, haplotipos_fundadores=4, semilla=None):
+        if np is None:
+            raise RuntimeError("La simulación de meiosis requiere NumPy (pip install numpy)")
+        self.rng = np.random.default_rng(semilla)
+        self.individuos = individuos
+        self.cromosomas = cromosomas
+        self.loci = loci
+        self.palabras = -(-loci // BITS_PALABRA)
+        self.quiasmas = max(quiasmas, 1.0)
+        self.p_no_disyuncion = p_no_disyuncion
+        self.max_quiasmas = 8
+
+        # Los bits sobrantes de la última palabra quedan siempre a 0
+        ultimos = loci - (self.palabras - 1) * BITS_PALABRA
+        self.validos = np.full(self.palabras, np.uint64(2 ** 64 - 1), dtype=np.uint64)
+        self.validos[-1] = np.uint64(2 ** ultimos - 1)
+        self.inicio_palabras = np.arange(self.palabras, dtype=np.int64) * BITS_PALABRA
+
+        # Fundadores: cada cromosoma es uno de unos pocos haplotipos al azar,
+        # así que al principio hay un fuerte desequilibrio de ligamiento
+        haplotipos = self.rng.integers(0, 2 ** 64, (haplotipos_fundadores, cromosomas, self.palabras),
+                                       dtype=np.uint64) & self.validos
+        eleccion = self.rng.integers(0, haplotipos_fundadores, (individuos, 2, cromosomas))
+        self.genomas = haplotipos[eleccion, np.arange(cromosomas)]
+        self.generacion = 0
+        self.cigotos = 0
+        self.trisomias = np.zeros(cromosomas, dtype=np.int64)
+        self.monosomias = np.zeros(cromosomas, dtype=np.int64)
+        self.otras_aneuploidias = 0
+        self.heterocigosidad_inicial = self.heterocigosidad()
+
+    def _prefijos(self, posiciones):
+        """Máscaras con los bits desde `posiciones` (una por bivalente) hasta el final"""
+        relativa = posiciones[..., None] - self.inicio_palabras
+        desplazamiento = np.clip(relativa, 0, BITS_PALABRA - 1).astype(np.uint64)
+        mascara = np.left_shift(np.uint64(2 ** 64 - 1), desplazamiento)
+        mascara[relativa <= 0] = np.uint64(2 ** 64 - 1)
+        mascara[relativa >= BITS_PALABRA] = 0
+        return mascara
+
+    def gametos(self, padres):
+        """Gametos (n, cromosomas, palabras) y copias (n, cromosomas) de los padres indicados"""
+        a = self.genomas[padres, 0]
+        b = self.genomas[padres, 1]
+        forma = (len(padres), self.cromosomas)
+
+        # Homólogo de partida al azar y un cambio de homólogo por sobrecruzamiento
+        mascara = np.zeros(forma + (self.palabras,), dtype=np.uint64)
+        mascara[self.rng.random(forma) < 0.5] = np.uint64(2 ** 64 - 1)
+        quiasmas = 1 + self.rng.poisson(self.quiasmas - 1.0, forma)
+        for k in range(self.max_quiasmas):
+            activos = (k < quiasmas) & (self.rng.random(forma) < 0.5)
+            if not activos.any():
+                continue
+            posiciones = np.where(activos, self.rng.integers(1, self.loci, forma), self.loci)
+            mascara ^= self._prefijos(posiciones)
+        gametos = a ^ ((a ^ b) & mascara)
+
+        copias = np.ones(forma, dtype=np.int8)
+        no_disyuncion = self.rng.random(forma) < self.p_no_disyuncion
+        copias[no_disyuncion] = np.where(self.rng.random(int(no_disyuncion.sum())) < 0.5, 0, 2)
+        return gametos, copias
+
+    def avanzar(self, generaciones=1):
+        """Produce `generaciones` generaciones nuevas del mismo tamaño"""
+        for _ in range(generaciones):
+            with instrumentacion.tramo('simulacion.meiosis.generacion'):
+                hijos = []
+                faltan = self.individuos
+                while faltan > 0:
+                    # Un pequeño margen para reponer los cigotos aneuploides
+                    n = faltan + faltan // 50 + 8
+                    madres = self.rng.integers(0, self.individuos, n)
+                    padres = self.rng.integers(0, self.individuos, n)
+                    ovulo, copias_ovulo = self.gametos(madres)
+                    esperma, copias_esperma = self.gametos(padres)
+                    copias = copias_ovulo + copias_esperma
+                    self.cigotos += n
+                    self.trisomias += (copias == 3).sum(axis=0)
+                    self.monosomias += (copias == 1).sum(axis=0)
+                    self.otras_aneuploidias += int(((copias == 0) | (copias == 4)).any(axis=1).sum())
+                    euploides = (copias == 2).all(axis=1)
+                    nuevos = np.stack([ovulo[euploides], esperma[euploides]], axis=1)[:faltan]
+                    hijos.append(nuevos)
+                    faltan -= len(nuevos)
+                self.genomas = np.concatenate(hijos) if len(hijos) > 1 else hijos[0]
+                self.generacion += 1
+
+    def frecuencias_alelicas(self, bloque=4096):
+        """Frecuencia del alelo 1 en cada locus, shape (cromosomas, loci)
+
+        Los bits se desempaquetan por bloques de individuos para no
+        multiplicar por ocho la memoria de la población.
+        """
+        cuentas = np.zeros((self.cromosomas, self.palabras * BITS_PALABRA), dtype=np.int64)
+        for inicio in range(0, self.individuos, bloque):
+            parte = self.genomas[inicio:inicio + bloque].astype('<u8', copy=False)
+            octetos = np.ascontiguousarray(parte).view(np.uint8)
+            bits = np.unpackbits(octetos, axis=-1, bitorder='little')
+            cuentas += bits.sum(axis=(0, 1), dtype=np.int64)
+        return cuentas[:, :self.loci] / (2.0 * self.individuos)
+
+    def heterocigosidad(self):
+        """Fracción media de loci heterocigotos por individuo"""
+        distintos = _contar_bits(self.genomas[:, 0] ^ self.genomas[:, 1])
+        return float(distintos.mean()) / self.loci
+
+    def desequilibrio(self, distancia, pares=64):
+        """r² medio entre loci separados `distancia` posiciones (cromosoma 0)"""
+        inicios = np.linspace(0, self.loci - distancia - 1, pares).astype(np.int64)
+
+        def alelos(loci):
+            palabra, bit = loci // BITS_PALABRA, (loci % BITS_PALABRA).astype(np.uint64)
+            valores = (self.genomas[:, :, 0, palabra] >> bit) & np.uint64(1)
+            return valores.reshape(-1, len(loci)).astype(np.float64)
+
+        x, y = alelos(inicios), alelos(inicios + distancia)
+        px, py = x.mean(axis=0), y.mean(axis=0)
+        d = (x * y).mean(axis=0) - px * py
+        denominador = px * (1 - px) * py * (1 - py)
+        validos = denominador > 0
+        if not validos.any():
+            return 0.0
+        return float((d[validos] ** 2 / denominador[validos]).mean())
+
+    def bits_por_locus(self):
+        """Memoria de la población por locus y copia (1 más el relleno de la última palabra)"""
+        return self.genomas.nbytes * 8 / (self.individuos * 2 * self.cromosomas * self.loci)
+
+    def resumen(self):
+        """Estado de la población en la generación actual"""
+        frecuencias = self.frecuencias_alelicas()
+        cigotos = max(self.cigotos, 1)
+        return {
+            'generacion': self.generacion,
+            'frecuencia_media': float(frecuencias.mean()),
+            'fijados': float(((frecuencias == 0) | (frecuencias == 1)).mean()),
+            'heterocigosidad': self.heterocigosidad(),
+            # Esperada por deriva: H0·(1 - 1/2N)^t
+            'heterocigosidad_esperada': self.heterocigosidad_inicial
+                                        * (1 - 1 / (2 * self.individuos)) ** self.generacion,
+            'r2_cercanos': self.desequilibrio(1),
+            'r2_lejanos': self.desequilibrio(self.loci // 4),
+            'aneuploidias': (self.trisomias.sum() + self.monosomias.sum()
+                             + self.otras_aneuploidias) / cigotos,
+            'trisomias': self.trisomias / cigotos,
+            'monosomias': self.monosomias / cigotos
+        }
+
+    def simular(self, generaciones, muestras=10):
+        """Avanza `generaciones` y devuelve resúmenes en generaciones muestreadas"""
+        marcas = sorted(set(int(round(generaciones * i / muestras)) for i in range(muestras + 1)))
+        resultados = []
+        for marca in marcas:
+            self.avanzar(marca - self.generacion)
+            resultados.append(self.resumen())
+        return resultados
+
+def simular_meiosis(individuos, cromosomas=4, loci=1024, generaciones=200,
+                    p_no_disyuncion=0.002, semilla=None, muestras=10):
+    """Crea una población, la hace evolucionar y devuelve sus resúmenes"""
+    poblacion = PoblacionMeiosis(individuos, cromosomas, loci,
+                                 p_no_disyuncion=p_no_disyuncion, semilla=semilla)
+    return {
+        'resumenes': poblacion.simular(generaciones, muestras),
+        'cigotos': poblacion.cigotos,
+        'bytes': poblacion.genomas.nbytes,
+        'bits_por_locus': poblacion.bits_por_locus()
+    }
+
+# ===========================================================================
+# CACHÉ DE RESULTADOS DE SIMULACIÓN
+# ===========================================================================
+
+# Directorio de los resultados guardados entre ejecuciones
+RUTA_CACHE_SIMULACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'cache_simulaciones_biocel')
+
+# Arrays a partir de este tamaño se guardan aparte y se abren con mmap
+UMBRAL_ARRAY_EN_DISCO = 64 * 1024
+
+@functools.lru_cache(maxsize=1)
+def huella_codigo():
+    """Huella del código de este archivo: cualquier cambio invalida la caché"""
+    try:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (OSError, NameError):
+        return 'desconocida'
+
+def _actualizar_huella(h, valor):
+    """Añade a `h` una representación canónica de un parámetro"""
+    if np is not None and isinstance(valor, np.ndarray):
+        h.update(f"array:{valor.dtype.str}:{valor.shape}:".encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif np is not None and isinstance(valor, np.generic):
+        _actualizar_huella(h, valor.item())
+    elif isinstance(valor, dict):
+        h.update(f"dict:{len(valor)}:".encode())
+        for clave in sorted(valor, key=repr):
+            _actualizar_huella(h, clave)
+            _actualizar_huella(h, valor[clave])
+    elif isinstance(valor, (list, tuple)):
+        h.update(f"{type(valor).__name__}:{len(valor)}:".encode())
+        for elemento in valor:
+            _actualizar_huella(h, elemento)
+    elif is_dataclass(valor) and not isinstance(valor, type):
+        h.update(f"{type(valor).__qualname__}:".encode())
+        _actualizar_huella(h, asdict(valor))
+    elif valor is None or isinstance(valor, (bool, int, float, str, bytes)):
+        h.update(f"{type(valor).__name__}:{valor!r};".encode())
+    else:
+        raise TypeError(f"parámetro no admitido en la caché: {type(valor).__name__}")
+
+class _PicklerResultado(pickle.Pickler):
+    """Pickler que deja cada array grande en su propio archivo .npy"""
+
+    def __init__(self, archivo, clave, grandes):
+        super().__init__(archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        self.clave = clave
+        self.grandes = grandes
+
+    def persistent_id(self, objeto):
+        if (np is not None and isinstance(objeto, np.ndarray)
+                and objeto.nbytes >= UMBRAL_ARRAY_EN_DISCO
+                and not objeto.dtype.hasobject):
+            nombre = f"{self.clave}.{len(self.grandes)}.npy"
+            self.grandes.append((nombre, objeto))
+            return nombre
+        return None
+
+class _UnpicklerResultado(pickle.Unpickler):
+    """Abre con mmap, en lugar de cargar, los arrays guardados aparte"""
+
+    def __init__(self, archivo, directorio):
+        super().__init__(archivo)
+        self.directorio = directorio
+
+    def persistent_load(self, nombre):
+        return np.load(os.path.join(self.directorio, nombre), mmap_mode='r')
+
+class CacheSimulaciones:
+    """Resultados de simulaciones deterministas indexados por su contenido
+
+    La clave es una huella de la función, de todos sus argumentos (con los
+    valores por defecto aplicados, así que da igual pasarlos por posición o
+    por nombre), de la semilla y del código del programa. Los parámetros
+    que solo deciden cómo se ejecuta la simulación, como `procesos`, no
+    cambian el resultado y se dejan fuera de la clave. Las simulaciones
+    con un parámetro `semilla` solo se guardan si la semilla está fijada.
+
+    Los resultados recientes se quedan en memoria (LRU limitada en bytes).
+    Además se guardan en disco: la parte pequeña en CLAVE.pkl y cada array
+    grande en CLAVE.N.npy (con persistent_id de pickle), que al leerse se
+    abre con mmap en lugar de cargarse. El directorio también tiene un
+    límite de tamaño y se vacía empezando por los resultados usados hace
+    más tiempo. Los arrays devueltos son de solo lectura, porque se
+    comparten entre sesiones. Si el disco falla, la caché sigue
+    funcionando solo en memoria.
+    """
+
+    FORMATO = 1
+
+    # Parámetros de ejecución que no forman parte de la clave
+    PARAMETROS_EJECUCION = frozenset({'procesos'})
+
+    def __init__(self, directorio=RUTA_CACHE_SIMULACIONES, max_memoria=256 * 2 ** 20,
+                 max_disco=2 * 2 ** 30):
+        self.directorio = directorio
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.activa = True
+        self.memoria = OrderedDict()   # {clave: (resultado, bytes)}
+        self.bytes_memoria = 0
+        self.disco = None              # {clave: (bytes, último uso)}, al primer acceso
+        self.aciertos = 0
+        self.fallos = 0
+        self.cerrojo = threading.Lock()
+
+    def clave(self, funcion, args, kwargs):
+        """Huella hexadecimal de una llamada, o None si no es determinista"""
+        try:
+            llamada = inspect.signature(funcion).bind(*args, **kwargs)
+        except (TypeError, ValueError):
+            return None
+        llamada.apply_defaults()
+        if 'semilla' in llamada.arguments and llamada.arguments['semilla'] is None:
+            return None
+        h = hashlib.sha1()
+        h.update(f"{self.FORMATO}:{huella_codigo()}:{funcion.__module__}.{funcion.__qualname__}:".encode())
+        argumentos = {nombre: valor for nombre, valor in llamada.arguments.items()
+                      if nombre not in self.PARAMETROS_EJECUCION}
+        try:
+            _actualizar_huella(h, argumentos)
+        except TypeError:
+            return None
+        return h.hexdigest()
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """Devuelve el resultado guardado de funcion(*args, **kwargs) o lo calcula"""
+        clave = self.clave(funcion, args, kwargs) if self.activa else None
+        if clave is None:
+            return funcion(*args, **kwargs)
+        with instrumentacion.tramo('simulacion.cache.buscar'):
+            resultado = self.buscar(clave)
+        if resultado is not None:
+            self.aciertos += 1
+            return resultado
+        self.fallos += 1
+        resultado = funcion(*args, **kwargs)
+        with instrumentacion.tramo('simulacion.cache.guardar'):
+            return self.guardar(clave, resultado)
+
+    def buscar(self, clave):
+        with self.cerrojo:
+            if clave in self.memoria:
+                self.memoria.move_to_end(clave)
+                return self.memoria[clave][0]
+            if clave not in self._indice_disco():
+                return None
+            resultado = self._leer(clave)
+            if resultado is None:
+                self._borrar(clave)
+                return None
+            self.disco[clave] = (self.disco[clave][0], time.time())
+            try:
+                os.utime(self._ruta(clave, 'pkl'))
+            except OSError:
+                pass
+            self._en_memoria(clave, resultado)
+            return resultado
+
+    def guardar(self, clave, resultado):
+        """Guarda un resultado nuevo y devuelve la versión de solo lectura"""
+        resultado = _solo_lectura(resultado)
+        with self.cerrojo:
+            if self.directorio is not None and self._escribir(clave, resultado):
+                # Los arrays grandes pasan a leerse del disco con mmap y la
+                # memoria solo guarda el resto
+                leido = self._leer(clave)
+                if leido is not None:
+                    resultado = leido
+            self._en_memoria(clave, resultado)
+        return resultado
+
+    def vaciar(self):
+        """Borra todos los resultados, en memoria y en disco"""
+        with self.cerrojo:
+            self.memoria.clear()
+            self.bytes_memoria = 0
+            for clave in list(self._indice_disco()):
+                self._borrar(clave)
+
+    # --- memoria ---
+
+    def _en_memoria(self, clave, resultado):
+        tamano = _bytes_en_memoria(resultado)
+        if clave in self.memoria:
+            self.bytes_memoria -= self.memoria.pop(clave)[1]
+        self.memoria[clave] = (resultado, tamano)
+        self.bytes_memoria += tamano
+        while self.bytes_memoria > self.max_memoria and self.memoria:
+            self.bytes_memoria -= self.memoria.popitem(last=False)[1][1]
+
+    # --- disco ---
+
+    def _ruta(self, clave, extension):
+        return os.path.join(self.directorio, f"{clave}.{extension}")
+
+    def _indice_disco(self):
+        """{clave: (bytes, último uso)} de los resultados del directorio"""
+        if self.disco is None:
+            self.disco = {}
+            if self.directorio is not None:
+                try:
+                    nombres = os.listdir(self.directorio)
+                except OSError:
+                    nombres = []
+                for nombre in nombres:
+                    clave, _, extension = nombre.partition('.')
+                    try:
+                        estado = os.stat(os.path.join(self.directorio, nombre))
+                    except OSError:
+                        continue
+                    tamano, uso = self.disco.get(clave, (0, 0.0))
+                    if extension == 'pkl':
+                        uso = estado.st_mtime
+                    self.disco[clave] = (tamano + estado.st_size, uso)
+        return self.disco
+
+    def _leer(self, clave):
+        try:
+            with open(self._ruta(clave, 'pkl'), 'rb') as f:
+                datos = _UnpicklerResultado(f, self.directorio).load()
+            if datos.get('formato') != self.FORMATO:
+                return None
+            return datos['resultado']
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, KeyError):
+            return None
+
+    def _escribir(self, clave, resultado):
+        """Guarda el resultado en disco; indica si tiene arrays guardados aparte"""
+        grandes = []
+        escritos = [self._ruta(clave, 'pkl') + '.tmp']
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = self._ruta(clave, 'pkl')
+            with open(ruta + '.tmp', 'wb') as f:
+                _PicklerResultado(f, clave, grandes).dump({'formato': self.FORMATO,
+                                                           'resultado': resultado})
+            # Los .npy primero y el .pkl al final: sin él el resultado no existe
+            for nombre, valores in grandes:
+                destino = os.path.join(self.directorio, nombre)
+                escritos.append(destino + '.tmp')
+                with open(destino + '.tmp', 'wb') as f:
+                    np.save(f, valores)
+                os.replace(destino + '.tmp', destino)
+                escritos[-1] = destino
+            os.replace(ruta + '.tmp', ruta)
+            escritos[0] = ruta
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            for ruta in escritos:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            return False
+        indice = self._indice_disco()
+        indice[clave] = (sum(os.path.getsize(r) for r in escritos), time.time())
+        self._recortar_disco()
+        return bool(grandes) and clave in indice
+
+    def _borrar(self, clave):
+        # Fuera también de la memoria: sus arrays mapeados retendrían el espacio
+        if clave in self.memoria:
+            self.bytes_memoria -= self.memoria.pop(clave)[1]
+        self.disco.pop(clave, None)
+        if self.directorio is None:
+            return
+        try:
+            nombres = os.listdir(self.directorio)
+        except OSError:
+            return
+        for nombre in nombres:
+            if nombre.partition('.')[0] == clave:
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                except OSError:
+                    pass
+
+    def _recortar_disco(self):
+        """Borra los resultados usados hace más tiempo hasta caber en max_disco"""
+        total = sum(tamano for tamano, _ in self.disco.values())
+        if total <= self.max_disco:
+            return
+        for clave, (tamano, _) in sorted(self.disco.items(), key=lambda e: e[1][1]):
+            if total <= self.max_disco:
+                break
+            self._borrar(clave)
+            total -= tamano
+
+def _solo_lectura(valor):
+    """Marca como no modificables los arrays de un resultado compartido"""
+    if np is not None and isinstance(valor, np.ndarray):
+        valor.flags.writeable = False
+    elif isinstance(valor, dict):
+        for v in valor.values():
+            _solo_lectura(v)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor:
+            _solo_lectura(v)
+    return valor
+
+def _bytes_en_memoria(valor):
+    """Bytes que un resultado ocupa en memoria (los arrays mapeados no cuentan)"""
+    if np is not None and isinstance(valor, np.ndarray):
+        return 0 if isinstance(valor, np.memmap) else valor.nbytes
+    if isinstance(valor, dict):
+        return sum(_bytes_en_memoria(v) for v in valor.values()) + 64 * len(valor)
+    if isinstance(valor, (list, tuple)):
+        return sum(_bytes_en_memoria(v) for v in valor) + 8 * len(valor)
+    return 32
+
+# Instancia global compartida por todas las sesiones; --sin-cache la desactiva
+cache_simulaciones = CacheSimulaciones()
+
+# ===========================================================================
+# RENDERIZADO DE PANTALLA
+# ===========================================================================
+
+BANNER = """
+              ██████╗ ██╗ ██████╗  ██████╗███████╗██╗     
+              ██╔══██╗██║██╔═══██╗██╔════╝██╔════╝██║     
+              ██████╔╝██║██║   ██║██║     █████╗  ██║     
+              ██╔══██╗██║██║   ██║██║     ██╔══╝  ██║     
+              ██████╔╝██║╚██████╔╝╚██████╗███████╗███████╗
+              ╚═════╝ ╚═╝ ╚═════╝  ╚═════╝╚══════╝╚══════╝
+"""
+
+# Parte fija del encabezado, compuesta una sola vez
+LINEAS_BANNER = (
+    ["=" * 70]
+    + BANNER.split("\n")
+    + [f"{'SISTEMA DE ESTUDIO DE BIOLOGÍA CELULAR':^70}",
+       f"{'Grado en Biología - Curso 2025-2026 - Miguel M.G.':^70}",
+       "=" * 70]
+)
+
+class CanalES:
+    """Entrada y salida de una sesión de estudio
+
+    La interfaz nunca llama directamente a print ni a input: escribe en un
+    canal y lee líneas de él, de modo que la misma sesión puede ir por la
+    terminal local o por una conexión de red.
+    """
+
+    ansi = False
+
+    def escribir(self, texto):
+        """Envía texto (puede quedarse en un búfer hasta vaciar)"""
+        raise NotImplementedError
+
+    async def vaciar(self):
+        """Espera a que el texto escrito haya salido"""
+
+    async def leer_linea(self):
+        """Lee una línea sin el salto final; EOFError si se cierra"""
+        raise NotImplementedError
+
+    def filas(self):
+        """Número de filas visibles"""
+        return 24
+
+    def cerrar(self):
+        """Libera los recursos del canal"""
+
+class CanalTerminal(CanalES):
+    """Terminal local (stdin/stdout)"""
+
+    def __init__(self):
+        self.ansi = sys.stdin.isatty() and sys.stdout.isatty()
+        if self.ansi and os.name == 'nt':
+            os.system('')  # activa el procesado de secuencias VT en la consola
+
+    def escribir(self, texto):
+        sys.stdout.write(texto)
+
+    async def vaciar(self):
+        sys.stdout.flush()
+
+    async def leer_linea(self):
+        # Con un solo usuario no importa bloquear el bucle mientras escribe
+        return input()
+
+    def filas(self):
+        return shutil.get_terminal_size().lines
+
+class CanalTelnet(CanalES):
+    """Conexión TCP/telnet atendida por el servidor asyncio"""
+
+    ansi = True
+    IAC = 255
+
+    def __init__(self, lector, escritor):
+        self.lector = lector
+        self.escritor = escritor
+
+    def escribir(self, texto):
+        self.escritor.write(texto.replace("\n", "\r\n").encode('utf-8'))
+
+    async def vaciar(self):
+        await self.escritor.drain()
+
+    async def leer_linea(self):
+        datos = await self.lector.readline()
+        if not datos:
+            raise EOFError
+        return self._sin_comandos(datos).decode('utf-8', 'replace').rstrip("\r\n\x00")
+
+    @classmethod
+    def _sin_comandos(cls, datos):
+        """Elimina las secuencias de negociación telnet (IAC ...)"""
+        if cls.IAC not in datos:
+            return datos
+        limpio = bytearray()
+        i = 0
+        while i < len(datos):
+            byte = datos[i]
+            if byte != cls.IAC:
+                limpio.append(byte)
+                i += 1
+            elif i + 1 < len(datos) and datos[i + 1] == cls.IAC:
+                limpio.append(cls.IAC)
+                i += 2
+            elif i + 1 < len(datos) and datos[i + 1] == 250:  # SB ... IAC SE
+                fin = datos.find(bytes([cls.IAC, 240]), i + 2)
+                i = len(datos) if fin < 0 else fin + 2
+            elif i + 1 < len(datos) and 251 <= datos[i + 1] <= 254:  # WILL/WONT/DO/DONT
+                i += 3
+            else:
+                i += 2
+        return bytes(limpio)
+
+class CanalGrabacion(CanalES):
+    """Envuelve otro canal y graba cada línea leída en un archivo JSON-lines
+
+    La primera línea es una cabecera con el formato; cada entrada lleva los
+    segundos transcurridos desde el inicio. Cada línea se escribe en cuanto
+    se lee, así que una sesión interrumpida queda grabada hasta ese punto.
+    """
+
+    FORMATO = 1
+
+    def __init__(self, canal, ruta):
+        self.canal = canal
+        self.ansi = canal.ansi
+        self.archivo = open(ruta, 'w', encoding='utf-8')
+        self.inicio = time.monotonic()
+        self._grabar({'formato': self.FORMATO,
+                      'fecha': datetime.now().isoformat(timespec='seconds')})
+
+    def escribir(self, texto):
+        self.canal.escribir(texto)
+
+    async def vaciar(self):
+        await self.canal.vaciar()
+
+    async def leer_linea(self):
+        linea = await self.canal.leer_linea()
+        self._grabar({'t': round(time.monotonic() - self.inicio, 3), 'entrada': linea})
+        return linea
+
+    def filas(self):
+        return self.canal.filas()
+
+    def cerrar(self):
+        self.archivo.close()
+
+    def _grabar(self, registro):
+        self.archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self.archivo.flush()
+
+class CanalReproduccion(CanalES):
+    """Canal sin terminal que responde con entradas grabadas, sin esperas
+
+    La salida se descarta (solo se cuentan los caracteres). Agotadas las
+    entradas lanza EOFError, o devuelve `relleno` si se indica.
+    """
+
+    def __init__(self, entradas, relleno=None):
+        self.entradas = entradas
+        self.posicion = 0
+        self.relleno = relleno
+        self.caracteres = 0
+
+    @staticmethod
+    def leer_grabacion(ruta):
+        """Entradas de una sesión grabada con CanalGrabacion"""
+        with open(ruta, encoding='utf-8') as f:
+            registros = [json.loads(linea) for linea in f if linea.strip()]
+        if not registros or registros[0].get('formato') != CanalGrabacion.FORMATO:
+            raise ValueError(f"{ruta} no es una grabación de sesión válida")
+        return [registro['entrada'] for registro in registros[1:]]
+
+    def escribir(self, texto):
+        self.caracteres += len(texto)
+
+    async def leer_linea(self):
+        if self.posicion >= len(self.entradas):
+            if self.relleno is None:
+                raise EOFError
+            return self.relleno
+        self.posicion += 1
+        return self.entradas[self.posicion - 1]
+
+class Pantalla:
+    """Compone cada pantalla en memoria y la dibuja de una sola escritura
+
+    En una terminal ANSI, al empezar una pantalla nueva solo se repintan
+    las líneas que difieren de la anterior (el banner, que no cambia, no se
+    vuelve a enviar). Dentro de una misma pantalla el texto solo crece, así
+    que cada presentación envía únicamente lo añadido. Sin terminal (salida
+    redirigida) el texto se escribe tal cual, sin secuencias de control.
+    """
+
+    def __init__(self, canal):
+        self.canal = canal
+        self.ansi = canal.ansi
+        self.lineas = [""]          # pantalla en construcción
+        self.emitido = ""           # texto de esta pantalla ya enviado
+        self.en_pantalla = []       # líneas visibles, fila a fila
+        self.sincronizada = False   # en_pantalla refleja filas absolutas
+        self.pantalla_nueva = True
+        self.espera = 0.0           # segundos esperando respuestas del usuario
+
+    def nueva(self):
+        """Empieza una pantalla nueva (sustituye a borrar la terminal)"""
+        self.lineas = [""]
+        self.emitido = ""
+        self.pantalla_nueva = True
+
+    def escribir(self, texto):
+        """Añade texto a la pantalla en construcción"""
+        partes = texto.split("\n")
+        self.lineas[-1] += partes[0]
+        self.lineas.extend(partes[1:])
+
+    def escribir_lineas(self, lineas):
+        """Añade líneas completas a la pantalla en construcción"""
+        self.lineas[-1] += lineas[0]
+        self.lineas.extend(lineas[1:])
+        self.lineas.append("")
+
+    def presentar(self):
+        """Envía a la terminal lo que falta por mostrar"""
+        with instrumentacion.tramo('pantalla.presentar'):
+            self._presentar()
+
+    def _presentar(self):
+        texto = "\n".join(self.lineas)
+        cabe = len(self.lineas) <= self.canal.filas()
+
+        if not self.pantalla_nueva:
+            salida = texto[len(self.emitido):]
+        elif not self.ansi:
+            salida = texto
+        elif self.sincronizada and cabe:
+            salida = self._diferencias()
+        else:
+            salida = "\x1b[H\x1b[2J" + texto
+
+        if salida:
+            self.canal.escribir(salida)
+        self.emitido = texto
+        self.pantalla_nueva = False
+        self.sincronizada = self.ansi and cabe
+        self.en_pantalla = list(self.lineas)
+
+    def _diferencias(self):
+        """Secuencias ANSI que transforman la pantalla anterior en la nueva"""
+        partes = []
+        ultima = len(self.lineas) - 1
+        for fila, linea in enumerate(self.lineas[:-1]):
+            if fila >= len(self.en_pantalla) or self.en_pantalla[fila] != linea:
+                partes.append(f"\x1b[{fila + 1};1H{linea}\x1b[K")
+        # La última línea se escribe siempre para dejar el cursor al final
+        partes.append(f"\x1b[{ultima + 1};1H{self.lineas[-1]}\x1b[K")
+        if len(self.en_pantalla) > len(self.lineas):
+            partes.append("\x1b[J")
+        return "".join(partes)
+
+    async def enviar(self):
+        """Presenta la pantalla y espera a que salga por el canal"""
+        self.presentar()
+        await self.canal.vaciar()
+
+    async def leer(self, mensaje=""):
+        """Muestra la pantalla con el mensaje y lee una línea del usuario"""
+        self.escribir(mensaje)
+        await self.enviar()
+        inicio = time.perf_counter()
+        respuesta = await self.canal.leer_linea()
+        self.espera += time.perf_counter() - inicio
+        # La terminal ya muestra lo tecleado y el salto de línea
+        self.escribir(respuesta + "\n")
+        self.emitido = "\n".join(self.lineas)
+        self.en_pantalla = list(self.lineas)
+        return respuesta
+
+class VistaPaginada:
+    """Listado largo que solo formatea las líneas de la página visible
+
+    `elementos` es una función que devuelve la secuencia de elementos del
+    listado y `formatear(elemento)` devuelve las líneas de uno, como mucho
+    `alto`. Las páginas formateadas se guardan hasta que cambia la versión
+    de los datos (o el tamaño de la página), así que volver a una página ya
+    vista no formatea nada.
+    """
+
+    def __init__(self, elementos, formatear, alto=1):
+        self.obtener_elementos = elementos
+        self.formatear = formatear
+        self.alto = alto
+        self.version = None
+        self.por_pagina = None
+        self.elementos = None
+        self.paginas = {}
+
+    def preparar(self, version, filas):
+        """Descarta las páginas guardadas si han cambiado los datos o las filas"""
+        por_pagina = max(1, filas // self.alto)
+        if version != self.version or por_pagina != self.por_pagina:
+            self.version = version
+            self.por_pagina = por_pagina
+            self.elementos = None
+            self.paginas = {}
+
+    def total_paginas(self):
+        if self.elementos is None:
+            self.elementos = self.obtener_elementos()
+        return max(1, -(-len(self.elementos) // self.por_pagina))
+
+    def pagina(self, numero):
+        """Líneas de la página `numero` (desde 0)"""
+        lineas = self.paginas.get(numero)
+        if lineas is None:
+            self.total_paginas()
+            inicio = numero * self.por_pagina
+            lineas = []
+            for elemento in self.elementos[inicio:inicio + self.por_pagina]:
+                lineas.extend(self.formatear(elemento))
+            self.paginas[numero] = lineas
+        return lineas
+
+# ===========================================================================
+# INTERFAZ DE CONSOLA LIMPIA Y PROFESIONAL
+# ===========================================================================
+
+class InterfazEstudio:
+    """Interfaz de línea de comandos para el sistema de estudio"""
+    
+    # Nombre de cada opción del menú principal en la instrumentación
+    ACCIONES_MENU = {
+        "1": "temario",
+        "2": "estudiar",
+        "3": "test",
+        "4": "progreso",
+        "5": "conceptos",
+        "6": "simulaciones",
+        "7": "buscar",
+        "8": "salir"
+    }
+    
+    # Categorías del resumen de conceptos; el resto de temas va en OTROS TEMAS
+    CATEGORIAS_CONCEPTOS = {
+        "ESTRUCTURA CELULAR": [1, 4, 5],
+        "MEMBRANA Y TRANSPORTE": [2, 3],
+        "CITOESQUELETO": [6, 7, 8],
+        "ORGÁNULOS CELULARES": [9, 10, 11, 12, 13, 14, 15, 16],
+        "REGULACIÓN CELULAR": [17, 18, 19, 20]
+    }
+    # Filas de listado por página aunque la terminal sea muy baja
+    FILAS_MINIMAS_PAGINA = 10
+    # Ritmo de las simulaciones que se dibujan en directo
+    FOTOGRAMAS_POR_SEGUNDO = 10
+    
+    def __init__(self, almacen=None, canal=None, temas=None):
+        self.sistema = SistemaEstudio(almacen, temas=temas)
+        self.canal = canal or CanalTerminal()
+        self.pantalla = Pantalla(self.canal)
+        self.vista_temario = VistaPaginada(self._elementos_temario, self._formatear_temario)
+        self.vista_conceptos = VistaPaginada(self._elementos_conceptos,
+                                             self._formatear_conceptos, alto=5)
+    
+    def imprimir(self, *valores, sep=" ", end="\n"):
+        """Equivalente a print que escribe en la pantalla en construcción"""
+        self.pantalla.escribir(sep.join(str(v) for v in valores) + end)
+    
+    async def leer(self, mensaje=""):
+        """Equivalente a input que presenta antes la pantalla completa"""
+        return await self.pantalla.leer(mensaje)
+    
+    async def calcular(self, funcion, *args, **kwargs):
+        """Ejecuta un cálculo largo sin bloquear al resto de sesiones"""
+        await self.pantalla.enviar()
+        bucle = asyncio.get_running_loop()
+        return await bucle.run_in_executor(None, functools.partial(funcion, *args, **kwargs))
+    
+    async def almacenar(self, funcion, *args):
+        """Ejecuta una operación que usa el almacén de progreso fuera del bucle
+
+        Las escrituras en SQLite (o la espera del diario) bloquean; en el
+        servidor, hacerlas en el bucle de eventos pararía todas las sesiones.
+        """
+        bucle = asyncio.get_running_loop()
+        return await bucle.run_in_executor(None, functools.partial(funcion, *args))
+    
+    async def simular_con_cache(self, funcion, *args, **kwargs):
+        """Como calcular, pero reutiliza el resultado de una ejecución idéntica anterior"""
+        return await self.calcular(cache_simulaciones.ejecutar, funcion, *args, **kwargs)
+    
+    def limpiar_pantalla(self):
+        """Empieza una pantalla nueva sin lanzar procesos externos"""
+        self.pantalla.nueva()
+    
+    def mostrar_encabezado(self, titulo):
+        """Muestra un encabezado limpio"""
+        with instrumentacion.tramo('pantalla.encabezado'):
+            self.limpiar_pantalla()
+            self.pantalla.escribir_lineas(LINEAS_BANNER)
+            self.imprimir(f"\n{titulo}\n")
+            self.imprimir("-" * 70)
+    
+    async def menu_principal(self):
+        """Menú principal del sistema"""
+        while True:
+            self.mostrar_encabezado("MENÚ PRINCIPAL")
+            
+            self.imprimir("Opciones disponibles:")
+            self.imprimir("1. Consultar temario completo")
+            self.imprimir("2. Estudiar tema específico")
+            self.imprimir("3. Realizar test por tema")
+            self.imprimir("4. Ver progreso de estudio")
+            self.imprimir("5. Resumen de conceptos clave")
+            self.imprimir("6. Simulación de procesos celulares")
+            self.imprimir("7. Buscar en el temario")
+            self.imprimir("8. Salir del sistema")
+            self.imprimir("-" * 70)
+            
+            opcion = (await self.leer("\nSeleccione una opción (1-8): ")).strip()
+            
+            # Cada acción se mide sin contar lo que tarda el usuario en responder
+            accion = self.ACCIONES_MENU.get(opcion, 'no_valida')
+            with instrumentacion.tramo(f"menu.{accion}", sin_espera=self.pantalla):
+                if opcion == "1":
+                    await self.mostrar_temario()
+                elif opcion == "2":
+                    await self.estudiar_tema()
+                elif opcion == "3":
+                    await self.realizar_test()
+                elif opcion == "4":
+                    await self.ver_progreso()
+                elif opcion == "5":
+                    await self.resumen_conceptos()
+                elif opcion == "6":
+                    await self.simulacion_procesos()
+                elif opcion == "7":
+                    await self.buscar()
+                elif opcion == "8":
+                    self.imprimir("\nGuardando progreso...")
+                    await self.pantalla.enviar()
+                    await self.almacenar(self.sistema.guardar_progreso)
+                    self.imprimir("Sistema cerrado correctamente.")
+                    await self.pantalla.enviar()
+                    break
+                else:
+                    await self.leer("\nOpción no válida. Presione Enter para continuar...")
+    
+    async def mostrar_paginado(self, titulo, vista, version, cabecera=(), pie=()):
+        """Muestra una vista paginada que cabe en la terminal
+        
+        Enter pasa a la página siguiente y en la última vuelve al menú. Sin
+        terminal (salida redirigida) todo el listado va en una página.
+        """
+        if self.canal.ansi:
+            reservadas = len(LINEAS_BANNER) + 4 + len(cabecera) + len(pie) + 2
+            filas = max(self.canal.filas() - reservadas, self.FILAS_MINIMAS_PAGINA)
+        else:
+            filas = sys.maxsize
+        vista.preparar(version, filas)
+        
+        numero = 0
+        while True:
+            total = vista.total_paginas()
+            self.mostrar_encabezado(titulo)
+            for linea in cabecera:
+                self.imprimir(linea)
+            lineas = vista.pagina(numero)
+            if lineas:
+                self.imprimir("\n".join(lineas))
+            for linea in pie:
+                self.imprimir(linea)
+            
+            if total == 1:
+                await self.leer("\nPresione Enter para volver al menú principal...")
+                return
+            opcion = (await self.leer(f"\nPágina {numero + 1}/{total} · Enter: siguiente · "
+                                      "A: anterior · N: ir a la página N · 0: volver: ")).strip().lower()
+            if opcion == "0" or (not opcion and numero == total - 1):
+                return
+            if opcion == "a":
+                numero = max(numero - 1, 0)
+            elif opcion.isdigit():
+                numero = min(int(opcion), total) - 1
+            else:
+                numero = min(numero + 1, total - 1)
+    
+    def _elementos_temario(self):
+        return sorted(self.sistema.temas.keys())
+    
+    def _formatear_temario(self, tema_num):
+        tema = self.sistema.temas[tema_num]
+        estudiado = "✓" if self.sistema.progreso.get(tema_num, {}).get('estudiado', False) else " "
+        return [f"  [{estudiado}] TEMA {tema_num:2d}: {tema.titulo}"]
+    
+    async def mostrar_temario(self):
+        """Muestra el temario completo organizado"""
+        await self.mostrar_paginado(
+            "TEMARIO COMPLETO", self.vista_temario,
+            (self.sistema.version_temas, self.sistema.version_progreso),
+            cabecera=["Temas del curso de Biología Celular:", ""],
+            pie=["\n" + "-" * 70, "Leyenda: ✓ = Tema estudiado", "-" * 70])
+    
+    async def estudiar_tema(self):
+        """Permite estudiar un tema específico"""
+        self.mostrar_encabezado("ESTUDIAR TEMA ESPECÍFICO")
+        
+        self.imprimir("Seleccione el número del tema que desea estudiar (1-20):")
+        self.imprimir("0. Volver al menú principal")
+        self.imprimir("-" * 70)
+        
+        try:
+            seleccion = int(await self.leer("\nTema: "))
+            
+            if seleccion == 0:
+                return
+            
+            if seleccion not in self.sistema.temas:
+                self.imprimir(f"\nError: El tema {seleccion} no existe.")
+                await self.leer("Presione Enter para continuar...")
+                return
+            
+            tema = self.sistema.temas[seleccion]
+            
+            # Registrar inicio de estudio
+            if seleccion not in self.sistema.progreso:
+                self.sistema.progreso[seleccion] = progreso_inicial()
+            
+            await self.mostrar_contenido_tema(tema)
             
         except ValueError:
-            print("\nError: Debe ingresar un número válido.")
-            input("Presione Enter para continuar...")
+            self.imprimir("\nError: Debe ingresar un número válido.")
+            await self.leer("Presione Enter para continuar...")
     
-    def mostrar_contenido_tema(self, tema):
+    async def mostrar_contenido_tema(self, tema):
         """Muestra el contenido detallado de un tema"""
         while True:
             self.mostrar_encabezado(f"TEMA {tema.numero}: {tema.titulo}")
             
-            print("CONCEPTOS CLAVE:")
-            print("-" * 70)
+            self.imprimir("CONCEPTOS CLAVE:")
+            self.imprimir("-" * 70)
             
             for i, concepto in enumerate(tema.conceptos_clave, 1):
-                print(f"{i:2d}. {concepto}")
+                self.imprimir(f"{i:2d}. {concepto}")
             
-            print("\n" + "=" * 70)
-            print("\nOpciones:")
-            print("1. Ver preguntas de este tema")
-            print("2. Marcar como estudiado")
-            print("3. Volver a selección de temas")
-            print("-" * 70)
+            self.imprimir("\n" + "=" * 70)
+            self.imprimir("\nOpciones:")
+            self.imprimir("1. Ver preguntas de este tema")
+            self.imprimir("2. Marcar como estudiado")
+            self.imprimir("3. Volver a selección de temas")
+            self.imprimir("-" * 70)
             
-            opcion = input("\nSeleccione opción (1-3): ").strip()
+            opcion = (await self.leer("\nSeleccione opción (1-3): ")).strip()
             
             if opcion == "1":
-                self.mostrar_preguntas_tema(tema)
+                await self.mostrar_preguntas_tema(tema)
             elif opcion == "2":
-                self.sistema.progreso[tema.numero]['estudiado'] = True
-                print(f"\n✓ Tema {tema.numero} marcado como estudiado.")
-                input("Presione Enter para continuar...")
+                await self.almacenar(self.sistema.marcar_estudiado, tema.numero)
+                self.imprimir(f"\n✓ Tema {tema.numero} marcado como estudiado.")
+                await self.leer("Presione Enter para continuar...")
             elif opcion == "3":
                 break
     
-    def mostrar_preguntas_tema(self, tema):
+    async def mostrar_preguntas_tema(self, tema):
         """Muestra las preguntas disponibles para un tema"""
         if not tema.preguntas:
-            print(f"\nNo hay preguntas disponibles para el Tema {tema.numero}.")
-            input("Presione Enter para continuar...")
+            self.imprimir(f"\nNo hay preguntas disponibles para el Tema {tema.numero}.")
+            await self.leer("Presione Enter para continuar...")
             return
         
         self.mostrar_encabezado(f"PREGUNTAS - TEMA {tema.numero}: {tema.titulo}")
         
-        print(f"Total de preguntas disponibles: {len(tema.preguntas)}")
-        print("-" * 70)
+        self.imprimir(f"Total de preguntas disponibles: {len(tema.preguntas)}")
+        self.imprimir("-" * 70)
         
         for i, pregunta in enumerate(tema.preguntas, 1):
-            print(f"\nPregunta {i}: {pregunta['enunciado']}")
-            print("\nOpciones:")
+            self.imprimir(f"\nPregunta {i}: {pregunta['enunciado']}")
+            self.imprimir("\nOpciones:")
             for j, opcion in enumerate(pregunta['opciones']):
-                print(f"  {chr(65+j)}. {opcion}")
+                self.imprimir(f"  {chr(65+j)}. {opcion}")
             
-            respuesta = input("\n¿Cuál es la respuesta correcta? (A-D): ").strip().upper()
+            letras = letras_opciones(pregunta)
+            respuesta = (await self.leer(f"\n¿Cuál es la respuesta correcta? (A-{letras[-1]}): ")).strip().upper()
             
-            if respuesta in ['A', 'B', 'C', 'D']:
+            if len(respuesta) == 1 and respuesta in letras:
                 indice_respuesta = ord(respuesta) - 65
                 if indice_respuesta == pregunta['respuesta']:
-                    print("\n✓ CORRECTO")
+                    self.imprimir("\n✓ CORRECTO")
                 else:
-                    print(f"\n✗ INCORRECTO. La respuesta correcta es: {chr(65 + pregunta['respuesta'])}")
+                    self.imprimir(f"\n✗ INCORRECTO. La respuesta correcta es: {chr(65 + pregunta['respuesta'])}")
                 
-                print(f"\nExplicación: {pregunta['explicacion']}")
+                self.imprimir(f"\nExplicación: {pregunta['explicacion']}")
             else:
-                print("\nRespuesta no válida.")
+                self.imprimir("\nRespuesta no válida.")
             
-            input("\nPresione Enter para continuar...")
-            self.limpiar_pantalla()
+            await self.leer("\nPresione Enter para continuar...")
             self.mostrar_encabezado(f"PREGUNTAS - TEMA {tema.numero}: {tema.titulo}")
     
-    def realizar_test(self):
+    async def realizar_test(self):
         """Realiza un test sobre un tema específico"""
         self.mostrar_encabezado("TEST DE EVALUACIÓN")
         
-        print("Seleccione el tema para el test (1-20):")
-        print("0. Volver al menú principal")
-        print("-" * 70)
+        self.imprimir("Seleccione el tema para el test (1-20):")
+        self.imprimir("0. Volver al menú principal")
+        self.imprimir("-" * 70)
         
         try:
-            tema_num = int(input("\nTema: "))
+            tema_num = int(await self.leer("\nTema: "))
             
             if tema_num == 0:
                 return
             
             if tema_num not in self.sistema.temas:
-                print(f"\nError: El tema {tema_num} no existe.")
-                input("Presione Enter para continuar...")
+                self.imprimir(f"\nError: El tema {tema_num} no existe.")
+                await self.leer("Presione Enter para continuar...")
                 return
             
             tema = self.sistema.temas[tema_num]
             
             if not tema.preguntas:
-                print(f"\nNo hay preguntas disponibles para el Tema {tema_num}.")
-                input("Presione Enter para continuar...")
+                self.imprimir(f"\nNo hay preguntas disponibles para el Tema {tema_num}.")
+                await self.leer("Presione Enter para continuar...")
                 return
             
-            # Seleccionar preguntas aleatorias
-            preguntas_test = random.sample(tema.preguntas, min(5, len(tema.preguntas)))
+            self.imprimir("\nModo del test:")
+            self.imprimir("1. Repaso espaciado (primero las preguntas falladas o pendientes)")
+            self.imprimir("2. Preguntas al azar")
+            self.imprimir("3. Test adaptativo (se detiene al estabilizarse la nota; requiere NumPy)")
+            modo = (await self.leer("\nModo [1]: ")).strip()
             
-            self.ejecutar_test(tema, preguntas_test)
+            cantidad = min(5, len(tema.preguntas))
+            if modo == "3":
+                if np is None:
+                    self.imprimir("\nEl test adaptativo requiere NumPy (pip install numpy).")
+                    await self.leer("Presione Enter para continuar...")
+                    return
+                parametros = await self.almacenar(self.sistema.parametros_items, tema_num)
+                adaptativo = TestAdaptativo(*parametros)
+                await self.ejecutar_test(tema, adaptativo=adaptativo)
+                return
+            if modo == "2":
+                indices = random.sample(range(len(tema.preguntas)), cantidad)
+            else:
+                indices = self.sistema.preguntas_repaso(tema_num, cantidad)
+            
+            await self.ejecutar_test(tema, indices)
             
         except ValueError:
-            print("\nError: Debe ingresar un número válido.")
-            input("Presione Enter para continuar...")
+            self.imprimir("\nError: Debe ingresar un número válido.")
+            await self.leer("Presione Enter para continuar...")
     
-    def ejecutar_test(self, tema, preguntas):
-        """Ejecuta un test con las preguntas proporcionadas"""
+    async def ejecutar_test(self, tema, indices=None, adaptativo=None):
+        """Ejecuta un test con las preguntas indicadas por su índice
+        
+        Con un TestAdaptativo, el motor elige cada pregunta según las
+        respuestas anteriores y decide cuándo termina el test.
+        """
+        preguntas = []
         respuestas_correctas = 0
         respuestas_usuario = []
         
         self.mostrar_encabezado(f"TEST - TEMA {tema.numero}: {tema.titulo}")
         
-        print(f"Test de {len(preguntas)} preguntas")
-        print("Responda con A, B, C o D")
-        print("-" * 70)
+        if adaptativo is None:
+            self.imprimir(f"Test de {len(indices)} preguntas")
+        else:
+            self.imprimir("Test adaptativo: termina al estabilizarse la nota estimada")
+        self.imprimir("Responda con la letra de la opción elegida")
+        self.imprimir("-" * 70)
         
-        for i, pregunta in enumerate(preguntas, 1):
-            print(f"\nPregunta {i}/{len(preguntas)}:")
-            print(f"{pregunta['enunciado']}")
-            print("\nOpciones:")
+        pendientes = iter(indices or [])
+        while True:
+            indice = adaptativo.siguiente() if adaptativo else next(pendientes, None)
+            if indice is None:
+                break
+            pregunta = tema.preguntas[indice]
+            preguntas.append(pregunta)
+            i = len(preguntas)
+            
+            if adaptativo is None:
+                self.imprimir(f"\nPregunta {i}/{len(indices)}:")
+            else:
+                self.imprimir(f"\nPregunta {i}:")
+            self.imprimir(f"{pregunta['enunciado']}")
+            self.imprimir("\nOpciones:")
             
             for j, opcion in enumerate(pregunta['opciones']):
-                print(f"  {chr(65+j)}. {opcion}")
+                self.imprimir(f"  {chr(65+j)}. {opcion}")
             
+            letras = letras_opciones(pregunta)
             while True:
-                respuesta = input("\nSu respuesta (A-D): ").strip().upper()
-                if respuesta in ['A', 'B', 'C', 'D']:
+                respuesta = (await self.leer(f"\nSu respuesta (A-{letras[-1]}): ")).strip().upper()
+                if len(respuesta) == 1 and respuesta in letras:
                     break
-                print("Por favor, ingrese A, B, C o D")
+                self.imprimir(f"Por favor, ingrese {', '.join(letras[:-1])} o {letras[-1]}")
             
             indice_respuesta = ord(respuesta) - 65
             respuestas_usuario.append(indice_respuesta)
             
-            if indice_respuesta == pregunta['respuesta']:
+            correcta = indice_respuesta == pregunta['respuesta']
+            if correcta:
                 respuestas_correctas += 1
+            await self.almacenar(self.sistema.responder_pregunta, tema.numero, indice, correcta)
+            if adaptativo is not None:
+                adaptativo.responder(indice, correcta)
         
-        # Calcular nota
-        nota = (respuestas_correctas / len(preguntas)) * 100
+        # Calcular nota (en modo adaptativo, la esperada sobre todo el tema)
+        if adaptativo is None:
+            nota = (respuestas_correctas / len(preguntas)) * 100
+        else:
+            nota = adaptativo.nota_estimada()
         
         # Mostrar resultados
         self.mostrar_encabezado("RESULTADOS DEL TEST")
         
-        print(f"Tema evaluado: TEMA {tema.numero}: {tema.titulo}")
-        print(f"Preguntas totales: {len(preguntas)}")
-        print(f"Respuestas correctas: {respuestas_correctas}")
-        print(f"Nota obtenida: {nota:.1f}/100")
-        print("-" * 70)
+        self.imprimir(f"Tema evaluado: TEMA {tema.numero}: {tema.titulo}")
+        self.imprimir(f"Preguntas totales: {len(preguntas)}")
+        self.imprimir(f"Respuestas correctas: {respuestas_correctas}")
+        if adaptativo is None:
+            self.imprimir(f"Nota obtenida: {nota:.1f}/100")
+        else:
+            self.imprimir(f"Habilidad estimada: {adaptativo.theta:+.2f} ± {adaptativo.error:.2f}")
+            self.imprimir(f"Nota estimada: {nota:.1f}/100")
+        self.imprimir("-" * 70)
         
         # Mostrar respuestas incorrectas con explicación
         if respuestas_correctas < len(preguntas):
-            print("\nPreguntas con error:")
+            self.imprimir("\nPreguntas con error:")
             for i, (pregunta, respuesta_usuario) in enumerate(zip(preguntas, respuestas_usuario), 1):
                 if respuesta_usuario != pregunta['respuesta']:
-                    print(f"\nPregunta {i}: {pregunta['enunciado']}")
-                    print(f"Su respuesta: {chr(65 + respuesta_usuario)}")
-                    print(f"Respuesta correcta: {chr(65 + pregunta['respuesta'])}")
-                    print(f"Explicación: {pregunta['explicacion']}")
+                    self.imprimir(f"\nPregunta {i}: {pregunta['enunciado']}")
+                    self.imprimir(f"Su respuesta: {chr(65 + respuesta_usuario)}")
+                    self.imprimir(f"Respuesta correcta: {chr(65 + pregunta['respuesta'])}")
+                    self.imprimir(f"Explicación: {pregunta['explicacion']}")
         
-        # Actualizar progreso
-        self.sistema.progreso[tema.numero]['tests_completados'] += 1
-        if nota > self.sistema.progreso[tema.numero]['mejor_nota']:
-            self.sistema.progreso[tema.numero]['mejor_nota'] = nota
-        
-        # Registrar en historial
+        # Registrar en historial y actualizar progreso
         registro = {
             'fecha': datetime.now().strftime("%Y-%m-%d %H:%M"),
             'tema': tema.numero,
@@ -825,271 +5085,916 @@ class InterfazEstudio:
             'correctas': respuestas_correctas,
             'nota': nota
         }
-        self.sistema.historial_tests.append(registro)
+        await self.almacenar(self.sistema.registrar_test, registro)
         
-        print("\n" + "=" * 70)
-        input("\nPresione Enter para volver al menú principal...")
+        self.imprimir("\n" + "=" * 70)
+        await self.leer("\nPresione Enter para volver al menú principal...")
     
-    def ver_progreso(self):
+    async def ver_progreso(self):
         """Muestra el progreso de estudio del usuario"""
         self.mostrar_encabezado("PROGRESO DE ESTUDIO")
         
-        print(f"{'TEMA':<6} {'ESTUDIADO':<10} {'TESTS':<6} {'MEJOR NOTA':<12}")
-        print("-" * 40)
+        self.imprimir(f"{'TEMA':<6} {'ESTUDIADO':<10} {'TESTS':<6} {'MEJOR NOTA':<12} "
+                      f"{'ÚLTIMA':<8} {'MEDIA':<8}")
+        self.imprimir("-" * 55)
         
+        estadisticas = self.sistema.estadisticas
         for tema_num in sorted(self.sistema.temas.keys()):
             progreso = self.sistema.progreso.get(tema_num, {})
             estudiado = "Sí" if progreso.get('estudiado', False) else "No"
             tests = progreso.get('tests_completados', 0)
             mejor_nota = progreso.get('mejor_nota', 0)
+            _, media, _, ultima = estadisticas.por_tema.get(tema_num, (0, 0.0, 0.0, 0.0))
             
-            print(f"{tema_num:<6} {estudiado:<10} {tests:<6} {mejor_nota:<12.1f}")
+            self.imprimir(f"{tema_num:<6} {estudiado:<10} {tests:<6} {mejor_nota:<12.1f} "
+                          f"{ultima:<8.1f} {media:<8.1f}")
         
-        print("\n" + "=" * 70)
+        self.imprimir("\n" + "=" * 70)
         
-        # Estadísticas generales
-        temas_estudiados = sum(1 for p in self.sistema.progreso.values() if p.get('estudiado', False))
-        tests_totales = sum(p.get('tests_completados', 0) for p in self.sistema.progreso.values())
+        # Estadísticas generales (agregados incrementales, sin recorrer el historial)
+        temas_estudiados = estadisticas.temas_estudiados
         
-        print(f"\nRESUMEN:")
-        print(f"  Temas estudiados: {temas_estudiados}/20 ({temas_estudiados/20*100:.1f}%)")
-        print(f"  Tests completados: {tests_totales}")
-        print(f"  Tests en historial: {len(self.sistema.historial_tests)}")
+        self.imprimir(f"\nRESUMEN:")
+        self.imprimir(f"  Temas estudiados: {temas_estudiados}/20 ({temas_estudiados/20*100:.1f}%)")
+        self.imprimir(f"  Tests en historial: {estadisticas.tests}")
+        if estadisticas.tests:
+            self.imprimir(f"  Nota media: {estadisticas.media:.1f} "
+                          f"(desviación típica {math.sqrt(estadisticas.varianza()):.1f})")
         
-        if self.sistema.historial_tests:
-            print(f"\nÚLTIMOS TESTS:")
-            for test in self.sistema.historial_tests[-3:]:  # Mostrar últimos 3
-                print(f"  {test['fecha']} - Tema {test['tema']}: {test['nota']:.1f}/100")
+        ultimos = self.sistema.ultimos_tests(3)
+        if ultimos:
+            self.imprimir(f"\nÚLTIMOS TESTS:")
+            for test in ultimos:
+                self.imprimir(f"  {test['fecha']} - Tema {test['tema']}: {test['nota']:.1f}/100")
         
-        print("\n" + "=" * 70)
-        input("\nPresione Enter para volver al menú principal...")
+        self.imprimir("\n" + "=" * 70)
+        await self.leer("\nPresione Enter para volver al menú principal...")
+    
+    def _elementos_conceptos(self):
+        """Categorías seguidas de sus temas, como ('categoria', nombre) y ('tema', número)"""
+        elementos = []
+        clasificados = set()
+        categorias = dict(self.CATEGORIAS_CONCEPTOS)
+        categorias["OTROS TEMAS"] = sorted(set(self.sistema.temas.keys())
+                                           - {n for nums in categorias.values() for n in nums})
+        for categoria, temas_nums in categorias.items():
+            presentes = [n for n in temas_nums if n in self.sistema.temas and n not in clasificados]
+            if not presentes:
+                continue
+            clasificados.update(presentes)
+            elementos.append(('categoria', categoria))
+            elementos.extend(('tema', n) for n in presentes)
+        return elementos
+    
+    def _formatear_conceptos(self, elemento):
+        tipo, valor = elemento
+        if tipo == 'categoria':
+            return ["", f"{valor}:", "-" * 70]
+        tema = self.sistema.temas[valor]
+        # Primeros 3 conceptos clave
+        return ["", f"Tema {valor}: {tema.titulo}"] + [f"  • {c}" for c in tema.conceptos_clave[:3]]
     
-    def resumen_conceptos(self):
+    async def resumen_conceptos(self):
         """Muestra un resumen de conceptos clave organizado por categorías"""
-        self.mostrar_encabezado("RESUMEN DE CONCEPTOS CLAVE")
-        
-        categorias = {
-            "ESTRUCTURA CELULAR": [1, 4, 5],
-            "MEMBRANA Y TRANSPORTE": [2, 3],
-            "CITOESQUELETO": [6, 7, 8],
-            "ORGÁNULOS CELULARES": [9, 10, 11, 12, 13, 14, 15, 16],
-            "REGULACIÓN CELULAR": [17, 18, 19, 20]
+        await self.mostrar_paginado(
+            "RESUMEN DE CONCEPTOS CLAVE", self.vista_conceptos, self.sistema.version_temas,
+            pie=["", "=" * 70])
+    
+    async def buscar(self):
+        """Busca términos en títulos, conceptos clave y preguntas"""
+        etiquetas = {
+            'titulo': "Título",
+            'concepto': "Concepto",
+            'enunciado': "Pregunta",
+            'respuesta': "Respuesta",
+            'explicacion': "Explicación"
         }
         
-        for categoria, temas_nums in categorias.items():
-            print(f"\n{categoria}:")
-            print("-" * 70)
+        while True:
+            self.mostrar_encabezado("BUSCAR EN EL TEMARIO")
             
-            for tema_num in temas_nums:
-                if tema_num in self.sistema.temas:
-                    tema = self.sistema.temas[tema_num]
-                    print(f"\nTema {tema_num}: {tema.titulo}")
-                    
-                    # Mostrar primeros 3 conceptos clave
-                    for concepto in tema.conceptos_clave[:3]:
-                        print(f"  • {concepto}")
+            self.imprimir("Escriba una o varias palabras (se admiten prefijos, sin tildes")
+            self.imprimir("ni mayúsculas: 'cohes', 'm6p', 'mitocondria').")
+            self.imprimir("Deje la búsqueda vacía para volver al menú principal.")
+            self.imprimir("-" * 70)
             
-            print()
-        
-        print("=" * 70)
-        input("\nPresione Enter para volver al menú principal...")
+            consulta = (await self.leer("\nBuscar: ")).strip()
+            if not consulta:
+                return
+            
+            inicio = time.perf_counter()
+            resultados = self.sistema.buscar(consulta)
+            milisegundos = (time.perf_counter() - inicio) * 1000
+            
+            if not resultados:
+                self.imprimir(f"\nSin resultados para '{consulta}'.")
+                await self.leer("Presione Enter para continuar...")
+                continue
+            
+            self.imprimir(f"\n{len(resultados)} temas encontrados ({milisegundos:.2f} ms):")
+            for tema_num, puntuacion, coincidencias in resultados:
+                tema = self.sistema.temas[tema_num]
+                self.imprimir(f"\nTEMA {tema_num}: {tema.titulo}")
+                for campo, _, texto in coincidencias[:3]:
+                    self.imprimir(f"  [{etiquetas[campo]}] {texto[:58]}")
+            
+            self.imprimir("\n" + "-" * 70)
+            seleccion = (await self.leer("\nNúmero de tema para abrirlo (Enter para nueva búsqueda): ")).strip()
+            if seleccion.isdigit() and int(seleccion) in self.sistema.temas:
+                tema_num = int(seleccion)
+                self.sistema.progreso.setdefault(tema_num, progreso_inicial())
+                await self.mostrar_contenido_tema(self.sistema.temas[tema_num])
     
-    def simulacion_procesos(self):
+    async def simulacion_procesos(self):
         """Simulaciones de procesos celulares básicos"""
         while True:
             self.mostrar_encabezado("SIMULACIÓN DE PROCESOS CELULARES")
             
-            print("Seleccione un proceso para simular:")
-            print("1. Transporte activo Na+/K+")
-            print("2. Cadena respiratoria mitocondrial")
-            print("3. Ciclo celular y puntos de control")
-            print("4. Regreso al menú principal")
-            print("-" * 70)
+            self.imprimir("Seleccione un proceso para simular:")
+            self.imprimir("1. Transporte activo Na+/K+")
+            self.imprimir("2. Cadena respiratoria mitocondrial")
+            self.imprimir("3. Ciclo celular y puntos de control")
+            self.imprimir("4. Difusión en la membrana (FRAP)")
+            self.imprimir("5. Inestabilidad dinámica de microtúbulos y actina")
+            self.imprimir("6. Meiosis y genética de poblaciones")
+            self.imprimir("7. Potencial de membrana y potencial de acción")
+            self.imprimir("8. Regreso al menú principal")
+            self.imprimir("-" * 70)
             
-            opcion = input("\nSeleccione opción (1-4): ").strip()
+            opcion = (await self.leer("\nSeleccione opción (1-8): ")).strip()
             
             if opcion == "1":
-                self.simular_transporte_na_k()
+                await self.simular_transporte_na_k()
             elif opcion == "2":
-                self.simular_cadena_respiratoria()
+                await self.simular_cadena_respiratoria()
             elif opcion == "3":
-                self.simular_ciclo_celular()
+                await self.simular_ciclo_celular()
             elif opcion == "4":
+                await self.simular_frap_membrana()
+            elif opcion == "5":
+                await self.simular_filamentos()
+            elif opcion == "6":
+                await self.simular_meiosis()
+            elif opcion == "7":
+                await self.simular_potencial_accion()
+            elif opcion == "8":
                 break
     
-    def simular_transporte_na_k(self):
-        """Simula el funcionamiento de la bomba Na+/K+ ATPasa"""
+    async def pedir_numero(self, mensaje, defecto, tipo=int):
+        """Pide un número con valor por defecto al pulsar Enter"""
+        texto = (await self.leer(f"{mensaje} [{defecto}]: ")).strip()
+        if not texto:
+            return defecto
+        try:
+            return tipo(texto)
+        except ValueError:
+            self.imprimir(f"  Valor no válido, se usa {defecto}")
+            return defecto
+    
+    async def simular_transporte_na_k(self):
+        """Simula la bomba Na+/K+ ATPasa en un conjunto de células"""
         self.mostrar_encabezado("SIMULACIÓN: BOMBA Na+/K+ ATPasa")
         
-        print("La bomba Na+/K+ ATPasa mantiene los gradientes iónicos:")
-        print("  - Expulsa 3 Na+ hacia el exterior")
-        print("  - Importa 2 K+ hacia el interior")
-        print("  - Consume 1 ATP por ciclo")
-        print("-" * 70)
+        self.imprimir("La bomba Na+/K+ ATPasa mantiene los gradientes iónicos:")
+        self.imprimir("  - Expulsa 3 Na+ hacia el exterior")
+        self.imprimir("  - Importa 2 K+ hacia el interior")
+        self.imprimir("  - Consume 1 ATP por ciclo")
+        self.imprimir("-" * 70)
         
-        na_int = 10  # mM intracelular
-        k_int = 140  # mM intracelular
-        na_ext = 145  # mM extracelular
-        k_ext = 4    # mM extracelular
-        atp = 100    # unidades de ATP
-        
-        print("\nEstado inicial:")
-        print(f"  Na+ intracelular: {na_int} mM")
-        print(f"  K+ intracelular: {k_int} mM")
-        print(f"  Na+ extracelular: {na_ext} mM")
-        print(f"  K+ extracelular: {k_ext} mM")
-        print(f"  ATP disponible: {atp} unidades")
-        
-        print("\nPresione Enter para simular 10 ciclos de la bomba...")
-        input()
-        
-        for ciclo in range(1, 11):
-            if atp > 0:
-                na_int -= 3
-                k_int += 2
-                na_ext += 3
-                k_ext -= 2
-                atp -= 1
-                
-                # Asegurar valores mínimos
-                na_int = max(na_int, 5)
-                k_ext = max(k_ext, 2)
-                
-                print(f"\nCiclo {ciclo}:")
-                print(f"  Na+ intracelular: {na_int} mM")
-                print(f"  K+ intracelular: {k_int} mM")
-                print(f"  ATP restante: {atp} unidades")
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        self.imprimir("\nCada célula parte de concentraciones y ATP ligeramente distintos")
+        self.imprimir("(Na+ int 10 mM, K+ int 140 mM, Na+ ext 145 mM, K+ ext 4 mM, ATP 100).\n")
+        n_celulas = max(1, await self.pedir_numero("Número de células", 1000))
+        ciclos = max(1, await self.pedir_numero("Ciclos de la bomba", 10))
+        
+        inicio = time.perf_counter()
+        ensemble = EnsambleBombaNaK.con_variabilidad(n_celulas, semilla=0)
+        estado_inicial = ensemble.resumen()
+        reposo_inicial = ensemble.potencial_reposo()
+        muestras = await self.calcular(ensemble.simular, ciclos)
+        segundos = time.perf_counter() - inicio
+        
+        etiquetas = [('na_int', 'Na+ int (mM)'), ('k_int', 'K+ int (mM)'),
+                     ('k_ext', 'K+ ext (mM)'), ('atp', 'ATP')]
+        
+        self.imprimir("\nEstado inicial (media ± desviación):")
+        for nombre, etiqueta in etiquetas:
+            r = estado_inicial[nombre]
+            self.imprimir(f"  {etiqueta:<14} {r['media']:8.1f} ± {r['desviacion']:.1f}")
+        
+        self.imprimir(f"\n{'CICLO':>10}" + "".join(f"{e:>15}" for _, e in etiquetas))
+        for ciclo, resumen in muestras:
+            self.imprimir(f"{ciclo:>10}" + "".join(f"{resumen[n]['media']:>15.1f}" for n, _ in etiquetas))
+        
+        grad_na, grad_k = ensemble.gradientes()
+        sin_atp = int((ensemble.atp == 0).sum())
+        
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir(f"RESULTADO FINAL ({n_celulas} células, {ciclos} ciclos, {segundos * 1000:.1f} ms):")
+        self.imprimir(f"Gradiente de Na+: {grad_na.mean():.1f} veces mayor en exterior "
+              f"(rango {grad_na.min():.1f}-{grad_na.max():.1f})")
+        self.imprimir(f"Gradiente de K+: {grad_k.mean():.1f} veces mayor en interior "
+              f"(rango {grad_k.min():.1f}-{grad_k.max():.1f})")
+        self.imprimir(f"Células sin ATP: {sin_atp} ({sin_atp / n_celulas * 100:.1f}%)")
+        reposo = ensemble.potencial_reposo()
+        self.imprimir(f"Potencial de reposo (GHK): {reposo_inicial.mean():.1f} mV al inicio, "
+                      f"{reposo.mean():.1f} ± {reposo.std():.1f} mV al final "
+                      f"(rango {reposo.min():.1f} a {reposo.max():.1f})")
+        
+        await self.leer("\nPresione Enter para continuar...")
+    
+    async def simular_potencial_accion(self):
+        """Barrido de estímulos sobre neuronas de Hodgkin-Huxley"""
+        self.mostrar_encabezado("SIMULACIÓN: POTENCIAL DE MEMBRANA Y POTENCIAL DE ACCIÓN")
+        
+        self.imprimir("El potencial de reposo sale de los gradientes de Na+ y K+ que mantiene")
+        self.imprimir("la bomba y de la permeabilidad de la membrana (ecuación GHK).")
+        self.imprimir("Un estímulo que supera el umbral abre los canales de Na+ dependientes de")
+        self.imprimir("voltaje: despolarización, repolarización por K+ e hiperpolarización.")
+        self.imprimir("-" * 70)
+        
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        self.imprimir("\nCada neurona parte de las concentraciones de una célula del ensemble de")
+        self.imprimir("la bomba Na+/K+, tras los ciclos de bomba indicados.\n")
+        por_amplitud = max(1, await self.pedir_numero("Neuronas por amplitud", 200))
+        maxima = max(0.0, await self.pedir_numero("Corriente máxima (µA/cm²)", 20.0, float))
+        ciclos = max(0, await self.pedir_numero("Ciclos de la bomba antes del estímulo", 0))
+        
+        amplitudes = np.linspace(0.0, maxima, 11)
+        milisegundos = 50.0
+        corrientes = np.repeat(amplitudes, por_amplitud)
+        inicio = time.perf_counter()
+        ensemble = EnsambleBombaNaK.con_variabilidad(len(corrientes), semilla=0)
+        ensemble.avanzar(ciclos)
+        resultado = await self.simular_con_cache(simular_hodgkin_huxley, corrientes, milisegundos,
+                                        na_int=ensemble.na_int, k_int=ensemble.k_int,
+                                        na_ext=ensemble.na_ext, k_ext=ensemble.k_ext)
+        duracion = time.perf_counter() - inicio
+        
+        self.imprimir(f"\nReposo {resultado['reposo'].mean():.1f} ± {resultado['reposo'].std():.1f} mV · "
+                      f"E(Na+) {resultado['e_na'].mean():.1f} mV · E(K+) {resultado['e_k'].mean():.1f} mV")
+        self.imprimir(f"\n{'ESTÍMULO':>10}  {'DISPARAN':>8}  {'ESPIGAS':>7}  {'FREC. (Hz)':>10}  {'LATENCIA (ms)':>13}")
+        for i, amplitud in enumerate(amplitudes):
+            grupo = slice(i * por_amplitud, (i + 1) * por_amplitud)
+            espigas = resultado['espigas'][grupo]
+            disparan = espigas > 0
+            latencia = (f"{np.nanmean(resultado['latencia'][grupo]):13.2f}"
+                        if disparan.any() else f"{'-':>13}")
+            self.imprimir(f"{amplitud:>10.1f}  {disparan.mean():>8.0%}  {espigas.mean():>7.1f}  "
+                          f"{resultado['frecuencia'][grupo].mean():>10.0f}  {latencia}")
         
-        print("\n" + "=" * 70)
-        print("RESULTADO FINAL:")
-        print(f"Gradiente de Na+: {na_ext/na_int:.1f} veces mayor en exterior")
-        print(f"Gradiente de K+: {k_int/k_ext:.1f} veces mayor en interior")
-        print(f"Potencial de membrana aproximado: -70 mV")
+        # Traza de la primera neurona del estímulo más bajo que dispara a todas
+        todas = [i for i in range(len(amplitudes))
+                 if (resultado['espigas'][i * por_amplitud:(i + 1) * por_amplitud] > 0).all()]
+        elegida = todas[0] if todas else len(amplitudes) - 1
+        self.imprimir(f"\nVoltaje de una neurona con {amplitudes[elegida]:.1f} µA/cm² "
+                      f"(pulso de 5 a 45 ms):")
+        for linea in grafica_voltaje(resultado['tiempos'], resultado['voltaje'][:, elegida * por_amplitud]):
+            self.imprimir(linea)
         
-        input("\nPresione Enter para continuar...")
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir(f"RESULTADO ({len(corrientes):,} neuronas, {milisegundos:.0f} ms "
+                      f"simulados, {duracion:.2f} s)")
+        
+        await self.leer("\nPresione Enter para continuar...")
     
-    def simular_cadena_respiratoria(self):
-        """Simula la cadena transportadora de electrones"""
+    async def simular_cadena_respiratoria(self):
+        """Simula la cinética de la cadena transportadora de electrones"""
         self.mostrar_encabezado("SIMULACIÓN: CADENA RESPIRATORIA")
         
-        print("Complejos de la cadena respiratoria:")
-        print("  1. NADH deshidrogenasa (Complejo I)")
-        print("  2. Succinato deshidrogenasa (Complejo II)")
-        print("  3. Citocromo bc1 (Complejo III)")
-        print("  4. Citocromo c oxidasa (Complejo IV)")
-        print("-" * 70)
+        self.imprimir("Complejos de la cadena respiratoria:")
+        self.imprimir("  1. NADH deshidrogenasa (Complejo I)")
+        self.imprimir("  2. Succinato deshidrogenasa (Complejo II)")
+        self.imprimir("  3. Citocromo bc1 (Complejo III)")
+        self.imprimir("  4. Citocromo c oxidasa (Complejo IV)")
+        self.imprimir("-" * 70)
         
-        print("\nFlujo de electrones y translocación de protones:")
-        print("  NADH → Complejo I → Q → Complejo III → Cit c → Complejo IV → O2")
-        print("  FADH2 → Complejo II → Q → Complejo III → Cit c → Complejo IV → O2")
-        print("-" * 70)
+        self.imprimir("\nFlujo de electrones y translocación de protones:")
+        self.imprimir("  NADH → Complejo I → Q → Complejo III → Cit c → Complejo IV → O2")
+        self.imprimir("  FADH2 → Complejo II → Q → Complejo III → Cit c → Complejo IV → O2")
+        self.imprimir("-" * 70)
+        
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        self.imprimir("\nModelo cinético: los complejos se frenan cuando el gradiente de")
+        self.imprimir("protones es alto (control respiratorio) y parte del gradiente se fuga.\n")
+        nadh = max(0.0, await self.pedir_numero("NADH disponible", 10.0, float))
+        fadh2 = max(0.0, await self.pedir_numero("FADH2 disponible", 6.0, float))
+        h_atp = max(1.0, await self.pedir_numero("H+ por ATP en la ATP sintasa", 4.0, float))
+        
+        resultado = await self.simular_con_cache(integrar_cadena_respiratoria, nadh, fadh2,
+                                                 h_atp=h_atp, muestras=8)
+        
+        self.imprimir(f"\n{'TIEMPO':>8}{'NADH':>10}{'FADH2':>10}{'QH2':>10}{'GRADIENTE H+':>15}{'ATP':>10}")
+        for t, estado in resultado['trayectoria']:
+            self.imprimir(f"{t:>8.1f}{estado[0]:>10.2f}{estado[1]:>10.2f}{estado[2]:>10.2f}"
+                  f"{estado[4]:>15.2f}{estado[5]:>10.2f}")
         
-        nadh = 10
-        fadh2 = 6
-        protones_matriz = 0
-        protones_intermembrana = 0
-        atp_producido = 0
-        
-        print("\nEstado inicial:")
-        print(f"  NADH disponible: {nadh}")
-        print(f"  FADH2 disponible: {fadh2}")
-        print(f"  ATP producido: {atp_producido}")
-        
-        print("\nPresione Enter para comenzar la simulación...")
-        input()
-        
-        # Procesar NADH
-        for i in range(min(5, nadh)):
-            protones_intermembrana += 10  # 4(I) + 4(III) + 2(IV)
-            atp_producido += 2.5  # 10 protones / 4 por ATP
-            print(f"\nNADH {i+1}: +10 H+ al espacio intermembrana, ATP total: {atp_producido:.1f}")
-        
-        # Procesar FADH2
-        for i in range(min(3, fadh2)):
-            protones_intermembrana += 6  # 0(II) + 4(III) + 2(IV)
-            atp_producido += 1.5  # 6 protones / 4 por ATP
-            print(f"\nFADH2 {i+1}: +6 H+ al espacio intermembrana, ATP total: {atp_producido:.1f}")
-        
-        print("\n" + "=" * 70)
-        print("RESULTADO FINAL:")
-        print(f"  Protones translocados: {protones_intermembrana}")
-        print(f"  ATP total producido: {atp_producido:.1f}")
-        print(f"  Eficiencia: {(atp_producido/(nadh*2.5 + fadh2*1.5))*100:.1f}%")
-        
-        input("\nPresione Enter para continuar...")
-    
-    def simular_ciclo_celular(self):
-        """Simula el ciclo celular y puntos de control"""
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir("RESULTADO FINAL:")
+        self.imprimir(f"  Protones translocados: {float(resultado['protones']):.1f}")
+        self.imprimir(f"  ATP total producido: {float(resultado['atp']):.1f}")
+        self.imprimir(f"  Cociente P/O: {float(resultado['p_o']):.2f}")
+        self.imprimir(f"  Eficiencia: {float(resultado['eficiencia']) * 100:.1f}% del máximo quimiosmótico")
+        
+        respuesta = (await self.leer("\n¿Generar mapa de eficiencia NADH × FADH2? (s/n): ")).strip().lower()
+        if respuesta == "s":
+            valores_nadh = np.linspace(2, 40, 12)
+            valores_fadh2 = np.linspace(0, 24, 16)
+            inicio = time.perf_counter()
+            barrido = await self.calcular(barrido_cadena_respiratoria,
+                                          valores_nadh, valores_fadh2, [h_atp])
+            segundos = time.perf_counter() - inicio
+            
+            self.imprimir(f"\nEficiencia con {h_atp:g} H+/ATP "
+                  f"({barrido['calculados']} puntos nuevos, {segundos:.2f} s):\n")
+            for linea in mapa_calor(barrido['eficiencia'][:, :, 0], valores_nadh,
+                                    valores_fadh2, "NADH", "FADH2"):
+                self.imprimir(linea)
+        
+        await self.leer("\nPresione Enter para continuar...")
+    
+    async def simular_ciclo_celular(self):
+        """Simula una población de células recorriendo el ciclo celular"""
         self.mostrar_encabezado("SIMULACIÓN: CICLO CELULAR")
         
-        fases = ["G1", "S", "G2", "M"]
-        puntos_control = ["G1/S", "G2/M", "Metafase/Anafase"]
+        self.imprimir("Fases del ciclo celular:")
+        self.imprimir("  1. G1: crecimiento celular y síntesis de componentes")
+        self.imprimir("  2. S:  replicación del ADN, síntesis de histonas, duplicación de centrosomas")
+        self.imprimir("  3. G2: preparación para la mitosis y síntesis del huso")
+        self.imprimir("  4. M:  mitosis (profase, metafase, anafase, telofase) y citocinesis")
         
-        print("Fases del ciclo celular:")
-        for i, fase in enumerate(fases):
-            print(f"  {i+1}. {fase}")
+        self.imprimir("\nPuntos de control (checkpoints):")
+        self.imprimir("  • G1/S: verifica tamaño celular y nutrientes")
+        self.imprimir("  • G2/M: verifica replicación completa")
+        self.imprimir("  • Metafase/Anafase: verifica unión cromosómica")
+        self.imprimir("-" * 70)
         
-        print("\nPuntos de control (checkpoints):")
-        for punto in puntos_control:
-            print(f"  • {punto}")
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
         
-        print("-" * 70)
+        self.imprimir("\nEn cada punto de control una célula puede detenerse (repite la fase)")
+        self.imprimir("o entrar en apoptosis. Las réplicas se reparten entre los núcleos.\n")
+        poblacion = max(1, await self.pedir_numero("Células iniciales", 1000000))
+        horas = max(1.0, await self.pedir_numero("Horas de cultivo", 72.0, float))
+        replicas = max(1, await self.pedir_numero("Réplicas independientes", 4))
         
-        print("\nSimulación del avance del ciclo celular:")
-        print("Presione Enter para avanzar a la siguiente fase...")
-        input()
+        inicio = time.perf_counter()
+        resultados = await self.simular_con_cache(simular_replicas_ciclo, poblacion, horas,
+                                                  replicas, semilla=0)
+        segundos = time.perf_counter() - inicio
         
-        for fase in fases:
-            print(f"\nFASE {fase}:")
-            
-            if fase == "G1":
-                print("  • Crecimiento celular")
-                print("  • Síntesis de componentes")
-                print("  • Checkpoint G1/S: verifica tamaño celular y nutrientes")
-            
-            elif fase == "S":
-                print("  • Replicación del ADN")
-                print("  • Síntesis de histonas")
-                print("  • Duplicación de centrosomas")
-            
-            elif fase == "G2":
-                print("  • Preparación para mitosis")
-                print("  • Síntesis de componentes del huso")
-                print("  • Checkpoint G2/M: verifica replicación completa")
-            
-            elif fase == "M":
-                print("  • Mitosis: Profase, Metafase, Anafase, Telofase")
-                print("  • Checkpoint metafase/anafase: verifica unión cromosómica")
-                print("  • Citocinesis: división celular")
-            
-            input("  Presione Enter para continuar...")
+        finales = np.array([r['totales'][-1] for r in resultados])
+        duplicacion = np.array([r['tiempo_duplicacion'] for r in resultados])
+        fases = np.mean([r['fases'] for r in resultados], axis=0)
+        muertes = np.mean([r['muertes'] for r in resultados], axis=0)
+        detenciones = np.mean([r['detenciones'] for r in resultados], axis=0)
+        divisiones = np.mean([r['divisiones'] for r in resultados])
+        aneuploides = np.mean([r['aneuploides'] for r in resultados])
+        
+        self.imprimir("\nDistribución de fases al final (media de réplicas):")
+        for fase, fraccion in zip(FASES_CICLO, fases):
+            barra = "█" * int(round(fraccion * 40))
+            self.imprimir(f"  {fase:<3} {fraccion * 100:5.1f}% {barra}")
+        
+        self.imprimir("\nPuntos de control (eventos por réplica):")
+        self.imprimir(f"  {'':<18}{'DETENCIONES':>14}{'APOPTOSIS':>14}")
+        for punto, det, muerte in zip(PUNTOS_CONTROL, detenciones, muertes):
+            self.imprimir(f"  {punto:<18}{det:>14,.0f}{muerte:>14,.0f}")
+        
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir(f"RESULTADO ({replicas} réplicas, {horas:.0f} h, {segundos:.2f} s):")
+        self.imprimir(f"  Población final: {finales.mean():,.0f} células "
+              f"(de {poblacion:,}; rango {finales.min():,}-{finales.max():,})")
+        self.imprimir(f"  Tiempo de duplicación: {duplicacion.mean():.1f} ± {duplicacion.std():.1f} h")
+        self.imprimir(f"  Divisiones completadas: {divisiones:,.0f}")
+        self.imprimir(f"  Divisiones con aneuploidía: {aneuploides:,.0f}")
+        
+        await self.leer("\nPresione Enter para continuar...")
+    
+    async def simular_frap_membrana(self):
+        """Simula un experimento FRAP de difusión lateral en la membrana"""
+        self.mostrar_encabezado("SIMULACIÓN: DIFUSIÓN EN LA MEMBRANA (FRAP)")
+        
+        self.imprimir("FRAP (recuperación de fluorescencia tras fotoblanqueo):")
+        self.imprimir("  - Se marcan lípidos y proteínas de membrana con un fluoróforo")
+        self.imprimir("  - Un láser blanquea una región circular de la membrana")
+        self.imprimir("  - La fluorescencia vuelve a medida que entran moléculas marcadas")
+        self.imprimir("  - La velocidad indica la difusión; la meseta, la fracción móvil")
+        self.imprimir("-" * 70)
+        
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        parametros = ParametrosFRAP()
+        self.imprimir(f"\nParche de {parametros.lado:.0f}×{parametros.lado:.0f} µm con {parametros.balsas} "
+                      f"balsas lipídicas (difusión ×{parametros.factor_balsa:g}).")
+        self.imprimir(f"D lípidos {parametros.d_lipido:g} µm²/s, D proteínas {parametros.d_proteina:g} µm²/s, "
+                      f"{parametros.fraccion_inmovil:.0%} de proteínas ancladas.\n")
+        particulas = max(100, await self.pedir_numero("Partículas", 100000))
+        segundos = max(parametros.dt, await self.pedir_numero("Segundos tras el blanqueo", 10.0, float))
+        
+        inicio = time.perf_counter()
+        resultado = await self.simular_con_cache(simular_frap, particulas, segundos, parametros,
+                                                 semilla=0)
+        duracion = time.perf_counter() - inicio
+        
+        tiempos = resultado['tiempos']
+        self.imprimir("\nRecuperación de la fluorescencia (1 = intensidad previa):")
+        self.imprimir(f"  {'t (s)':>7}  {'LÍPIDOS':<28}{'PROTEÍNAS':<28}")
+        for i in np.linspace(0, len(tiempos) - 1, 11).round().astype(int):
+            lipidos = resultado['recuperacion_lipidos'][i]
+            proteinas = resultado['recuperacion_proteinas'][i]
+            self.imprimir(f"  {tiempos[i]:7.2f}  {lipidos:4.2f} {'█' * int(round(lipidos * 20)):<23}"
+                          f"{proteinas:4.2f} {'█' * int(round(proteinas * 20)):<23}")
+        
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir(f"RESULTADO ({particulas:,} partículas, {resultado['pasos']} pasos, {duracion:.2f} s):")
+        for nombre, etiqueta in (('lipidos', "Lípidos"), ('proteinas', "Proteínas")):
+            self.imprimir(f"  {etiqueta}: fracción móvil {resultado[f'fraccion_movil_{nombre}']:.2f}, "
+                          f"t½ {resultado[f't_medio_{nombre}']:.2f} s, "
+                          f"D estimado {resultado[f'difusion_{nombre}']:.3f} µm²/s")
+        self.imprimir(f"  Partículas en balsas al final: {resultado['en_balsas']:.1%} "
+                      f"(las balsas ocupan el {resultado['fraccion_balsas']:.1%} del parche)")
+        
+        await self.leer("\nPresione Enter para continuar...")
+    
+    async def simular_filamentos(self):
+        """Simula la dinámica de microtúbulos o de filamentos de actina en directo"""
+        titulo = "SIMULACIÓN: INESTABILIDAD DINÁMICA DEL CITOESQUELETO"
+        self.mostrar_encabezado(titulo)
+        
+        self.imprimir("Microtúbulos (tema 7): crecen con tubulina-GTP hasta que una catástrofe")
+        self.imprimir("los hace despolimerizar rápidamente; un rescate los vuelve a hacer crecer.")
+        self.imprimir("Actina (tema 6): cada extremo tiene su concentración crítica y el")
+        self.imprimir("filamento avanza en cinta (treadmilling).")
+        self.imprimir("-" * 70)
+        
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        self.imprimir("\n1. Microtúbulos (taxol, nocodazol)")
+        self.imprimir("2. Filamentos de actina (citocalasina, latrunculina)")
+        tipo = (await self.leer("\nTipo [1]: ")).strip()
+        filamentos = max(1, await self.pedir_numero("Filamentos", 20000))
+        if tipo == "2":
+            actina = max(0.0, await self.pedir_numero("Actina total (µM)", 2.0, float))
+            citocalasina = max(0.0, await self.pedir_numero("Citocalasina (µM)", 0.0, float))
+            latrunculina = max(0.0, await self.pedir_numero("Latrunculina (µM)", 0.0, float))
+            minutos = max(0.1, await self.pedir_numero("Minutos simulados", 2.0, float))
+            poblacion = PoblacionActina(filamentos, actina, citocalasina, latrunculina, semilla=0)
+            condiciones = (f"Actina {actina:g} µM · citocalasina {citocalasina:g} µM · "
+                           f"latrunculina {latrunculina:g} µM")
+        else:
+            tubulina = max(0.0, await self.pedir_numero("Tubulina total (µM)", 10.0, float))
+            taxol = max(0.0, await self.pedir_numero("Taxol (µM)", 0.0, float))
+            nocodazol = max(0.0, await self.pedir_numero("Nocodazol (µM)", 0.0, float))
+            minutos = max(0.1, await self.pedir_numero("Minutos simulados", 10.0, float))
+            poblacion = PoblacionMicrotubulos(filamentos, tubulina, taxol, nocodazol, semilla=0)
+            condiciones = (f"Tubulina {tubulina:g} µM · taxol {taxol:g} µM · "
+                           f"nocodazol {nocodazol:g} µM")
+        
+        # Solo se dibujan fotogramas a ritmo fijo, no cada evento; sin
+        # terminal, solo el último
+        fotogramas = 50
+        intervalo = 1.0 / self.FOTOGRAMAS_POR_SEGUNDO
+        maximo = 0.5
+        for fotograma in range(1, fotogramas + 1):
+            inicio = time.perf_counter()
+            await self.calcular(poblacion.avanzar, minutos * 60.0 / fotogramas)
+            if not self.canal.ansi and fotograma < fotogramas:
+                continue
+            longitudes = poblacion.longitudes()
+            # El eje solo crece, para que el histograma no salte entre fotogramas
+            maximo = max(maximo, math.ceil(float(np.percentile(longitudes, 99)) * 2.4) / 2)
+            self.dibujar_filamentos(titulo, condiciones, poblacion, maximo)
+            await self.pantalla.enviar()
+            if self.canal.ansi:
+                await asyncio.sleep(max(0.0, intervalo - (time.perf_counter() - inicio)))
+        
+        await self.leer("\nPresione Enter para continuar...")
+    
+    def dibujar_filamentos(self, titulo, condiciones, poblacion, maximo):
+        """Compone un fotograma: histograma de longitudes y estado de la población"""
+        self.mostrar_encabezado(titulo)
+        resumen = poblacion.resumen()
+        self.imprimir(f"{condiciones} · t = {poblacion.tiempo / 60:.1f} min")
+        self.imprimir(f"\nLongitudes de {poblacion.filamentos:,} filamentos:")
+        cuentas, bordes = histograma_longitudes(poblacion.longitudes(), maximo)
+        mayor = max(int(cuentas.max()), 1)
+        for cuenta, desde, hasta in zip(cuentas, bordes[:-1], bordes[1:]):
+            barra = "█" * int(round(cuenta / mayor * 38))
+            self.imprimir(f"  {desde:5.2f}-{hasta:5.2f} µm {cuenta:>7,} {barra}")
+        
+        self.imprimir(f"\nLongitud media: {resumen['longitud_media']:.2f} µm · "
+                      f"monómero libre: {resumen['libre']:.2f} µM")
+        if isinstance(poblacion, PoblacionMicrotubulos):
+            self.imprimir(f"Creciendo: {resumen['creciendo']:.0%} · catástrofes "
+                          f"{resumen['catastrofes_min']:.2f}/min · rescates "
+                          f"{resumen['rescates_min']:.2f}/min por microtúbulo")
+        else:
+            self.imprimir(f"Extremos + tapados: {resumen['tapados']:.0%}")
+    
+    async def simular_meiosis(self):
+        """Simula la herencia de cromosomas a lo largo de generaciones de meiosis"""
+        self.mostrar_encabezado("SIMULACIÓN: MEIOSIS Y GENÉTICA DE POBLACIONES")
+        
+        self.imprimir("En la meiosis (tema 20) cada bivalente forma al menos un quiasma:")
+        self.imprimir("  - El sobrecruzamiento mezcla los alelos de los homólogos")
+        self.imprimir("  - Los loci cercanos se heredan juntos (ligamiento) más tiempo")
+        self.imprimir("  - La deriva genética fija alelos y reduce la heterocigosidad")
+        self.imprimir("  - La no disyunción produce gametos con 0 o 2 copias de un cromosoma")
+        self.imprimir("-" * 70)
+        
+        if np is None:
+            self.imprimir("\nEsta simulación requiere NumPy (pip install numpy).")
+            await self.leer("\nPresione Enter para continuar...")
+            return
+        
+        individuos = max(10, await self.pedir_numero("\nIndividuos", 5000))
+        cromosomas = max(1, await self.pedir_numero("Pares de cromosomas", 4))
+        loci = max(8, await self.pedir_numero("Loci por cromosoma", 1024))
+        generaciones = max(1, await self.pedir_numero("Generaciones", 200))
+        p_no_disyuncion = min(0.5, max(0.0, await self.pedir_numero(
+            "Probabilidad de no disyunción por cromosoma", 0.002, float)))
+        
+        inicio = time.perf_counter()
+        simulacion = await self.simular_con_cache(simular_meiosis, individuos, cromosomas, loci,
+                                                  generaciones, p_no_disyuncion, semilla=0)
+        resultados = simulacion['resumenes']
+        duracion = time.perf_counter() - inicio
+        
+        self.imprimir(f"\n{'GEN':>5}  {'HETEROCIG.':>10}  {'ESPERADA':>8}  {'FIJADOS':>7}  "
+                      f"{'r² CERCA':>8}  {'r² LEJOS':>8}  {'ANEUPL. ‰':>9}")
+        for r in resultados:
+            self.imprimir(f"{r['generacion']:>5}  {r['heterocigosidad']:>10.4f}  "
+                          f"{r['heterocigosidad_esperada']:>8.4f}  {r['fijados']:>7.1%}  "
+                          f"{r['r2_cercanos']:>8.3f}  {r['r2_lejanos']:>8.3f}  "
+                          f"{r['aneuploidias'] * 1000:>9.2f}")
         
-        print("\n" + "=" * 70)
-        print("Ciclo celular completado:")
-        print("  1 célula madre → 2 células hijas")
-        print("  ADN duplicado y segregado correctamente")
+        final = resultados[-1]
+        self.imprimir("\n" + "=" * 70)
+        self.imprimir(f"RESULTADO ({individuos:,} individuos, {generaciones} generaciones, {duracion:.2f} s):")
+        self.imprimir(f"  Cigotos formados: {simulacion['cigotos']:,}")
+        for cromosoma in range(cromosomas):
+            self.imprimir(f"  Cromosoma {cromosoma + 1}: trisomías {final['trisomias'][cromosoma] * 1000:.2f} ‰, "
+                          f"monosomías {final['monosomias'][cromosoma] * 1000:.2f} ‰")
+        self.imprimir(f"  Memoria de la población: {simulacion['bytes'] / 1024:,.0f} KB "
+                      f"({simulacion['bits_por_locus']:.2f} bits por locus)")
         
-        input("\nPresione Enter para continuar...")
+        await self.leer("\nPresione Enter para continuar...")
+
+# ===========================================================================
+# SERVIDOR MULTISESIÓN
+# ===========================================================================
+
+class ServidorEstudio:
+    """Servidor TCP/telnet que atiende muchas sesiones en un solo proceso
+
+    Cada conexión tiene su propia InterfazEstudio con el progreso de su
+    estudiante (en la base de datos SQLite común), pero todas comparten el
+    mismo diccionario de temas, que se carga una sola vez. Abrir, leer,
+    escribir y cerrar la base de datos se hace en el executor, así que una
+    escritura lenta solo hace esperar a su propia sesión.
+    """
+
+    def __init__(self, ruta_bd='progreso_biocel.db', host='127.0.0.1',
+                 puerto=2323, max_sesiones=500):
+        self.ruta_bd = ruta_bd
+        self.host = host
+        self.puerto = puerto
+        self.max_sesiones = max_sesiones
+        self.temas = SistemaEstudio(AlmacenMemoria()).temas
+        self.sesiones = 0
+
+    async def atender(self, lector, escritor):
+        """Ciclo de vida de una conexión"""
+        canal = CanalTelnet(lector, escritor)
+        almacen = None
+        try:
+            if self.sesiones >= self.max_sesiones:
+                canal.escribir("Servidor completo, inténtelo más tarde.\n")
+                await canal.vaciar()
+                return
+            self.sesiones += 1
+            try:
+                canal.escribir("\nSISTEMA DE ESTUDIO DE BIOLOGÍA CELULAR\n\nNombre de estudiante: ")
+                await canal.vaciar()
+                nombre = (await canal.leer_linea()).strip()
+                if not nombre:
+                    return
+                bucle = asyncio.get_running_loop()
+                almacen = await bucle.run_in_executor(None, AlmacenSQLite, self.ruta_bd, nombre)
+                # Crear la interfaz carga el progreso del estudiante
+                interfaz = await bucle.run_in_executor(None, functools.partial(
+                    InterfazEstudio, almacen, canal=canal, temas=self.temas))
+                await interfaz.menu_principal()
+            finally:
+                self.sesiones -= 1
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            if almacen is not None:
+                await asyncio.get_running_loop().run_in_executor(None, almacen.cerrar)
+            escritor.close()
+
+    async def servir(self):
+        """Acepta conexiones hasta que se interrumpa el proceso"""
+        servidor = await asyncio.start_server(self.atender, self.host, self.puerto)
+        direcciones = ", ".join(str(s.getsockname()) for s in servidor.sockets)
+        print(f"Servidor de estudio escuchando en {direcciones}")
+        async with servidor:
+            await servidor.serve_forever()
+
+# ===========================================================================
+# REPRODUCCIÓN DE SESIONES (PRUEBAS DE CARGA)
+# ===========================================================================
+
+@dataclass
+class ResultadoCarga:
+    """Resumen de una reproducción masiva de sesiones"""
+    sesiones: int
+    completas: int
+    entradas: int
+    tests: int
+    segundos: float
+
+    @property
+    def sesiones_por_minuto(self):
+        return 60.0 * self.sesiones / self.segundos if self.segundos else 0.0
+
+async def reproducir_sesiones(grabaciones, sesiones, concurrencia=100, ruta_bd=None):
+    """Reproduce sesiones grabadas como `sesiones` estudiantes sintéticos
+
+    Cada estudiante repite una de las grabaciones (por turnos) en su propia
+    InterfazEstudio, con el temario compartido y sin esperas. Sin ruta_bd
+    el progreso queda en memoria; con ruta_bd cada estudiante sintético
+    guarda el suyo en la base de datos SQLite, como en el servidor.
+    """
+    temas = SistemaEstudio(AlmacenMemoria()).temas
+    limite = asyncio.Semaphore(concurrencia)
+    totales = {'completas': 0, 'entradas': 0, 'tests': 0}
+
+    async def sesion(numero):
+        async with limite:
+            almacen = (AlmacenSQLite(ruta_bd, f"sintetico-{numero:06d}") if ruta_bd
+                       else AlmacenMemoria())
+            canal = CanalReproduccion(grabaciones[numero % len(grabaciones)])
+            interfaz = InterfazEstudio(almacen, canal=canal, temas=temas)
+            try:
+                await interfaz.menu_principal()
+                totales['completas'] += 1
+            except EOFError:
+                pass
+            finally:
+                totales['entradas'] += canal.posicion
+                totales['tests'] += interfaz.sistema.numero_tests()
+                almacen.cerrar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(sesion(i) for i in range(sesiones)))
+    return ResultadoCarga(sesiones=sesiones, segundos=time.perf_counter() - inicio, **totales)
 
 # ===========================================================================
 # PROGRAMA PRINCIPAL
 # ===========================================================================
 
+def crear_almacen(args):
+    """Elige el almacén de progreso según los argumentos de línea de comandos"""
+    if args.bd:
+        return AlmacenSQLite(args.bd, args.estudiante)
+    return DiarioProgreso()
+
+def corregir_desde_csv(args):
+    """Corrige un CSV de hojas de respuestas sin abrir la interfaz"""
+    sistema = SistemaEstudio(AlmacenMemoria())
+    if args.tema not in sistema.temas:
+        print(f"Error: El tema {args.tema} no existe.")
+        return
+    tema = sistema.temas[args.tema]
+    
+    try:
+        estudiantes, numeros, respuestas = leer_hojas_csv(args.corregir, tema)
+        inicio = time.perf_counter()
+        resultado = corregir_lote(tema, estudiantes, respuestas, numeros)
+    except ValueError as e:
+        print(f"Error: {e}.")
+        return
+    segundos = time.perf_counter() - inicio
+    mostrar_resultado_lote(resultado, tema, numeros, segundos)
+    
+    if args.bd:
+        almacen = AlmacenSQLite(args.bd, args.estudiante)
+        almacen.registrar_grupo(resultado.estudiantes, resultado.registros)
+        almacen.cerrar()
+        print(f"\nHistorial guardado en {args.bd}")
+
+def calibrar_desde_bd(ruta_bd):
+    """Calibra las preguntas con las respuestas de todo el grupo y guarda el resultado"""
+    sistema = SistemaEstudio(AlmacenMemoria())
+    almacen = AlmacenSQLite(ruta_bd)
+    respuestas = almacen.respuestas_grupo()
+    if not respuestas:
+        print(f"No hay respuestas registradas en {ruta_bd}.")
+        almacen.cerrar()
+        return
+    
+    # Índices contiguos para estudiantes y preguntas
+    ids_estudiante = {}
+    items = []
+    ids_item = {}
+    for estudiante_id, tema_num, clave, _ in respuestas:
+        ids_estudiante.setdefault(estudiante_id, len(ids_estudiante))
+        if (tema_num, clave) not in ids_item:
+            ids_item[(tema_num, clave)] = len(items)
+            items.append((tema_num, clave))
+    
+    medias = almacen.notas_medias_grupo()
+    notas_previas = [50.0] * len(ids_estudiante)
+    for estudiante_id, indice in ids_estudiante.items():
+        notas_previas[indice] = medias.get(estudiante_id, 50.0)
+    
+    # Las preguntas que ya no están en el temario parten del nivel por defecto
+    niveles = {(tema.numero, clave_pregunta(p['enunciado'], p['opciones'])):
+               p.get('nivel_dificultad', PreguntaTest.nivel_dificultad)
+               for tema in sistema.temas.values() for p in tema.preguntas}
+    dificultad_inicial = [
+        DIFICULTAD_NIVEL.get(niveles.get(item, PreguntaTest.nivel_dificultad), 0.0)
+        for item in items]
+    
+    inicio = time.perf_counter()
+    discriminacion, dificultad, conteos = calibrar_items(
+        [ids_estudiante[r[0]] for r in respuestas],
+        [ids_item[(r[1], r[2])] for r in respuestas],
+        [r[3] for r in respuestas],
+        notas_previas, dificultad_inicial)
+    segundos = time.perf_counter() - inicio
+    
+    almacen.guardar_parametros_irt({
+        item: (float(discriminacion[i]), float(dificultad[i]), int(conteos[i]))
+        for i, item in enumerate(items)})
+    almacen.cerrar()
+    print(f"Calibradas {len(items)} preguntas con {len(respuestas)} respuestas de "
+          f"{len(ids_estudiante)} estudiantes en {segundos:.2f} s")
+
+def compilar_contenido(ruta=RUTA_CONTENIDO):
+    """Compila el temario definido en el código a un snapshot binario"""
+    sistema = SistemaEstudio(AlmacenMemoria(), ruta_contenido=None, ruta_banco=None)
+    TemarioCompilado.compilar(sistema.temas, ruta)
+    preguntas = sum(len(t.preguntas) for t in sistema.temas.values())
+    print(f"Contenido compilado en {ruta}: {len(sistema.temas)} temas, {preguntas} preguntas")
+
+def importar_desde_archivos(rutas, ruta_banco=RUTA_BANCO):
+    """Importa bancos de preguntas externos y muestra el resultado"""
+    temas = SistemaEstudio(AlmacenMemoria(), ruta_banco=None).temas
+    try:
+        resultado = importar_preguntas(rutas, temas, ruta_banco)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}.")
+        return
+    mostrar_resultado_importacion(resultado, ruta_banco)
+
+def prueba_de_carga(args):
+    """Reproduce las grabaciones indicadas con muchos estudiantes sintéticos"""
+    grabaciones = [CanalReproduccion.leer_grabacion(ruta) for ruta in args.reproducir]
+    resultado = asyncio.run(reproducir_sesiones(grabaciones, args.sesiones,
+                                                args.concurrencia, args.bd))
+    print(f"Sesiones reproducidas: {resultado.sesiones} ({resultado.completas} completas)")
+    print(f"Entradas procesadas:   {resultado.entradas}")
+    print(f"Tests registrados:     {resultado.tests}")
+    print(f"Tiempo total:          {resultado.segundos:.2f} s "
+          f"({resultado.sesiones_por_minuto:,.0f} sesiones/minuto)")
+
+def activar_instrumentacion(prefijo):
+    """Activa los tramos y programa su exportación al salir y con SIGUSR1"""
+    instrumentacion.activar()
+    atexit.register(instrumentacion.exportar, prefijo)
+    if hasattr(signal, 'SIGUSR1'):
+        # El manejador solo avisa: exportar toma el cerrojo de los histogramas,
+        # que el hilo principal puede tener cogido cuando llega la señal
+        solicitud = threading.Event()
+
+        def exportador():
+            while True:
+                solicitud.wait()
+                solicitud.clear()
+                try:
+                    instrumentacion.exportar(prefijo)
+                except OSError as e:
+                    print(f"No se pudieron exportar los tiempos: {e}", file=sys.stderr)
+
+        threading.Thread(target=exportador, name='exportar-tiempos', daemon=True).start()
+        signal.signal(signal.SIGUSR1, lambda *_: solicitud.set())
+
 def main():
     """Función principal del programa"""
+    parser = argparse.ArgumentParser(description="Sistema de estudio de Biología Celular")
+    parser.add_argument('--bd', metavar='RUTA',
+                        help="base de datos SQLite compartida por varios estudiantes")
+    parser.add_argument('--estudiante', default='local',
+                        help="nombre del estudiante dentro de la base de datos (--bd)")
+    parser.add_argument('--corregir', metavar='CSV',
+                        help="corrige un CSV de hojas de respuestas (requiere --tema)")
+    parser.add_argument('--tema', type=int, help="tema del test que se corrige")
+    parser.add_argument('--compilar-contenido', action='store_true',
+                        help="compila el temario a contenido_biocel.bin para arrancar más rápido")
+    parser.add_argument('--importar', metavar='RUTA', nargs='+',
+                        help="importa preguntas de archivos JSON-lines o CSV a preguntas_biocel.bin")
+    parser.add_argument('--calibrar', action='store_true',
+                        help="calibra las preguntas para el test adaptativo con las respuestas de --bd")
+    parser.add_argument('--instrumentar', metavar='PREFIJO',
+                        help="mide tiempos y los exporta a PREFIJO.json y PREFIJO.prom "
+                             "al salir (y con la señal SIGUSR1)")
+    parser.add_argument('--grabar', metavar='RUTA',
+                        help="graba las entradas de la sesión para reproducirla después")
+    parser.add_argument('--reproducir', metavar='RUTA', nargs='+',
+                        help="reproduce sesiones grabadas sin terminal (prueba de carga)")
+    parser.add_argument('--sesiones', type=int, default=1000,
+                        help="estudiantes sintéticos en la reproducción")
+    parser.add_argument('--concurrencia', type=int, default=100,
+                        help="sesiones reproducidas a la vez")
+    parser.add_argument('--servidor', action='store_true',
+                        help="atiende sesiones por TCP/telnet (progreso en --bd)")
+    parser.add_argument('--host', default='127.0.0.1', help="dirección del servidor")
+    parser.add_argument('--puerto', type=int, default=2323, help="puerto del servidor")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help=f"recalcula siempre las simulaciones, sin usar ni llenar "
+                             f"{RUTA_CACHE_SIMULACIONES}/")
+    args = parser.parse_args()
+    
+    if args.instrumentar:
+        activar_instrumentacion(args.instrumentar)
+    if args.sin_cache:
+        cache_simulaciones.activa = False
+    
+    if args.compilar_contenido:
+        compilar_contenido()
+        return
+    
+    if args.importar:
+        importar_desde_archivos(args.importar)
+        return
+    
+    if args.calibrar:
+        if not args.bd:
+            parser.error("--calibrar requiere --bd")
+        calibrar_desde_bd(args.bd)
+        return
+    
+    if args.reproducir:
+        prueba_de_carga(args)
+        return
+    
+    if args.servidor:
+        servidor = ServidorEstudio(args.bd or 'progreso_biocel.db', args.host, args.puerto)
+        try:
+            asyncio.run(servidor.servir())
+        except KeyboardInterrupt:
+            print("\nServidor detenido.")
+        return
+    
+    if args.corregir:
+        if args.tema is None:
+            parser.error("--corregir requiere --tema")
+        corregir_desde_csv(args)
+        return
+    
     print("\n" + "=" * 70)
     print("SISTEMA DE ESTUDIO DE BIOLOGÍA CELULAR")
     print("Basado en el temario completo del curso 2025-2026")
     print("=" * 70 + "\n")
     
+    canal = CanalTerminal()
+    if args.grabar:
+        canal = CanalGrabacion(canal, args.grabar)
     try:
         # Iniciar interfaz
-        interfaz = InterfazEstudio()
+        interfaz = InterfazEstudio(crear_almacen(args), canal=canal)
+        asyncio.run(interfaz.menu_principal())
     except KeyboardInterrupt:
         print("\n\nPrograma interrumpido por el usuario.")
     except Exception as e:
         print(f"\nError inesperado: {e}")
         print("El programa se cerrará.")
+    finally:
+        canal.cerrar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,851 @@
+"""Pruebas de regresión de BIO-CEL INTERACTIVE (python -m pytest)"""
+
+import asyncio
+import copy
+import json
+import random
+import threading
+
+import pytest
+
+import biocel_interactive as bio
+
+
+def test_pregunta_importada_con_seis_opciones_se_puede_acertar(tmp_path):
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                               ruta_generadas=None).temas
+    ruta = tmp_path / "preguntas.jsonl"
+    ruta.write_text(json.dumps({
+        'tema': 1,
+        'enunciado': "¿Qué orgánulo tiene seis opciones en esta prueba?",
+        'opciones': ["Núcleo", "Ribosoma", "Lisosoma", "Peroxisoma", "Vacuola", "Mitocondria"],
+        'respuesta': "F",
+        'explicacion': "Es la sexta opción.",
+        'nivel_dificultad': "facil"
+    }) + "\n", encoding='utf-8')
+    banco = str(tmp_path / "preguntas.bin")
+    resultado = bio.importar_preguntas([str(ruta)], temas, banco, procesos=1)
+    assert resultado.importadas == 1
+
+    almacen = bio.AlmacenMemoria()
+    interfaz = bio.InterfazEstudio(almacen, canal=bio.CanalReproduccion(["F"] + [""] * 5))
+    interfaz.sistema = bio.SistemaEstudio(almacen, ruta_contenido=None, ruta_banco=banco,
+                                          ruta_generadas=None)
+    tema = interfaz.sistema.temas[1]
+    indice = next(i for i, p in enumerate(tema.preguntas) if len(p['opciones']) == 6)
+    asyncio.run(interfaz.ejecutar_test(tema, [indice]))
+    assert almacen.historial[-1]['nota'] == 100
+
+
+def test_distractor_de_pregunta_generada_no_encuentra_el_tema(tmp_path):
+    sistema = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=str(tmp_path / "generadas.pkl"))
+    # «Clatrina» es concepto del tema 13 y aparece como distractor en el tema 1
+    assert any(j != pregunta['respuesta'] and "clatrina" in opcion.lower()
+               for pregunta in sistema.temas[1].preguntas
+               for j, opcion in enumerate(pregunta['opciones']))
+    encontrados = [tema for tema, _, _ in sistema.buscar("clatrina", limite=50)]
+    assert 13 in encontrados
+    assert 1 not in encontrados
+
+
+def test_cache_de_generadas_se_invalida_al_cambiar_otro_tema(tmp_path):
+    ruta = str(tmp_path / "generadas.pkl")
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                               ruta_generadas=None).temas
+    bio.CachePreguntasGeneradas(ruta).obtener(temas)
+
+    # Los distractores del tema 1 salen de los conceptos de los demás temas
+    temas[13].conceptos_clave = [c.replace("clatrina", "fosfolipasa") for c in temas[13].conceptos_clave]
+    desde_cache = bio.CachePreguntasGeneradas(ruta).obtener(temas)
+    nuevas = bio.generar_preguntas(temas)
+    for numero in temas:
+        assert ([p['opciones'] for p in desde_cache[numero]]
+                == [p['opciones'] for p in nuevas[numero]])
+
+
+def test_repaso_sigue_a_la_pregunta_al_insertar_otra_delante(tmp_path):
+    ruta = str(tmp_path / "progreso.db")
+    sistema = bio.SistemaEstudio(bio.AlmacenSQLite(ruta), ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=None)
+    sistema.cargar_progreso()
+    repasada = sistema.temas[1].preguntas[0]
+    sistema.responder_pregunta(1, 0, True)
+    sistema.almacen.cerrar()
+
+    sistema = bio.SistemaEstudio(bio.AlmacenSQLite(ruta), ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=None)
+    sistema.cargar_progreso()
+    tema = sistema.temas[1]
+    tema.preguntas = [{
+        'enunciado': "¿Qué orgánulo se añade al principio del banco?",
+        'opciones': ["Núcleo", "Ribosoma", "Lisosoma", "Peroxisoma"],
+        'respuesta': 0,
+        'explicacion': "Pregunta nueva."
+    }] + list(tema.preguntas)
+    sistema.actualizar_tema(tema)
+    assert sistema.temas[1].preguntas[1]['enunciado'] == repasada['enunciado']
+
+    # La pregunta repasada no vence hasta mañana: sale la última
+    orden = sistema.preguntas_repaso(1, len(tema.preguntas))
+    assert orden[0] != 1
+    assert orden[-1] == 1
+
+
+def test_calibracion_sigue_a_la_pregunta_al_insertar_otra_delante(tmp_path):
+    ruta = str(tmp_path / "grupo.db")
+    for estudiante, correcta in (("ana", True), ("luis", False), ("eva", True)):
+        sistema = bio.SistemaEstudio(bio.AlmacenSQLite(ruta, estudiante), ruta_contenido=None,
+                                     ruta_banco=None, ruta_generadas=None)
+        sistema.cargar_progreso()
+        sistema.responder_pregunta(1, 0, correcta)
+        sistema.almacen.cerrar()
+    bio.calibrar_desde_bd(ruta)
+
+    sistema = bio.SistemaEstudio(bio.AlmacenSQLite(ruta), ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=None)
+    calibrada = sistema.temas[1].preguntas[0]
+    clave = bio.clave_pregunta(calibrada['enunciado'], calibrada['opciones'])
+    parametros = sistema.almacen.parametros_irt()
+    assert list(parametros) == [(1, clave)]
+
+    tema = sistema.temas[1]
+    tema.preguntas = [{
+        'enunciado': "¿Qué orgánulo se añade al principio del banco?",
+        'opciones': ["Núcleo", "Ribosoma", "Lisosoma", "Peroxisoma"],
+        'respuesta': 0,
+        'explicacion': "Pregunta nueva."
+    }] + list(tema.preguntas)
+    sistema.actualizar_tema(tema)
+    discriminacion, dificultad = sistema.parametros_items(1)
+    assert (discriminacion[1], dificultad[1]) == parametros[(1, clave)]
+    assert discriminacion[0] == 1.0
+
+
+def test_cabecera_csv_con_preguntas_fuera_del_tema(tmp_path):
+    tema = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                              ruta_generadas=None).temas[1]
+    ruta = tmp_path / "hojas.csv"
+    for cabecera in ("estudiante,1,x", "estudiante,0,1", f"estudiante,1,{len(tema.preguntas) + 1}"):
+        ruta.write_text(cabecera + "\nana,A,B\n", encoding='utf-8')
+        with pytest.raises(ValueError, match="no es un número de pregunta"):
+            bio.leer_hojas_csv(str(ruta), tema)
+
+    ruta.write_text("estudiante,2,1\nana,A,B\n", encoding='utf-8')
+    estudiantes, numeros, _ = bio.leer_hojas_csv(str(ruta), tema)
+    assert (estudiantes, numeros) == (["ana"], [1, 0])
+
+
+def test_integracion_sin_pasos_se_rechaza():
+    with pytest.raises(ValueError, match="ningún paso"):
+        bio.integrar_cadena_respiratoria(10.0, 2.0, t_final=0.0)
+
+
+def test_cache_del_barrido_tiene_tamano_maximo(monkeypatch):
+    monkeypatch.setattr(bio, '_cache_barrido', bio.OrderedDict())
+    monkeypatch.setattr(bio, 'CAPACIDAD_CACHE_BARRIDO', 4)
+    primero = bio.barrido_cadena_respiratoria([1.0, 2.0], [0.5, 1.0], [4.0], procesos=1)
+    assert primero['calculados'] == 4
+
+    # Reusar (1, 0.5) la hace la más reciente: salen (1, 1) y (2, 0.5)
+    bio.barrido_cadena_respiratoria([1.0], [0.5], [4.0], procesos=1)
+    segundo = bio.barrido_cadena_respiratoria([3.0], [0.5, 1.0], [4.0], procesos=1)
+    assert segundo['calculados'] == 2
+    assert len(bio._cache_barrido) == 4
+    assert [p[:2] for p in bio._cache_barrido] == [(2.0, 1.0), (1.0, 0.5), (3.0, 0.5), (3.0, 1.0)]
+
+
+def test_preguntas_repetidas_entran_todas_en_la_cola_de_repaso():
+    sistema = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=None)
+    tema = sistema.temas[1]
+    tema.preguntas = [tema.preguntas[0], tema.preguntas[1], tema.preguntas[0]]
+    sistema.actualizar_tema(tema)
+    assert sorted(sistema.preguntas_repaso(1, 3)) == [0, 1, 2]
+
+    # Comparten clave: contestar una reprograma las dos
+    sistema.responder_pregunta(1, 2, True)
+    orden = sistema.preguntas_repaso(1, 3)
+    assert orden[0] == 1
+    assert sorted(orden[1:]) == [0, 2]
+
+
+def _registro(tema, nota, fecha="2024-01-01 10:00"):
+    return {'fecha': fecha, 'tema': tema, 'preguntas_totales': 4,
+            'correctas': round(nota / 25), 'nota': nota}
+
+
+def _sistema_con_diario(tmp_path):
+    almacen = bio.DiarioProgreso(str(tmp_path / "progreso.pkl"), str(tmp_path / "progreso.diario"))
+    sistema = bio.SistemaEstudio(almacen, ruta_contenido=None, ruta_banco=None,
+                                 ruta_generadas=None)
+    sistema.cargar_progreso()
+    return sistema
+
+
+def test_diario_reproduce_los_eventos_al_cargar(tmp_path):
+    sistema = _sistema_con_diario(tmp_path)
+    sistema.marcar_estudiado(2)
+    sistema.registrar_test(_registro(2, 50.0))
+    sistema.registrar_test(_registro(2, 75.0))
+    sistema.almacen.cerrar()
+
+    sistema = _sistema_con_diario(tmp_path)
+    assert sistema.progreso[2]['estudiado']
+    assert sistema.progreso[2]['tests_completados'] == 2
+    assert sistema.progreso[2]['mejor_nota'] == 75.0
+    assert sistema.eventos_sin_compactar == 5
+    assert [r['nota'] for r in sistema.almacen.leer_historial()] == [50.0, 75.0]
+    sistema.almacen.cerrar()
+
+
+def test_diario_solo_reproduce_los_eventos_posteriores_al_snapshot(tmp_path):
+    sistema = _sistema_con_diario(tmp_path)
+    sistema.registrar_test(_registro(3, 25.0))
+    sistema.guardar_progreso()
+    sistema.registrar_test(_registro(3, 100.0))
+    sistema.almacen.cerrar()
+
+    sistema = _sistema_con_diario(tmp_path)
+    assert sistema.eventos_sin_compactar == 2     # el test y su mejor nota
+    assert sistema.progreso[3]['tests_completados'] == 2
+    assert sistema.progreso[3]['mejor_nota'] == 100.0
+    assert sistema.numero_tests() == 2
+    sistema.almacen.cerrar()
+
+
+def test_diario_descarta_la_ultima_linea_cortada(tmp_path):
+    sistema = _sistema_con_diario(tmp_path)
+    sistema.registrar_test(_registro(4, 50.0))
+    sistema.almacen.cerrar()
+    diario = tmp_path / "progreso.diario"
+    completo = diario.read_bytes()
+    # Cierre abrupto a mitad de escribir un evento
+    diario.write_bytes(completo + b'{"tipo": "estudiado", "te')
+
+    sistema = _sistema_con_diario(tmp_path)
+    assert diario.read_bytes() == completo
+    assert not sistema.progreso[4]['estudiado']
+    assert sistema.progreso[4]['tests_completados'] == 1
+    sistema.marcar_estudiado(4)
+    sistema.almacen.cerrar()
+
+    sistema = _sistema_con_diario(tmp_path)
+    assert sistema.progreso[4]['estudiado']
+    assert sistema.progreso[4]['mejor_nota'] == 50.0
+    sistema.almacen.cerrar()
+
+
+def test_sqlite_guarda_y_recupera_el_progreso_de_cada_estudiante(tmp_path):
+    ruta = str(tmp_path / "grupo.db")
+    for estudiante, nota in (("ana", 75.0), ("luis", 25.0)):
+        sistema = bio.SistemaEstudio(bio.AlmacenSQLite(ruta, estudiante), ruta_contenido=None,
+                                     ruta_banco=None, ruta_generadas=None)
+        sistema.cargar_progreso()
+        sistema.marcar_estudiado(1)
+        sistema.registrar_test(_registro(1, nota))
+        sistema.responder_pregunta(1, 0, nota > 50)
+        sistema.notas[1] = f"apuntes de {estudiante}"
+        sistema.guardar_progreso()
+        sistema.almacen.cerrar()
+
+    almacen = bio.AlmacenSQLite(ruta, "ana")
+    snapshot, eventos = almacen.cargar()
+    assert eventos == []
+    assert snapshot['progreso'] == {1: {'estudiado': True, 'horas_estudio': 0,
+                                        'tests_completados': 1, 'mejor_nota': 75.0}}
+    assert list(snapshot['notas'].values()) == ["apuntes de ana"]
+    assert list(snapshot['repaso']) == [1] and len(snapshot['repaso'][1]) == 1
+    assert list(almacen.leer_historial()) == [_registro(1, 75.0)]
+    assert almacen.mejores_notas() == {1: 75.0}
+    assert almacen.numero_tests() == 1
+    assert sorted(correcta for _, _, _, correcta in almacen.respuestas_grupo()) == [0, 1]
+    almacen.cerrar()
+
+    assert bio.AlmacenSQLite(str(tmp_path / "vacia.db"), "ana").cargar() == (None, [])
+
+
+def test_sqlite_registra_un_grupo_sin_mezclar_estudiantes(tmp_path):
+    almacen = bio.AlmacenSQLite(str(tmp_path / "grupo.db"), "profesor")
+    almacen.registrar_grupo(["ana", "luis", "ana"],
+                            [_registro(6, 50.0), _registro(6, 100.0),
+                             _registro(6, 75.0, "2024-01-02 10:00")])
+    almacen.cerrar()
+
+    ana = bio.AlmacenSQLite(str(tmp_path / "grupo.db"), "ana")
+    assert [r['nota'] for r in ana.leer_historial()] == [50.0, 75.0]
+    assert ana.ultimos_tests(1) == [_registro(6, 75.0, "2024-01-02 10:00")]
+    snapshot, _ = ana.cargar()
+    assert snapshot['progreso'][6]['tests_completados'] == 2
+    assert snapshot['progreso'][6]['mejor_nota'] == 75.0
+    assert bio.AlmacenSQLite(str(tmp_path / "grupo.db"), "profesor").numero_tests() == 0
+    ana.cerrar()
+
+
+def _compilar_temario(tmp_path, origen=None):
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                               ruta_generadas=None).temas
+    ruta = str(tmp_path / "contenido.bin")
+    bio.TemarioCompilado.compilar(temas, ruta, origen)
+    return temas, ruta
+
+
+def _sistema_compilado(ruta):
+    return bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=ruta, ruta_banco=None,
+                              ruta_generadas=None)
+
+
+def test_temario_compilado_al_dia_se_usa(tmp_path):
+    temas, ruta = _compilar_temario(tmp_path)
+    sistema = _sistema_compilado(ruta)
+    assert isinstance(sistema.temas, bio.TemarioPerezoso)
+    assert list(sistema.temas) == sorted(temas)
+    assert list(sistema.temas[7].preguntas) == list(temas[7].preguntas)
+
+
+def test_temario_compilado_con_otra_huella_se_descarta(tmp_path):
+    _, ruta = _compilar_temario(tmp_path, origen="codigo-anterior")
+    assert not isinstance(_sistema_compilado(ruta).temas, bio.TemarioPerezoso)
+
+
+def test_temario_compilado_con_indice_danado_se_descarta(tmp_path):
+    _, ruta = _compilar_temario(tmp_path)
+    datos = bytearray(open(ruta, 'rb').read())
+    datos[bio.TemarioCompilado.CABECERA.size + 1] ^= 0xFF
+    open(ruta, 'wb').write(datos)
+    assert not isinstance(_sistema_compilado(ruta).temas, bio.TemarioPerezoso)
+
+
+def test_tema_compilado_danado_se_construye_desde_el_codigo(tmp_path):
+    temas, ruta = _compilar_temario(tmp_path)
+    compilado = bio.TemarioCompilado(ruta)
+    _, desplazamiento, tamano, _ = compilado.buscar(3)
+    inicio = compilado.base + desplazamiento
+    compilado.cerrar()
+    datos = bytearray(open(ruta, 'rb').read())
+    datos[inicio + tamano // 2] ^= 0xFF
+    open(ruta, 'wb').write(datos)
+
+    sistema = _sistema_compilado(ruta)
+    assert isinstance(sistema.temas, bio.TemarioPerezoso)
+    assert sistema.temas[3].titulo == temas[3].titulo
+    assert list(sistema.temas[3].preguntas) == list(temas[3].preguntas)
+    assert sistema.temas[2].titulo == temas[2].titulo
+
+
+def test_estadisticas_incrementales_coinciden_con_el_historial(tmp_path):
+    aleatorio = random.Random(7)
+    ruta = str(tmp_path / "progreso.db")
+    almacen = bio.AlmacenSQLite(ruta, "ana")
+    # Notas casi iguales: la fórmula SUM(x²) - n·media² pierde aquí la varianza
+    notas = [(tema, 97.3 + aleatorio.random() * 1e-4) for tema in (1, 2, 3) for _ in range(400)]
+    aleatorio.shuffle(notas)
+    for i, (tema, nota) in enumerate(notas):
+        almacen.registrar({'tipo': 'test',
+                           'registro': _registro(tema, nota, f"2024-01-01 {i // 60:02d}:{i % 60:02d}")})
+
+    # Agregados de la base de datos, combinados tema a tema, y después incrementales
+    estadisticas = bio.EstadisticasProgreso.desde_dict(almacen.cargar()[0]['estadisticas'])
+    for tema, nota in ((2, 40.0), (4, 88.5)):
+        registro = _registro(tema, nota, "2024-02-01 10:00")
+        almacen.registrar({'tipo': 'test', 'registro': registro})
+        estadisticas.registrar_test(registro)
+
+    referencia = bio.EstadisticasProgreso.desde_historial(almacen.leer_historial())
+    assert estadisticas.tests == referencia.tests
+    assert estadisticas.media == pytest.approx(referencia.media, rel=1e-12)
+    assert estadisticas.varianza() == pytest.approx(referencia.varianza(), rel=1e-9)
+    for tema, valores in referencia.por_tema.items():
+        assert estadisticas.por_tema[tema] == pytest.approx(valores, rel=1e-12)
+    assert estadisticas.ultimos(5) == referencia.ultimos(5)
+
+    # Sin las dos últimas notas la varianza es ~1e-9 y no debe perderse
+    cercanas = bio.AlmacenSQLite(str(tmp_path / "cercanas.db"), "luis")
+    for tema, nota in notas:
+        cercanas.registrar({'tipo': 'test', 'registro': _registro(tema, nota)})
+    agregados = bio.EstadisticasProgreso.desde_dict(cercanas.cargar()[0]['estadisticas'])
+    exacta = bio.EstadisticasProgreso.desde_historial(cercanas.leer_historial())
+    assert agregados.varianza() == pytest.approx(exacta.varianza(), rel=1e-6)
+    almacen.cerrar()
+    cercanas.cerrar()
+
+
+def test_microtubulos_taxol_los_alarga_y_nocodazol_los_acorta():
+    def media(**farmacos):
+        poblacion = bio.PoblacionMicrotubulos(2000, tubulina=10.0, semilla=1, **farmacos)
+        poblacion.avanzar(600)
+        assert (poblacion.longitud >= 0).all()
+        resumen = poblacion.resumen()
+        assert 0.0 <= resumen['libre'] <= 10.0
+        return resumen
+
+    control = media()
+    assert control['catastrofes_min'] > 0 and control['rescates_min'] > 0
+    assert media(taxol=5.0)['longitud_media'] > control['longitud_media']
+    assert media(nocodazol=5.0)['longitud_media'] < control['longitud_media']
+
+
+def test_actina_tapada_no_pierde_subunidades_por_el_extremo_mas():
+    p = bio.ParametrosActina()
+    poblacion = bio.PoblacionActina(5000, actina=0.0, citocalasina=100.0, semilla=2)
+    poblacion.subunidades[:] = 1000
+    poblacion.avanzar(10.0)
+    assert poblacion.resumen()['tapados'] > 0.99
+    # Sin actina G libre solo se pierden subunidades por el extremo -
+    perdidas = 1000 - poblacion.subunidades.mean()
+    assert perdidas == pytest.approx(p.k_off_menos * 10.0, rel=0.05)
+
+
+def test_actina_los_tapones_persisten_entre_pasos():
+    p = bio.ParametrosActina()
+    poblacion = bio.PoblacionActina(5000, citocalasina=p.kd_citocalasina, semilla=3)
+    poblacion.avanzar(100.0)
+    assert poblacion.resumen()['tapados'] == pytest.approx(0.5, abs=0.05)
+    antes = poblacion.tapados.copy()
+    poblacion.avanzar(p.dt)
+    assert poblacion.tapados[antes].mean() > 0.95
+
+
+def _bomba_escalar(na_int, k_int, na_ext, k_ext, atp, ciclos):
+    """La simulación original de la bomba, ciclo a ciclo"""
+    for _ in range(ciclos):
+        if atp > 0:
+            na_int -= 3
+            k_int += 2
+            na_ext += 3
+            k_ext -= 2
+            atp -= 1
+            na_int = max(na_int, 5)
+            k_ext = max(k_ext, 2)
+    return na_int, k_int, na_ext, k_ext, atp
+
+
+def test_bomba_en_forma_cerrada_coincide_con_el_bucle_por_ciclo():
+    ensemble = bio.EnsambleBombaNaK.con_variabilidad(300, variacion=0.3, semilla=11, atp=20)
+    iniciales = [getattr(ensemble, nombre).copy() for nombre in bio.EnsambleBombaNaK.VARIABLES]
+    paso_a_paso = bio.EnsambleBombaNaK.con_variabilidad(300, variacion=0.3, semilla=11, atp=20)
+
+    ensemble.avanzar(35)
+    for _ in range(35):
+        paso_a_paso.avanzar(1)
+    for i, celula in enumerate(zip(*iniciales)):
+        esperado = _bomba_escalar(*(float(v) for v in celula[:4]), int(celula[4]), 35)
+        obtenido = [float(getattr(ensemble, nombre)[i]) for nombre in bio.EnsambleBombaNaK.VARIABLES]
+        assert obtenido == pytest.approx(esperado)
+        assert [float(getattr(paso_a_paso, nombre)[i])
+                for nombre in bio.EnsambleBombaNaK.VARIABLES] == pytest.approx(esperado)
+
+
+def test_media_del_ensemble_reproduce_la_simulacion_original():
+    ensemble = bio.EnsambleBombaNaK(1000)
+    muestras = ensemble.simular(10, fotogramas=5)
+    assert [ciclo for ciclo, _ in muestras] == [2, 4, 6, 8, 10]
+    esperado = _bomba_escalar(10, 140, 145, 4, 100, 10)
+    resumen = muestras[-1][1]
+    for nombre, valor in zip(bio.EnsambleBombaNaK.VARIABLES, esperado):
+        assert resumen[nombre]['media'] == pytest.approx(valor)
+        assert resumen[nombre]['desviacion'] == 0.0
+
+
+def _mismos_resultados(a, b):
+    assert a.keys() == b.keys()
+    for clave in a:
+        if isinstance(a[clave], bio.np.ndarray):
+            assert bio.np.array_equal(a[clave], b[clave]), clave
+        else:
+            assert a[clave] == b[clave], clave
+
+
+def test_replicas_del_ciclo_no_dependen_del_numero_de_procesos():
+    uno = bio.simular_replicas_ciclo(5000, 48.0, replicas=3, semilla=5, procesos=1)
+    dos = bio.simular_replicas_ciclo(5000, 48.0, replicas=3, semilla=5, procesos=2)
+    assert len(uno) == len(dos) == 3
+    for a, b in zip(uno, dos):
+        _mismos_resultados(a, b)
+    # Réplicas independientes: semillas distintas
+    assert not bio.np.array_equal(uno[0]['totales'], uno[1]['totales'])
+    # Ciclo de 24 h con pocas pérdidas: la colonia se duplica en algo más de un día
+    for replica in uno:
+        assert 24.0 < replica['tiempo_duplicacion'] < 36.0
+
+
+def test_frap_no_depende_del_numero_de_procesos():
+    uno = bio.simular_frap(20000, 2.0, semilla=4, procesos=1)
+    dos = bio.simular_frap(20000, 2.0, semilla=4, procesos=2)
+    _mismos_resultados(uno, dos)
+
+
+def test_frap_recupera_hasta_la_fraccion_movil():
+    parametros = bio.ParametrosFRAP(balsas=0, dt=0.05)
+    resultado = bio.simular_frap(100000, 40.0, parametros, semilla=3, procesos=1)
+    assert resultado['recuperacion_lipidos'][0] == 0.0
+    assert resultado['fraccion_movil_lipidos'] == pytest.approx(1.0, abs=0.1)
+    assert resultado['fraccion_movil_proteinas'] == pytest.approx(
+        1.0 - parametros.fraccion_inmovil, abs=0.1)
+    assert resultado['t_medio_lipidos'] < resultado['t_medio_proteinas']
+
+
+def _desempaquetar(genomas, loci):
+    """Bits de cada locus como booleanos, (..., palabras) → (..., loci)"""
+    octetos = bio.np.ascontiguousarray(genomas.astype('<u8')).view(bio.np.uint8)
+    return bio.np.unpackbits(octetos, axis=-1, bitorder='little')[..., :loci].astype(bool)
+
+
+def _gametos_desempaquetados(poblacion, padres, rng):
+    """Meiosis de referencia locus a locus, con los mismos sorteos que gametos()"""
+    np = bio.np
+    a = _desempaquetar(poblacion.genomas[padres, 0], poblacion.loci)
+    b = _desempaquetar(poblacion.genomas[padres, 1], poblacion.loci)
+    forma = (len(padres), poblacion.cromosomas)
+    locus = np.arange(poblacion.loci)
+
+    desde_b = np.zeros(a.shape, dtype=bool)
+    desde_b[rng.random(forma) < 0.5] = True
+    quiasmas = 1 + rng.poisson(poblacion.quiasmas - 1.0, forma)
+    for k in range(poblacion.max_quiasmas):
+        activos = (k < quiasmas) & (rng.random(forma) < 0.5)
+        if not activos.any():
+            continue
+        posiciones = np.where(activos, rng.integers(1, poblacion.loci, forma), poblacion.loci)
+        # Cambio de homólogo en cada locus a partir del sobrecruzamiento
+        desde_b ^= locus >= posiciones[..., None]
+
+    copias = np.ones(forma, dtype=np.int8)
+    no_disyuncion = rng.random(forma) < poblacion.p_no_disyuncion
+    copias[no_disyuncion] = np.where(rng.random(int(no_disyuncion.sum())) < 0.5, 0, 2)
+    return np.where(desde_b, b, a), copias
+
+
+def test_meiosis_empaquetada_coincide_con_la_referencia_por_locus():
+    poblacion = bio.PoblacionMeiosis(200, cromosomas=3, loci=150, quiasmas=3.0,
+                                     p_no_disyuncion=0.2, semilla=8)
+    poblacion.avanzar(2)
+    padres = poblacion.rng.integers(0, poblacion.individuos, 500)
+    rng_referencia = copy.deepcopy(poblacion.rng)
+
+    gametos, copias = poblacion.gametos(padres)
+    esperados, copias_esperadas = _gametos_desempaquetados(poblacion, padres, rng_referencia)
+    assert bio.np.array_equal(_desempaquetar(gametos, poblacion.loci), esperados)
+    assert bio.np.array_equal(copias, copias_esperadas)
+    assert set(bio.np.unique(copias)) == {0, 1, 2}
+    # Los bits de relleno de la última palabra siguen a 0
+    assert not _desempaquetar(gametos, 3 * 64)[..., poblacion.loci:].any()
+
+    bits = _desempaquetar(poblacion.genomas, poblacion.loci)
+    assert bio.np.allclose(poblacion.frecuencias_alelicas(), bits.mean(axis=(0, 1)))
+    assert poblacion.heterocigosidad() == pytest.approx(
+        (bits[:, 0] ^ bits[:, 1]).mean())
+
+
+def test_meiosis_solo_nacen_cigotos_euploides():
+    poblacion = bio.PoblacionMeiosis(300, cromosomas=4, loci=64, p_no_disyuncion=0.1, semilla=9)
+    poblacion.avanzar(3)
+    assert poblacion.genomas.shape == (300, 2, 4, 1)
+    resumen = poblacion.resumen()
+    # Un gameto lleva 0 o 2 copias con probabilidad 0,05 cada una: un cigoto
+    # tiene 3 (o 1) copias de un cromosoma con probabilidad 2·0,05·0,9
+    assert resumen['trisomias'] == pytest.approx([0.09] * 4, abs=0.03)
+    assert resumen['monosomias'] == pytest.approx([0.09] * 4, abs=0.03)
+
+
+def test_potencial_ghk_de_reposo_de_una_neurona():
+    # Permeabilidades relativas de libro (K+ 1, Na+ 0,04, Cl- 0,45)
+    assert float(bio.potencial_ghk(140, 4, 10, 145)) == pytest.approx(-70.0, abs=2.0)
+    assert float(bio.potencial_nernst(145, 10)) == pytest.approx(71.5, abs=0.5)
+    assert float(bio.potencial_nernst(4, 140)) == pytest.approx(-95.0, abs=0.5)
+    # Solo K+: el potencial es el de Nernst del K+
+    assert float(bio.potencial_ghk(140, 4, 10, 145, p_na=0.0, p_cl=0.0)) == pytest.approx(
+        float(bio.potencial_nernst(4, 140)))
+
+
+def test_hodgkin_huxley_dispara_solo_por_encima_del_umbral():
+    resultado = bio.simular_hodgkin_huxley([0.0, 1.0, 2.0, 10.0, 20.0])
+    espigas = resultado['espigas'].tolist()
+    assert espigas[:3] == [0, 0, 0]
+    assert espigas[3] >= 2 and espigas[4] >= espigas[3]
+    # Sin estímulo la neurona se queda en su reposo GHK
+    assert bio.np.allclose(resultado['voltaje'][:, 0], resultado['reposo'][0], atol=1e-3)
+    assert (resultado['pico'][3:] > 40.0).all()
+    assert bio.np.isnan(resultado['latencia'][:3]).all()
+    assert resultado['latencia'][4] < resultado['latencia'][3]
+
+
+_llamadas_simulacion = []
+
+def _simulacion_de_prueba(n, escala=1.0, semilla=0, procesos=None):
+    _llamadas_simulacion.append((n, escala))
+    return {'valores': bio.np.arange(n, dtype=float) * escala, 'n': n}
+
+def test_cache_acierta_falla_y_no_distingue_procesos():
+    _llamadas_simulacion.clear()
+    cache = bio.CacheSimulaciones(directorio=None)
+    primero = cache.ejecutar(_simulacion_de_prueba, 10, procesos=1)
+    # Los mismos valores por posición, por nombre y con otro número de procesos
+    segundo = cache.ejecutar(_simulacion_de_prueba, n=10, escala=1.0, procesos=4)
+    assert segundo is primero
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+    assert not primero['valores'].flags.writeable
+    cache.ejecutar(_simulacion_de_prueba, 10, escala=2.0)
+    cache.ejecutar(_simulacion_de_prueba, 10, semilla=None)
+    cache.ejecutar(_simulacion_de_prueba, 10, semilla=None)
+    assert _llamadas_simulacion == [(10, 1.0), (10, 2.0), (10, 1.0), (10, 1.0)]
+    assert (cache.aciertos, cache.fallos) == (1, 2)
+
+def test_cache_en_memoria_respeta_el_limite_de_bytes():
+    _llamadas_simulacion.clear()
+    por_resultado = bio._bytes_en_memoria({'valores': bio.np.zeros(100), 'n': 100})
+    cache = bio.CacheSimulaciones(directorio=None, max_memoria=2 * por_resultado)
+    for escala in (1.0, 2.0, 1.0, 3.0):
+        cache.ejecutar(_simulacion_de_prueba, 100, escala)
+    # El acceso a 1.0 la hizo reciente: al entrar 3.0 sale 2.0
+    assert cache.bytes_memoria <= cache.max_memoria
+    assert len(cache.memoria) == 2
+    cache.ejecutar(_simulacion_de_prueba, 100, 1.0)
+    cache.ejecutar(_simulacion_de_prueba, 100, 2.0)
+    assert _llamadas_simulacion == [(100, 1.0), (100, 2.0), (100, 3.0), (100, 2.0)]
+
+def test_cache_en_disco_recorta_los_mas_antiguos_y_relee_con_mmap(tmp_path):
+    _llamadas_simulacion.clear()
+    n = bio.UMBRAL_ARRAY_EN_DISCO // 8
+    cache = bio.CacheSimulaciones(directorio=str(tmp_path), max_memoria=0)
+    cache.ejecutar(_simulacion_de_prueba, n, 1.0)
+    por_resultado = sum(f.stat().st_size for f in tmp_path.iterdir())
+    assert len(list(tmp_path.glob('*.npy'))) == 1
+    cache.max_disco = int(2.5 * por_resultado)
+    cache.ejecutar(_simulacion_de_prueba, n, 2.0)
+    cache.ejecutar(_simulacion_de_prueba, n, 3.0)
+    assert len(list(tmp_path.glob('*.pkl'))) == 2
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= cache.max_disco
+
+    # Otra instancia (otra ejecución del programa) lee del disco con mmap
+    _llamadas_simulacion.clear()
+    nueva = bio.CacheSimulaciones(directorio=str(tmp_path))
+    resultado = nueva.ejecutar(_simulacion_de_prueba, n, 3.0)
+    assert _llamadas_simulacion == []
+    assert isinstance(resultado['valores'], bio.np.memmap)
+    assert not resultado['valores'].flags.writeable
+    assert bio.np.array_equal(resultado['valores'], bio.np.arange(n) * 3.0)
+    assert resultado['n'] == n
+    # El más antiguo se borró y hay que recalcularlo
+    nueva.ejecutar(_simulacion_de_prueba, n, 1.0)
+    assert _llamadas_simulacion == [(n, 1.0)]
+
+
+def test_sesion_grabada_se_reproduce_igual(tmp_path):
+    # El mismo temario que usa reproducir_sesiones
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria()).temas
+    # Test de repaso del tema 1, volver al menú y salir
+    cantidad = min(5, len(temas[1].preguntas))
+    entradas = ["3", "1", "1"] + ["ABCD"[i % 4] for i in range(cantidad)] + ["", "8"]
+    ruta = str(tmp_path / "sesion.jsonl")
+
+    def sesion(canal):
+        almacen = bio.AlmacenMemoria()
+        interfaz = bio.InterfazEstudio(almacen, canal=canal, temas=temas)
+        random.seed(7)
+        asyncio.run(interfaz.menu_principal())
+        return [(r['tema'], r['preguntas_totales'], r['correctas']) for r in almacen.historial]
+
+    grabacion = bio.CanalGrabacion(bio.CanalReproduccion(entradas), ruta)
+    try:
+        original = sesion(grabacion)
+    finally:
+        grabacion.cerrar()
+    assert bio.CanalReproduccion.leer_grabacion(ruta) == entradas
+    assert len(original) == 1 and original[0][:2] == (1, cantidad)
+
+    reproduccion = bio.CanalReproduccion(bio.CanalReproduccion.leer_grabacion(ruta))
+    assert sesion(reproduccion) == original
+    assert reproduccion.posicion == len(entradas)
+    assert reproduccion.caracteres > 0
+
+    resultado = asyncio.run(bio.reproducir_sesiones([entradas], 4, concurrencia=2))
+    assert (resultado.completas, resultado.entradas, resultado.tests) == (4, 4 * len(entradas), 4)
+    # Una grabación interrumpida cuenta sus entradas pero no como sesión completa
+    resultado = asyncio.run(bio.reproducir_sesiones([entradas[:5]], 2))
+    assert (resultado.completas, resultado.entradas, resultado.tests) == (0, 10, 0)
+
+
+def test_banco_de_preguntas_sobrevive_guardado_y_lectura_mapeada(tmp_path):
+    preguntas = [
+        {'enunciado': "¿Qué orgánulo sintetiza ATP? «mitocondria»", 'opciones': ["Núcleo", "Mitocondria"],
+         'respuesta': 1, 'explicacion': "La fosforilación oxidativa ocurre en la mitocondria.",
+         'nivel_dificultad': "facil"},
+        {'enunciado': "Pregunta sin nivel", 'opciones': ["A", "B", "C", "D", "E", "F"],
+         'respuesta': 5, 'explicacion': ""},
+        {'enunciado': "", 'opciones': ["Núcleo", "Ribosoma", "Lisosoma"],
+         'respuesta': 0, 'explicacion': "Enunciado vacío 🧬", 'nivel_dificultad': "dificil"},
+    ]
+    banco = bio.BancoPreguntas(preguntas)
+    assert [dict(p) for p in banco] == preguntas
+    assert [dict(p) for p in bio.BancoPreguntas.desde_columnas(banco.columnas())] == preguntas
+    ampliado = bio.BancoPreguntas(preguntas[:1])
+    ampliado.extender(bio.BancoPreguntas(preguntas[1:]))
+    assert [dict(p) for p in ampliado] == preguntas
+
+    # Guardado en un contenido compilado y leído del mapa de memoria
+    temas = bio.SistemaEstudio(bio.AlmacenMemoria(), ruta_contenido=None, ruta_banco=None,
+                               ruta_generadas=None).temas
+    temas[99] = bio.Tema(numero=99, titulo="Prueba", contenido=["Texto"], conceptos_clave=["Uno"],
+                         preguntas=banco)
+    ruta = str(tmp_path / "contenido.bin")
+    bio.TemarioCompilado.compilar(temas, ruta)
+    compilado = bio.TemarioCompilado(ruta)
+    try:
+        assert list(compilado.numeros()) == sorted(temas)
+        for numero, tema in temas.items():
+            leido = compilado.leer_tema(numero)
+            assert isinstance(leido.preguntas, bio.BancoPreguntas)
+            assert ((leido.titulo, leido.contenido, leido.conceptos_clave)
+                    == (tema.titulo, tema.contenido, tema.conceptos_clave))
+            assert [dict(p) for p in leido.preguntas] == [dict(p) for p in tema.preguntas]
+    finally:
+        compilado.cerrar()
+
+
+class _CanalEnMemoria(bio.CanalES):
+    ansi = True
+
+    def __init__(self, filas=24):
+        self.salida = []
+        self.numero_filas = filas
+
+    def escribir(self, texto):
+        self.salida.append(texto)
+
+    def filas(self):
+        return self.numero_filas
+
+
+def test_pantalla_ansi_solo_reescribe_las_lineas_cambiadas():
+    canal = _CanalEnMemoria()
+    pantalla = bio.Pantalla(canal)
+    pantalla.escribir("Banner\nMenú\nOpción 1\n")
+    pantalla.presentar()
+    # La primera pantalla no tiene con qué compararse: se borra y se envía entera
+    assert canal.salida == ["\x1b[H\x1b[2JBanner\nMenú\nOpción 1\n"]
+
+    pantalla.nueva()
+    pantalla.escribir("Banner\nTema 3\nOpción 1\n")
+    pantalla.presentar()
+    assert canal.salida[-1] == "\x1b[2;1HTema 3\x1b[K\x1b[4;1H\x1b[K"
+
+    # Dentro de la misma pantalla solo sale lo añadido
+    pantalla.escribir("Respuesta: ")
+    pantalla.presentar()
+    assert canal.salida[-1] == "Respuesta: "
+
+    # Una pantalla más corta borra lo que sobraba por debajo
+    pantalla.nueva()
+    pantalla.escribir("Banner\n")
+    pantalla.presentar()
+    assert canal.salida[-1] == "\x1b[2;1H\x1b[K\x1b[J"
+
+    # Si no cabe en la terminal se vuelve a enviar entera
+    canal.numero_filas = 2
+    pantalla.nueva()
+    pantalla.escribir("Banner\nA\nB\n")
+    pantalla.presentar()
+    assert canal.salida[-1] == "\x1b[H\x1b[2JBanner\nA\nB\n"
+    assert len(canal.salida) == 5
+
+
+def test_pantalla_sin_terminal_no_envia_secuencias_de_control():
+    canal = _CanalEnMemoria()
+    canal.ansi = False
+    pantalla = bio.Pantalla(canal)
+    for titulo in ("Menú", "Tema 3"):
+        pantalla.nueva()
+        pantalla.escribir(f"Banner\n{titulo}\n")
+        pantalla.presentar()
+    assert canal.salida == ["Banner\nMenú\n", "Banner\nTema 3\n"]
+
+
+def _registro_importado(tema):
+    return {'tema': tema, 'enunciado': "¿Cuál es la unidad básica de la vida?",
+            'opciones': ["La célula", "El átomo"], 'respuesta': "A"}
+
+def test_importacion_rechaza_temas_no_enteros():
+    temas = frozenset({1, 2, 3})
+    for tema in (1, "1", " 2 ", 3.0):
+        assert bio.validar_pregunta(_registro_importado(tema), temas)[0] == int(float(tema))
+    for tema in (1.5, "1.5", "1e0", True, None, [1]):
+        with pytest.raises(ValueError, match="tema no válido"):
+            bio.validar_pregunta(_registro_importado(tema), temas)
+
+def test_importacion_con_banco_danado_informa_sin_tocarlo(tmp_path, capsys):
+    ruta = tmp_path / "preguntas.jsonl"
+    ruta.write_text(json.dumps(_registro_importado(1)) + "\n", encoding='utf-8')
+    banco = tmp_path / "preguntas.bin"
+    banco.write_bytes(b"esto no es un banco de preguntas")
+    bio.importar_desde_archivos([str(ruta)], str(banco))
+    salida = capsys.readouterr().out
+    assert salida.startswith("Error: el banco de preguntas") and "dañado" in salida
+    assert banco.read_bytes() == b"esto no es un banco de preguntas"
+
+
+def test_test_adaptativo_no_para_por_una_sola_respuesta_estable():
+    # Dos preguntas informativas mueven la nota; las demás casi no informan
+    test = bio.TestAdaptativo([2.0, 2.0] + [0.1] * 8, [0.0] * 10)
+    for indice in (0, 1, 2):
+        test.responder(indice, True)
+    # La tercera respuesta apenas cambia la nota, pero la segunda sí la movió
+    assert abs(test.notas[-1] - test.notas[-2]) < test.TOLERANCIA_NOTA
+    assert test.error > test.error_objetivo
+    assert not test.terminado()
+    test.responder(3, False)
+    recientes = test.notas[-test.VENTANA_ESTABLE - 1:]
+    assert max(recientes) - min(recientes) < test.TOLERANCIA_NOTA
+    assert test.terminado() and test.siguiente() is None
+
+def test_test_adaptativo_para_cuando_la_nota_se_estabiliza():
+    rng = bio.np.random.default_rng(3)
+    a = bio.np.ones(30)
+    b = bio.np.tile([-1.0, 0.0, 1.0], 10)
+    for theta in (-1.5, 0.0, 1.5):
+        test = bio.TestAdaptativo(a, b)
+        while (indice := test.siguiente()) is not None:
+            test.responder(indice, rng.random() < 1 / (1 + bio.np.exp(b[indice] - theta)))
+        hechas = len(test.respondidas)
+        assert test.VENTANA_ESTABLE <= hechas <= test.max_preguntas
+        recientes = test.notas[-test.VENTANA_ESTABLE - 1:]
+        assert (hechas == test.max_preguntas or test.error <= test.error_objetivo
+                or max(recientes) - min(recientes) < test.TOLERANCIA_NOTA)
+
+
+def test_servidor_atiende_una_sesion_sin_bloquear_el_bucle(tmp_path, monkeypatch):
+    ruta_bd = str(tmp_path / "grupo.db")
+    hilos = set()
+    registrar = bio.AlmacenSQLite.registrar
+
+    def registrar_anotando(self, evento):
+        hilos.add(threading.get_ident())
+        registrar(self, evento)
+
+    monkeypatch.setattr(bio.AlmacenSQLite, 'registrar', registrar_anotando)
+    servidor = bio.ServidorEstudio(ruta_bd, puerto=0)
+    cantidad = min(5, len(servidor.temas[1].preguntas))
+    entradas = ["ana", "3", "1", "1"] + ["A"] * cantidad + ["", "8"]
+
+    async def sesion():
+        escucha = await asyncio.start_server(servidor.atender, '127.0.0.1', 0)
+        puerto = escucha.sockets[0].getsockname()[1]
+        async with escucha:
+            lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.write("".join(f"{linea}\r\n" for linea in entradas).encode('utf-8'))
+            await escritor.drain()
+            salida = await asyncio.wait_for(lector.read(), timeout=60)
+            escritor.close()
+            return threading.get_ident(), salida.decode('utf-8')
+
+    bucle, salida = asyncio.run(sesion())
+    assert "Nombre de estudiante:" in salida
+    assert "Sistema cerrado correctamente." in salida
+    assert hilos and bucle not in hilos
+    assert servidor.sesiones == 0
+    almacen = bio.AlmacenSQLite(ruta_bd, "ana")
+    try:
+        assert almacen.numero_tests() == 1
+        assert almacen.ultimos_tests(1)[0]['preguntas_totales'] == cantidad
+    finally:
+        almacen.cerrar()